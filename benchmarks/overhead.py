@@ -0,0 +1,135 @@
+"""Overhead benchmark of the line by line profiling backends.
+
+A synthetic script with a hot loop in a profiled function, and calls to
+many functions which are not profiled, is run without profiling, then with
+each backend. The overhead is the ratio of the profiled run duration to the
+duration without profiling.
+
+Usage::
+
+    $ python benchmarks/overhead.py --python python3.12 --repeat 5
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+from pathlib import Path
+
+RUNNER_SCRIPT = (
+    Path(__file__).resolve().parent.parent / "src" / "lineprofilergui" / "runner.py"
+)
+
+SCRIPT_CODE = textwrap.dedent(
+    """
+    import sys
+
+    try:
+        profile
+    except NameError:
+        profile = lambda func: func
+
+    def not_profiled(x):
+        return x + 1
+
+    @profile
+    def hot_loop(n):
+        total = 0
+        for i in range(n):
+            total += not_profiled(i)
+        return total
+
+    def cold_loop(n):
+        total = 0
+        for i in range(n):
+            total += not_profiled(i)
+        return total
+
+    hot_loop(int(sys.argv[1]))
+    cold_loop(int(sys.argv[1]))
+    """
+)
+
+
+def backend_commands(python, kernprof, script, outfile):
+    """Command of each backend, or None if not available."""
+    version = subprocess.run(  # noqa: S603
+        [python, "-c", "import sys; print(sys.version_info >= (3, 12))"],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+    runner = [python, os.fspath(RUNNER_SCRIPT), "-o", outfile]
+    return {
+        "none": [python, script],
+        "kernprof": [kernprof, "-l", "-o", outfile, script] if kernprof else None,
+        "settrace": [*runner, "--backend", "settrace", script],
+        "monitoring": (
+            [*runner, "--backend", "monitoring", script] if version == "True" else None
+        ),
+        "settrace hits": [*runner, "--hits-only", script],
+        "monitoring hits": (
+            [*runner, "--backend", "monitoring", "--hits-only", script]
+            if version == "True"
+            else None
+        ),
+        "sampling": [*runner, "--backend", "sampling", script],
+        "sampling all": [
+            *runner,
+            "--backend",
+            "sampling",
+            "--all-functions",
+            script,
+        ],
+    }
+
+
+def measure(command, iterations):
+    start = time.perf_counter()
+    subprocess.run(  # noqa: S603
+        [*command, str(iterations)], check=True, capture_output=True
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--python", default=sys.executable, help="Python interpreter to profile"
+    )
+    parser.add_argument(
+        "--kernprof", default=shutil.which("kernprof"), help="kernprof executable"
+    )
+    parser.add_argument("--iterations", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        script = os.fspath(Path(directory) / "synthetic.py")
+        Path(script).write_text(SCRIPT_CODE)
+        outfile = os.fspath(Path(directory) / "synthetic.lprof")
+        commands = backend_commands(options.python, options.kernprof, script, outfile)
+
+        reference = None
+        for backend, command in commands.items():
+            if command is None:
+                sys.stdout.write(f"{backend:>15}: not available\n")
+                continue
+            duration = statistics.median(
+                measure(command, options.iterations) for _ in range(options.repeat)
+            )
+            if reference is None:
+                reference = duration
+            sys.stdout.write(
+                f"{backend:>15}: median {duration * 1e3:.0f}ms,"
+                f" overhead x{duration / reference:.2f}\n"
+            )
+
+
+if __name__ == "__main__":
+    main()
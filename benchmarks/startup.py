@@ -0,0 +1,118 @@
+"""Startup time benchmark of ``lineprofilergui -l file.lprof``.
+
+A synthetic script and its profiling results are generated in a temporary
+directory, then the GUI is started several times in a fresh interpreter.
+Two durations are measured from the interpreter start: when the main window is
+shown, and when the profiling results are displayed.
+
+Usage::
+
+    $ python benchmarks/startup.py --functions 200 --repeat 5
+"""
+
+import argparse
+import os
+import pickle
+import statistics
+import subprocess
+import sys
+import tempfile
+import textwrap
+from pathlib import Path
+from types import SimpleNamespace
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# time.perf_counter() is not comparable between processes,
+# so the reference is taken as soon as possible in the child process.
+MEASURE_CODE = textwrap.dedent(
+    """
+    import time
+    start = time.perf_counter()
+
+    import sys
+
+    from PySide6 import QtCore, QtWidgets
+
+    from lineprofilergui.main import make_window
+
+    app = QtWidgets.QApplication([])
+    win = make_window(["-l", sys.argv[1]])
+    shown = time.perf_counter() - start
+
+    def check_loaded():
+        if win.historyCombo.count():
+            loaded = time.perf_counter() - start
+            timer.stop()
+            sys.stdout.write(f"{shown} {loaded}\\n")
+            app.quit()
+
+    timer = QtCore.QTimer()
+    timer.timeout.connect(check_loaded)
+    timer.start(0)
+    app.exec()
+    """
+)
+
+
+def write_synthetic_data(directory, functions, lines):
+    """Write a script with many functions and fake line profiler results."""
+    script = Path(directory) / "synthetic.py"
+    code = []
+    timings = {}
+    for func_index in range(functions):
+        start_line_no = len(code) + 1
+        code.append("@profile")
+        code.append(f"def function_{func_index}(x):")
+        stats = []
+        for line_index in range(lines):
+            code.append(f"    x = x + {line_index}")
+            stats.append((len(code), line_index + 1, 1000 * (line_index + 1)))
+        code.append("    return x")
+        code.append("")
+        timings[(str(script), start_line_no, f"function_{func_index}")] = stats
+    script.write_text("\n".join(code))
+
+    lprof = Path(directory) / "synthetic.lprof"
+    with lprof.open("wb") as fid:
+        pickle.dump(SimpleNamespace(timings=timings, unit=1e-9), fid)
+    return lprof
+
+
+def measure(lprof):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [os.fspath(SRC_DIR), env.get("PYTHONPATH")])
+    )
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    output = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", MEASURE_CODE, os.fspath(lprof)],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    shown, loaded = output.split()
+    return float(shown), float(loaded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--functions", type=int, default=200)
+    parser.add_argument("--lines", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        lprof = write_synthetic_data(directory, options.functions, options.lines)
+        results = [measure(lprof) for _ in range(options.repeat)]
+
+    for label, values in zip(("Window shown", "Results displayed"), zip(*results)):
+        sys.stdout.write(
+            f"{label}: median {statistics.median(values) * 1e3:.0f}ms,"
+            f" min {min(values) * 1e3:.0f}ms\n"
+        )
+
+
+if __name__ == "__main__":
+    main()
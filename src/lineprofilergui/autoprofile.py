@@ -0,0 +1,320 @@
+"""Automatic selection of the functions to profile line by line.
+
+The script is first run with a function level profiler (cProfile). The
+functions are then ranked by cumulative or self time, and the selected ones
+are profiled line by line during a second run, without any decorator.
+"""
+
+import os
+import pstats
+from pathlib import Path
+
+from PySide6 import QtCore, QtWidgets
+from PySide6.QtCore import Qt
+
+from .runner import library_paths, normalized_path
+from .utils import SortableTreeWidgetItem
+from .utils import translate as _
+
+RANK_BY_CUMULATIVE = "cumulative"
+RANK_BY_SELF = "self"
+
+DEFAULT_TOP_N = 10
+DEFAULT_THRESHOLD = 1.0  # Percent of the total time
+
+
+def is_user_function(filename, name):
+    """Check if the function can and should be profiled line by line."""
+    if name.startswith("<") or filename.startswith(("~", "<")):
+        # Builtins, module level code, lambdas, comprehensions...
+        return False
+    path = normalized_path(filename)
+    if Path(path).parent == Path(__file__).parent:
+        # Profiling runner
+        return False
+    if "site-packages" in Path(path).parts or path.startswith(library_paths()):
+        return False
+    return Path(path).is_file()
+
+
+class FunctionStats:
+    def __init__(self, key, stats):
+        self.filename, self.line_no, self.name = key
+        # Same layout as pstats.Stats.stats values
+        (
+            self.primitive_calls,
+            self.ncalls,
+            self.self_time,
+            self.cumulative_time,
+            _callers,
+        ) = stats
+
+    @property
+    def key(self):
+        """Identify the function to be profiled line by line."""
+        return (self.filename, self.line_no, self.name)
+
+    @property
+    def func_id(self):
+        """Same identifier as FunctionData.func_id."""
+        return (os.path.normpath(self.filename), self.name)
+
+    @property
+    def ncalls_str(self):
+        if self.ncalls == self.primitive_calls:
+            return str(self.ncalls)
+        return f"{self.ncalls}/{self.primitive_calls}"
+
+    def rank_time(self, rank_by):
+        return self.self_time if rank_by == RANK_BY_SELF else self.cumulative_time
+
+
+class FunctionProfile:
+    """Function level profile of a run, restricted to the user functions."""
+
+    def __init__(self, functions, total_time):
+        self.functions = functions
+        self.total_time = total_time
+
+    def ranked(self, rank_by=RANK_BY_CUMULATIVE):
+        return sorted(
+            self.functions, key=lambda func: func.rank_time(rank_by), reverse=True
+        )
+
+    def select(
+        self,
+        rank_by=RANK_BY_CUMULATIVE,
+        top_n=DEFAULT_TOP_N,
+        threshold=DEFAULT_THRESHOLD,
+    ):
+        """Select the ``top_n`` first functions above ``threshold`` percent of the total time."""
+        min_time = self.total_time * threshold / 100
+        return [
+            func
+            for func in self.ranked(rank_by)[:top_n]
+            if func.rank_time(rank_by) >= min_time
+        ]
+
+
+def load_function_profile(filename):
+    """Load the function level profile saved by cProfile."""
+    stats = pstats.Stats(os.fspath(filename))
+    functions = [
+        FunctionStats(key, func_stats)
+        for key, func_stats in stats.stats.items()
+        if is_user_function(key[0], key[2])
+    ]
+    return FunctionProfile(functions, stats.total_tt)
+
+
+class FunctionStatsWidget(QtWidgets.QTreeWidget):
+    """Display the function level profile, linked to the line by line results."""
+
+    function_activated = QtCore.Signal(object)
+
+    column_header_text = [
+        _("Function"),
+        _("Calls"),
+        _("Self (ms)"),
+        _("Cumulative (ms)"),
+        _("File"),
+    ]
+    COL_NAME = 0
+    COL_CALLS = 1
+    COL_SELF = 2
+    COL_CUMULATIVE = 3
+    COL_FILE = 4
+
+    KEY_ROLE = Qt.UserRole + 2
+
+    def __init__(self, parent=None, checkable=False):
+        super().__init__(parent)
+        self.checkable = checkable
+        self.setup_ui()
+
+    def setup_ui(self):
+        self.setColumnCount(len(self.column_header_text))
+        self.setHeaderLabels(self.column_header_text)
+        self.setRootIsDecorated(False)
+        self.setUniformRowHeights(True)
+        self.setSortingEnabled(True)
+        self.itemActivated.connect(self.item_activated)
+
+    def set_function_profile(self, function_profile, line_profiled=(), checked=()):
+        """Fill the widget.
+
+        ``line_profiled`` are the func_id of the functions profiled line by line,
+        and ``checked`` the keys of the functions to check if checkable.
+        """
+        self.clear()
+        if function_profile is None:
+            return
+        self.setSortingEnabled(False)
+        for func in function_profile.functions:
+            item = SortableTreeWidgetItem(self)
+            item.setData(self.COL_NAME, Qt.DisplayRole, func.name)
+            item.setData(self.COL_NAME, Qt.UserRole, func.func_id)
+            item.setData(self.COL_CALLS, Qt.DisplayRole, func.ncalls_str)
+            item.setData(self.COL_CALLS, item.SORT_ROLE, func.ncalls)
+            item.setData(self.COL_SELF, Qt.DisplayRole, f"{func.self_time * 1e3:.3f}")
+            item.setData(self.COL_SELF, item.SORT_ROLE, func.self_time)
+            item.setData(
+                self.COL_CUMULATIVE, Qt.DisplayRole, f"{func.cumulative_time * 1e3:.3f}"
+            )
+            item.setData(self.COL_CUMULATIVE, item.SORT_ROLE, func.cumulative_time)
+            item.setData(
+                self.COL_FILE, Qt.DisplayRole, f"{func.filename}:{func.line_no}"
+            )
+            for col in (self.COL_CALLS, self.COL_SELF, self.COL_CUMULATIVE):
+                item.setTextAlignment(col, Qt.AlignRight)
+            if self.checkable:
+                item.setData(self.COL_NAME, self.KEY_ROLE, func.key)
+                item.setCheckState(
+                    self.COL_NAME, Qt.Checked if func.key in checked else Qt.Unchecked
+                )
+            if func.func_id in line_profiled:
+                font = item.font(self.COL_NAME)
+                font.setBold(True)
+                item.setFont(self.COL_NAME, font)
+                item.setToolTip(self.COL_NAME, _("Profiled line by line"))
+        self.setSortingEnabled(True)
+        self.sortByColumn(self.COL_CUMULATIVE, Qt.DescendingOrder)
+        for col in range(self.columnCount() - 1):
+            self.resizeColumnToContents(col)
+
+    def checked_keys(self):
+        return [
+            item.data(self.COL_NAME, self.KEY_ROLE)
+            for item in self.iter_items()
+            if item.checkState(self.COL_NAME) == Qt.Checked
+        ]
+
+    def iter_items(self):
+        for index in range(self.topLevelItemCount()):
+            yield self.topLevelItem(index)
+
+    def select_function(self, func_id):
+        for item in self.iter_items():
+            if item.data(self.COL_NAME, Qt.UserRole) == func_id:
+                self.setCurrentItem(item)
+                return
+
+    @QtCore.Slot(QtWidgets.QTreeWidgetItem)
+    def item_activated(self, item):
+        self.function_activated.emit(item.data(self.COL_NAME, Qt.UserRole))
+
+
+class UiTargetsDialog(QtWidgets.QDialog):
+    """Select the functions to profile line by line."""
+
+    def __init__(self, parent, function_profile):
+        self.function_profile = function_profile
+
+        super().__init__(parent)
+        self.setup_ui()
+        self.read_settings()
+        self.apply_rule()
+
+    def setup_ui(self):
+        self.resize(700, 400)
+        self.setModal(True)
+        self.mainLayout = QtWidgets.QVBoxLayout(self)
+
+        # Selection rule
+        self.ruleLayout = QtWidgets.QHBoxLayout()
+        self.rankByLabel = QtWidgets.QLabel(self)
+        self.ruleLayout.addWidget(self.rankByLabel)
+        self.rankByCombo = QtWidgets.QComboBox(self)
+        self.rankByCombo.addItem("", RANK_BY_CUMULATIVE)
+        self.rankByCombo.addItem("", RANK_BY_SELF)
+        self.ruleLayout.addWidget(self.rankByCombo)
+        self.topNLabel = QtWidgets.QLabel(self)
+        self.ruleLayout.addWidget(self.topNLabel)
+        self.topNSpinBox = QtWidgets.QSpinBox(self)
+        self.topNSpinBox.setRange(1, 1000)
+        self.ruleLayout.addWidget(self.topNSpinBox)
+        self.thresholdLabel = QtWidgets.QLabel(self)
+        self.ruleLayout.addWidget(self.thresholdLabel)
+        self.thresholdSpinBox = QtWidgets.QDoubleSpinBox(self)
+        self.thresholdSpinBox.setRange(0, 100)
+        self.thresholdSpinBox.setDecimals(1)
+        self.thresholdSpinBox.setSuffix(" %")
+        self.ruleLayout.addWidget(self.thresholdSpinBox)
+        self.ruleLayout.addStretch()
+        self.mainLayout.addLayout(self.ruleLayout)
+
+        # Functions
+        self.functionsWidget = FunctionStatsWidget(self, checkable=True)
+        self.mainLayout.addWidget(self.functionsWidget)
+
+        # Buttons
+        self.buttonBox = QtWidgets.QDialogButtonBox(self)
+        self.buttonBox.setOrientation(Qt.Horizontal)
+        self.profileButton = self.buttonBox.addButton(
+            "", QtWidgets.QDialogButtonBox.AcceptRole
+        )
+        self.buttonBox.addButton(QtWidgets.QDialogButtonBox.Cancel)
+        self.mainLayout.addWidget(self.buttonBox)
+        self.buttonBox.accepted.connect(self.accept)
+        self.buttonBox.rejected.connect(self.reject)
+
+        self.rankByCombo.currentIndexChanged.connect(self.apply_rule)
+        self.topNSpinBox.valueChanged.connect(self.apply_rule)
+        self.thresholdSpinBox.valueChanged.connect(self.apply_rule)
+
+        self.retranslate_ui()
+
+    def retranslate_ui(self):
+        self.setWindowTitle(_("Line Profiler GUI - Functions to profile"))
+        self.rankByLabel.setText(_("Rank by"))
+        self.rankByCombo.setItemText(0, _("cumulative time"))
+        self.rankByCombo.setItemText(1, _("self time"))
+        self.topNLabel.setText(_("Select the top"))
+        self.topNSpinBox.setSuffix(_(" functions"))
+        self.thresholdLabel.setText(_("above"))
+        self.thresholdSpinBox.setToolTip(_("Percentage of the total time"))
+        self.profileButton.setText(_("Profile line by line"))
+
+    def read_settings(self):
+        settings = QtCore.QSettings()
+        settings.beginGroup("AutoProfile")
+        rank_by = settings.value("rankBy", RANK_BY_CUMULATIVE, str)
+        self.rankByCombo.setCurrentIndex(max(0, self.rankByCombo.findData(rank_by)))
+        self.topNSpinBox.setValue(settings.value("topN", DEFAULT_TOP_N, int))
+        self.thresholdSpinBox.setValue(
+            settings.value("threshold", DEFAULT_THRESHOLD, float)
+        )
+        settings.endGroup()
+
+    def write_settings(self):
+        settings = QtCore.QSettings()
+        settings.beginGroup("AutoProfile")
+        settings.setValue("rankBy", self.rankByCombo.currentData())
+        settings.setValue("topN", self.topNSpinBox.value())
+        settings.setValue("threshold", self.thresholdSpinBox.value())
+        settings.endGroup()
+
+    @QtCore.Slot()
+    def apply_rule(self):
+        rank_by = self.rankByCombo.currentData()
+        selected = self.function_profile.select(
+            rank_by, self.topNSpinBox.value(), self.thresholdSpinBox.value()
+        )
+        self.functionsWidget.set_function_profile(
+            self.function_profile, checked={func.key for func in selected}
+        )
+        sort_column = (
+            FunctionStatsWidget.COL_SELF
+            if rank_by == RANK_BY_SELF
+            else FunctionStatsWidget.COL_CUMULATIVE
+        )
+        self.functionsWidget.sortByColumn(sort_column, Qt.DescendingOrder)
+
+    def targets(self):
+        """Keys of the functions to profile line by line."""
+        return self.functionsWidget.checked_keys()
+
+    @QtCore.Slot()
+    def accept(self):
+        self.write_settings()
+        super().accept()
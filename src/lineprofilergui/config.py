@@ -1,6 +1,7 @@
 import os
 import shlex
 import shutil
+import sys
 import tempfile
 from functools import cached_property
 from pathlib import Path
@@ -8,9 +9,20 @@ from pathlib import Path
 from PySide6 import QtCore, QtGui, QtWidgets
 from PySide6.QtCore import Qt
 
+from .options import (
+    BACKEND_MONITORING,
+    BACKEND_SAMPLING,
+    BACKEND_SETTRACE,
+    DEFAULT_BLOCKING_THRESHOLD,
+    DEFAULT_SAMPLING_INTERVAL,
+    conflicting_options,
+    parse_cpus,
+)
 from .utils import ICONS, MONOSPACE_FONT, PIXMAPS
 from .utils import translate as _
 
+BACKEND_KERNPROF = "kernprof"
+
 
 class Config:
     def __init__(self):
@@ -22,6 +34,29 @@ class Config:
         self.config_env = ""
         self.config_stats = None
         self.config_kernprof = None
+        self.config_python = None
+        self.memory = False
+        self.histograms = False
+        self.cpu_time = False
+        self.threads = False
+        self.calls = False
+        self.gc_time = False
+        self.hits_only = False
+        self.backend = BACKEND_KERNPROF
+        self.sampling_interval = DEFAULT_SAMPLING_INTERVAL  # ms
+        self.sampling_all_functions = True
+        self.forkserver = False
+        self.preload = ""
+        self.steady_function = ""
+        self.steady_calls = 1
+        self.async_mode = False
+        self.blocking_threshold = DEFAULT_BLOCKING_THRESHOLD  # ms
+        # Run environment controls, for comparable runs
+        self.cpus = ""
+        self.nice = 0
+        self.hash_seed = None
+        self.disable_gc = False
+        self.idle_check = False
 
         self._temp_dir_obj = None
         self._temp_dir = None
@@ -37,6 +72,14 @@ class Config:
         if self._temp_dir_obj:
             self._temp_dir_obj.cleanup()
 
+    def copy(self):
+        """Return a copy with its own temporary directory, for concurrent runs."""
+        config = Config()
+        for name, value in vars(self).items():
+            if name not in ("_temp_dir_obj", "_temp_dir", "temp_dir"):
+                setattr(config, name, value)
+        return config
+
     @property
     def wdir(self):
         return self.config_wdir or self.default_wdir
@@ -102,6 +145,80 @@ class Config:
         default_kernprof_path = not self.config_kernprof and self.default_kernprof
         return default_kernprof_path or Path(self.config_kernprof).is_file()
 
+    @property
+    def function_stats(self):
+        """Function level statistics file, used to select the functions to profile."""
+        return os.fspath(Path(self.temp_dir) / f"{Path(self.script).stem}.prof")
+
+    @property
+    def targets_file(self):
+        """File listing the functions to profile without decorator."""
+        return os.fspath(Path(self.temp_dir) / "targets.json")
+
+    @property
+    def resources_file(self):
+        """Resource usage of the profiled process, written by the runner."""
+        return os.fspath(Path(self.temp_dir) / "resources.json")
+
+    @property
+    def python(self):
+        return self.config_python or self.default_python
+
+    @property
+    def default_python(self):
+        return sys.executable
+
+    @property
+    def isvalid_python(self):
+        return not self.config_python or Path(self.config_python).is_file()
+
+    @property
+    def isvalid_backend(self):
+        if self.backend != BACKEND_MONITORING or self.config_python:
+            # The version of another interpreter is checked by the runner
+            return True
+        return hasattr(sys, "monitoring")
+
+    def enabled_options(self):
+        """Return the names of the enabled options, see options.OPTION_CONFLICTS."""
+        names = {self.backend}
+        names.update(
+            name
+            for name in ("memory", "histograms", "cpu_time", "threads", "calls")
+            if getattr(self, name)
+        )
+        if self.async_mode:
+            names.add("asyncio")
+        if self.hits_only:
+            names.add("hits_only")
+        return names
+
+    @property
+    def isvalid_options(self):
+        enabled = self.enabled_options()
+        return not any(conflicting_options(name, enabled) for name in enabled)
+
+    @property
+    def preload_modules(self):
+        return [name.strip() for name in self.preload.split(",") if name.strip()]
+
+    @property
+    def isvalid_forkserver(self):
+        # The server forks a child for each run
+        return not self.forkserver or hasattr(os, "fork")
+
+    @property
+    def cpu_list(self):
+        return parse_cpus(self.cpus)
+
+    @property
+    def isvalid_cpus(self):
+        try:
+            self.cpu_list  # noqa: B018
+        except ValueError:
+            return False
+        return True
+
     @property
     def env(self):
         env = {}
@@ -125,8 +242,13 @@ class Config:
             and self.isvalid_script
             and self.isvalid_warmup
             and self.isvalid_stats
-            and self.isvalid_kernprof
+            and (self.backend != BACKEND_KERNPROF or self.isvalid_kernprof)
+            and self.isvalid_python
+            and self.isvalid_backend
+            and self.isvalid_options
+            and self.isvalid_forkserver
             and self.isvalid_env
+            and self.isvalid_cpus
         )
 
 
@@ -148,6 +270,32 @@ class UiConfigDialog(QtWidgets.QDialog):
         self.statsWidget.setText(self.config.config_stats)
         self.statsTmp.setChecked(self.config.stats_tmp)
         self.kernprofWidget.setText(self.config.config_kernprof)
+        self.pythonWidget.setText(self.config.config_python)
+        self.memoryCheckBox.setChecked(self.config.memory)
+        self.histogramsCheckBox.setChecked(self.config.histograms)
+        self.cpuTimeCheckBox.setChecked(self.config.cpu_time)
+        self.threadsCheckBox.setChecked(self.config.threads)
+        self.callsCheckBox.setChecked(self.config.calls)
+        self.gcTimeCheckBox.setChecked(self.config.gc_time)
+        self.hitsOnlyCheckBox.setChecked(self.config.hits_only)
+        self.backendCombo.setCurrentIndex(
+            max(0, self.backendCombo.findData(self.config.backend))
+        )
+        self.samplingIntervalSpinBox.setValue(self.config.sampling_interval)
+        self.samplingAllCheckBox.setChecked(self.config.sampling_all_functions)
+        self.forkserverCheckBox.setChecked(self.config.forkserver)
+        self.preloadWidget.setText(self.config.preload)
+        self.steadyCallsSpinBox.setValue(self.config.steady_calls)
+        self.steadyFunctionWidget.setText(self.config.steady_function)
+        self.asyncioCheckBox.setChecked(self.config.async_mode)
+        self.blockingThresholdSpinBox.setValue(self.config.blocking_threshold)
+        self.cpusWidget.setText(self.config.cpus)
+        self.niceSpinBox.setValue(self.config.nice)
+        self.hashSeedSpinBox.setValue(
+            -1 if self.config.hash_seed is None else self.config.hash_seed
+        )
+        self.disableGcCheckBox.setChecked(self.config.disable_gc)
+        self.idleCheckBox.setChecked(self.config.idle_check)
 
         self.update()
 
@@ -162,16 +310,46 @@ class UiConfigDialog(QtWidgets.QDialog):
         config.config_stats = self.statsWidget.text() or None
         config.stats_tmp = self.statsTmp.isChecked()
         config.config_kernprof = self.kernprofWidget.text() or None
+        config.config_python = self.pythonWidget.text() or None
+        config.memory = self.memoryCheckBox.isChecked()
+        config.histograms = self.histogramsCheckBox.isChecked()
+        config.cpu_time = self.cpuTimeCheckBox.isChecked()
+        config.threads = self.threadsCheckBox.isChecked()
+        config.calls = self.callsCheckBox.isChecked()
+        config.gc_time = self.gcTimeCheckBox.isChecked()
+        config.hits_only = self.hitsOnlyCheckBox.isChecked()
+        config.backend = self.backendCombo.currentData()
+        config.sampling_interval = self.samplingIntervalSpinBox.value()
+        config.sampling_all_functions = self.samplingAllCheckBox.isChecked()
+        config.forkserver = self.forkserverCheckBox.isChecked()
+        config.preload = self.preloadWidget.text()
+        config.steady_calls = self.steadyCallsSpinBox.value()
+        config.steady_function = self.steadyFunctionWidget.text().strip()
+        config.async_mode = self.asyncioCheckBox.isChecked()
+        config.blocking_threshold = self.blockingThresholdSpinBox.value()
+        config.cpus = self.cpusWidget.text()
+        config.nice = self.niceSpinBox.value()
+        hash_seed = self.hashSeedSpinBox.value()
+        config.hash_seed = None if hash_seed < 0 else hash_seed
+        config.disable_gc = self.disableGcCheckBox.isChecked()
+        config.idle_check = self.idleCheckBox.isChecked()
 
     def update(self):
         self.wdirWidget.setPlaceholderText(self.config.default_wdir)
         self.kernprofWidget.setPlaceholderText(self.config.default_kernprof)
+        self.pythonWidget.setPlaceholderText(self.config.default_python)
         self.on_wdirWidget_textChanged("")
         self.on_scriptWidget_textChanged("")
         self.on_warmupWidget_textChanged("")
         self.on_statsWidget_textChanged("")
         self.on_kernprofWidget_textChanged("")
+        self.on_pythonWidget_textChanged("")
         self.on_envWidget_textChanged("")
+        self.on_cpusWidget_textChanged("")
+        self.on_backendCombo_currentIndexChanged(0)
+        self.update_preload_enabled()
+        self.update_blocking_threshold_enabled()
+        self.update_options_enabled()
 
     def update_stats_placeholder(self):
         if not self.config.stats_tmp:
@@ -334,6 +512,188 @@ class UiConfigDialog(QtWidgets.QDialog):
         self.kernprofWidget.setValidator(ConfigValidator(self, "kernprof"))
         row += 1
 
+        # python executable, for the profiling modes not supported by kernprof
+        self.pythonLabel = QtWidgets.QLabel(self)
+        self.configLayout.setWidget(
+            row, QtWidgets.QFormLayout.LabelRole, self.pythonLabel
+        )
+        self.pythonLayout = QtWidgets.QHBoxLayout()
+        self.pythonWidget = QtWidgets.QLineEdit(self)
+        self.pythonWidget.setObjectName("pythonWidget")
+        self.pythonLayout.addWidget(self.pythonWidget)
+        self.pythonStatusLabel = QtWidgets.QLabel(self)
+        self.pythonStatusLabel.setPixmap(PIXMAPS["NOK"])
+        self.pythonLayout.addWidget(self.pythonStatusLabel)
+        self.pythonButton = QtWidgets.QPushButton(self)
+        self.pythonButton.setIcon(ICONS["READFILE"])
+        self.pythonButton.setObjectName("pythonButton")
+        self.pythonLayout.addWidget(self.pythonButton)
+        self.configLayout.setLayout(
+            row, QtWidgets.QFormLayout.FieldRole, self.pythonLayout
+        )
+        self.pythonWidget.setValidator(ConfigValidator(self, "python"))
+        row += 1
+
+        # Line by line profiling backend
+        self.backendLabel = QtWidgets.QLabel(self)
+        self.configLayout.setWidget(
+            row, QtWidgets.QFormLayout.LabelRole, self.backendLabel
+        )
+        self.backendLayout = QtWidgets.QHBoxLayout()
+        self.backendCombo = QtWidgets.QComboBox(self)
+        self.backendCombo.setObjectName("backendCombo")
+        for backend in (
+            BACKEND_KERNPROF,
+            BACKEND_SETTRACE,
+            BACKEND_MONITORING,
+            BACKEND_SAMPLING,
+        ):
+            self.backendCombo.addItem("", backend)
+        self.backendLayout.addWidget(self.backendCombo)
+        self.backendStatusLabel = QtWidgets.QLabel(self)
+        self.backendStatusLabel.setPixmap(PIXMAPS["NOK"])
+        self.backendLayout.addWidget(self.backendStatusLabel)
+        self.samplingIntervalSpinBox = QtWidgets.QDoubleSpinBox(self)
+        self.samplingIntervalSpinBox.setObjectName("samplingIntervalSpinBox")
+        self.samplingIntervalSpinBox.setRange(0.1, 1000)
+        self.samplingIntervalSpinBox.setDecimals(1)
+        self.samplingIntervalSpinBox.setSuffix(" ms")
+        self.backendLayout.addWidget(self.samplingIntervalSpinBox)
+        self.samplingAllCheckBox = QtWidgets.QCheckBox(self)
+        self.samplingAllCheckBox.setObjectName("samplingAllCheckBox")
+        self.backendLayout.addWidget(self.samplingAllCheckBox)
+        self.backendLayout.addStretch()
+        self.configLayout.setLayout(
+            row, QtWidgets.QFormLayout.FieldRole, self.backendLayout
+        )
+        row += 1
+
+        # Warm interpreter
+        self.forkserverLabel = QtWidgets.QLabel(self)
+        self.configLayout.setWidget(
+            row, QtWidgets.QFormLayout.LabelRole, self.forkserverLabel
+        )
+        self.forkserverLayout = QtWidgets.QHBoxLayout()
+        self.forkserverCheckBox = QtWidgets.QCheckBox(self)
+        self.forkserverCheckBox.setObjectName("forkserverCheckBox")
+        self.forkserverCheckBox.setEnabled(hasattr(os, "fork"))
+        self.forkserverLayout.addWidget(self.forkserverCheckBox)
+        self.preloadWidget = QtWidgets.QLineEdit(self)
+        self.preloadWidget.setObjectName("preloadWidget")
+        self.forkserverLayout.addWidget(self.preloadWidget)
+        self.configLayout.setLayout(
+            row, QtWidgets.QFormLayout.FieldRole, self.forkserverLayout
+        )
+        row += 1
+
+        # Run environment
+        self.runEnvLabel = QtWidgets.QLabel(self)
+        self.configLayout.setWidget(
+            row, QtWidgets.QFormLayout.LabelRole, self.runEnvLabel
+        )
+        self.runEnvLayout = QtWidgets.QHBoxLayout()
+        self.cpusWidget = QtWidgets.QLineEdit(self)
+        self.cpusWidget.setObjectName("cpusWidget")
+        self.cpusWidget.setEnabled(hasattr(os, "sched_setaffinity"))
+        self.runEnvLayout.addWidget(self.cpusWidget)
+        self.cpusStatusLabel = QtWidgets.QLabel(self)
+        self.cpusStatusLabel.setPixmap(PIXMAPS["NOK"])
+        self.runEnvLayout.addWidget(self.cpusStatusLabel)
+        self.niceSpinBox = QtWidgets.QSpinBox(self)
+        self.niceSpinBox.setObjectName("niceSpinBox")
+        self.niceSpinBox.setRange(0, 19)
+        self.niceSpinBox.setEnabled(hasattr(os, "nice"))
+        self.runEnvLayout.addWidget(self.niceSpinBox)
+        self.hashSeedSpinBox = QtWidgets.QSpinBox(self)
+        self.hashSeedSpinBox.setObjectName("hashSeedSpinBox")
+        self.hashSeedSpinBox.setRange(-1, 2**31 - 1)
+        self.runEnvLayout.addWidget(self.hashSeedSpinBox)
+        self.configLayout.setLayout(
+            row, QtWidgets.QFormLayout.FieldRole, self.runEnvLayout
+        )
+        self.cpusWidget.setValidator(ConfigValidator(self, "cpus"))
+        row += 1
+
+        # Steady state
+        self.steadyLabel = QtWidgets.QLabel(self)
+        self.configLayout.setWidget(
+            row, QtWidgets.QFormLayout.LabelRole, self.steadyLabel
+        )
+        self.steadyLayout = QtWidgets.QHBoxLayout()
+        self.steadyCallsSpinBox = QtWidgets.QSpinBox(self)
+        self.steadyCallsSpinBox.setObjectName("steadyCallsSpinBox")
+        self.steadyCallsSpinBox.setRange(1, 1000000)
+        self.steadyLayout.addWidget(self.steadyCallsSpinBox)
+        self.steadyFunctionWidget = QtWidgets.QLineEdit(self)
+        self.steadyFunctionWidget.setObjectName("steadyFunctionWidget")
+        self.steadyLayout.addWidget(self.steadyFunctionWidget)
+        self.configLayout.setLayout(
+            row, QtWidgets.QFormLayout.FieldRole, self.steadyLayout
+        )
+        row += 1
+
+        # asyncio
+        self.asyncioLabel = QtWidgets.QLabel(self)
+        self.configLayout.setWidget(
+            row, QtWidgets.QFormLayout.LabelRole, self.asyncioLabel
+        )
+        self.asyncioLayout = QtWidgets.QHBoxLayout()
+        self.asyncioCheckBox = QtWidgets.QCheckBox(self)
+        self.asyncioCheckBox.setObjectName("asyncioCheckBox")
+        self.asyncioLayout.addWidget(self.asyncioCheckBox)
+        self.blockingThresholdSpinBox = QtWidgets.QDoubleSpinBox(self)
+        self.blockingThresholdSpinBox.setObjectName("blockingThresholdSpinBox")
+        self.blockingThresholdSpinBox.setRange(0.1, 100000)
+        self.blockingThresholdSpinBox.setDecimals(1)
+        self.blockingThresholdSpinBox.setSuffix(" ms")
+        self.asyncioLayout.addWidget(self.blockingThresholdSpinBox)
+        self.asyncioLayout.addStretch()
+        self.configLayout.setLayout(
+            row, QtWidgets.QFormLayout.FieldRole, self.asyncioLayout
+        )
+        row += 1
+
+        # Profiling options
+        self.optionsLabel = QtWidgets.QLabel(self)
+        self.configLayout.setWidget(
+            row, QtWidgets.QFormLayout.LabelRole, self.optionsLabel
+        )
+        self.optionsLayout = QtWidgets.QHBoxLayout()
+        self.memoryCheckBox = QtWidgets.QCheckBox(self)
+        self.memoryCheckBox.setObjectName("memoryCheckBox")
+        self.optionsLayout.addWidget(self.memoryCheckBox)
+        self.histogramsCheckBox = QtWidgets.QCheckBox(self)
+        self.histogramsCheckBox.setObjectName("histogramsCheckBox")
+        self.optionsLayout.addWidget(self.histogramsCheckBox)
+        self.cpuTimeCheckBox = QtWidgets.QCheckBox(self)
+        self.cpuTimeCheckBox.setObjectName("cpuTimeCheckBox")
+        self.optionsLayout.addWidget(self.cpuTimeCheckBox)
+        self.threadsCheckBox = QtWidgets.QCheckBox(self)
+        self.threadsCheckBox.setObjectName("threadsCheckBox")
+        self.optionsLayout.addWidget(self.threadsCheckBox)
+        self.callsCheckBox = QtWidgets.QCheckBox(self)
+        self.callsCheckBox.setObjectName("callsCheckBox")
+        self.optionsLayout.addWidget(self.callsCheckBox)
+        self.gcTimeCheckBox = QtWidgets.QCheckBox(self)
+        self.gcTimeCheckBox.setObjectName("gcTimeCheckBox")
+        self.optionsLayout.addWidget(self.gcTimeCheckBox)
+        self.hitsOnlyCheckBox = QtWidgets.QCheckBox(self)
+        self.hitsOnlyCheckBox.setObjectName("hitsOnlyCheckBox")
+        self.optionsLayout.addWidget(self.hitsOnlyCheckBox)
+        self.disableGcCheckBox = QtWidgets.QCheckBox(self)
+        self.disableGcCheckBox.setObjectName("disableGcCheckBox")
+        self.optionsLayout.addWidget(self.disableGcCheckBox)
+        self.idleCheckBox = QtWidgets.QCheckBox(self)
+        self.idleCheckBox.setObjectName("idleCheckBox")
+        self.optionsLayout.addWidget(self.idleCheckBox)
+        self.optionsLayout.addStretch()
+        self.configLayout.setLayout(
+            row, QtWidgets.QFormLayout.FieldRole, self.optionsLayout
+        )
+        for checkbox in self.option_checkboxes().values():
+            checkbox.stateChanged.connect(self.update_options_enabled)
+        row += 1
+
         # Buttons
         self.buttonBox = QtWidgets.QDialogButtonBox(self)
         self.buttonBox.setOrientation(QtCore.Qt.Horizontal)
@@ -356,7 +716,7 @@ class UiConfigDialog(QtWidgets.QDialog):
         self.retranslate_ui()
         QtCore.QMetaObject.connectSlotsByName(self)
 
-    def retranslate_ui(self):
+    def retranslate_ui(self):  # noqa: PLR0915
         self.setWindowTitle(_("Line Profiler GUI - Profiling configuration"))
         self.wdirLabel.setText(_("Working directory"))
         self.wdirButton.setText(_("Select..."))
@@ -371,6 +731,150 @@ class UiConfigDialog(QtWidgets.QDialog):
         self.statsButton.setText(_("Select..."))
         self.kernprofLabel.setText(_("<tt>kernprof</tt> path"))
         self.kernprofButton.setText(_("Select..."))
+        self.pythonLabel.setText(_("<tt>python</tt> path"))
+        self.pythonButton.setText(_("Select..."))
+        self.backendLabel.setText(_("Line profiler"))
+        self.backendCombo.setItemText(0, _("kernprof (line_profiler)"))
+        self.backendCombo.setItemText(1, _("Built-in tracer (sys.settrace)"))
+        self.backendCombo.setItemText(
+            2, _("Low overhead tracer (sys.monitoring, python >= 3.12)")
+        )
+        self.backendCombo.setItemText(3, _("Statistical sampling"))
+        self.samplingIntervalSpinBox.setToolTip(_("Sampling interval"))
+        self.samplingAllCheckBox.setText(_("All functions"))
+        self.samplingAllCheckBox.setToolTip(
+            _(
+                "Sample all the functions outside of the python installation,"
+                " not only the decorated ones"
+            )
+        )
+        self.backendStatusLabel.setToolTip(
+            _("<tt>sys.monitoring</tt> requires python >= 3.12")
+        )
+        self.forkserverLabel.setText(_("Warm interpreter"))
+        self.forkserverCheckBox.setText(_("Fork server"))
+        self.forkserverCheckBox.setToolTip(
+            _(
+                "Keep a python interpreter running with the preloaded modules,"
+                " and fork it for each run instead of starting a new interpreter."
+                " The built-in tracer replaces <tt>kernprof</tt>."
+            )
+        )
+        self.preloadWidget.setPlaceholderText(
+            _("Modules to preload, e.g. numpy, pandas")
+        )
+        self.runEnvLabel.setText(_("Run environment"))
+        self.cpusWidget.setPlaceholderText(_("CPU affinity, e.g. 0-3,6"))
+        self.cpusWidget.setToolTip(
+            _("Pin the profiled process to these CPUs, all CPUs if empty")
+        )
+        self.niceSpinBox.setPrefix(_("nice "))
+        self.niceSpinBox.setToolTip(
+            _("Increment of the niceness of the profiled process")
+        )
+        self.hashSeedSpinBox.setPrefix("PYTHONHASHSEED=")
+        self.hashSeedSpinBox.setSpecialValueText(_("Random hash seed"))
+        self.hashSeedSpinBox.setToolTip(
+            _("Fixed hash seed, so that the iteration order of sets is reproducible")
+        )
+        self.steadyLabel.setText(_("Steady state"))
+        self.steadyCallsSpinBox.setPrefix(_("Reset the results after "))
+        self.steadyCallsSpinBox.setSuffix(_(" calls of"))
+        self.steadyFunctionWidget.setPlaceholderText(
+            _("Function or Class.method name, empty to keep the warm-up")
+        )
+        self.steadyFunctionWidget.setToolTip(
+            _(
+                "Discard the results collected until the function returned"
+                " the given number of times, so that only the steady state is"
+                " displayed. The script can also call <tt>profile.reset()</tt>."
+                " The built-in tracer replaces <tt>kernprof</tt>."
+            )
+        )
+        self.asyncioLabel.setText(_("asyncio"))
+        self.asyncioCheckBox.setText(_("Separate the suspended time at await"))
+        self.asyncioCheckBox.setToolTip(
+            _(
+                "Attribute the time a coroutine spends suspended at an"
+                " <tt>await</tt> to a separate column instead of the line time,"
+                " and count the hits blocking the event loop."
+                " The built-in tracer is used."
+            )
+        )
+        self.blockingThresholdSpinBox.setPrefix(_("Blocking above "))
+        self.blockingThresholdSpinBox.setToolTip(
+            _(
+                "Line hits running longer than this without suspension"
+                " block the event loop"
+            )
+        )
+        self.optionsLabel.setText(_("Options"))
+        self.memoryCheckBox.setText(_("Memory allocations"))
+        self.memoryCheckBox.setToolTip(
+            _(
+                "Record the memory allocated by each line with <tt>tracemalloc</tt>."
+                " This slows down the profiled code even more."
+            )
+        )
+        self.disableGcCheckBox.setText(_("Disable GC"))
+        self.disableGcCheckBox.setToolTip(
+            _(
+                "Disable the garbage collector while the script runs,"
+                " so that the collections do not land on random lines"
+            )
+        )
+        self.idleCheckBox.setText(_("Idle check"))
+        self.idleCheckBox.setToolTip(
+            _("Warn if the system is busy when the profiling starts")
+        )
+        self.histogramsCheckBox.setText(_("Latency percentiles"))
+        self.histogramsCheckBox.setToolTip(
+            _(
+                "Record the distribution of the durations of each line hit,"
+                " to display the p50, p95, p99 and max durations."
+                " The built-in tracer is used."
+            )
+        )
+        self.cpuTimeCheckBox.setText(_("CPU time"))
+        self.cpuTimeCheckBox.setToolTip(
+            _(
+                "Record the CPU time of each line in addition to the wall time,"
+                " to tell the lines computing from the lines waiting for I/O,"
+                " locks or sleeps. The built-in tracer is used."
+            )
+        )
+        self.threadsCheckBox.setText(_("Per thread"))
+        self.threadsCheckBox.setToolTip(
+            _(
+                "Also record the results of each thread separately, to compare"
+                " the workers of a thread pool line by line."
+                " The built-in tracer is used."
+            )
+        )
+        self.callsCheckBox.setText(_("Self time"))
+        self.callsCheckBox.setToolTip(
+            _(
+                "Also record the calls made by each line to the other profiled"
+                " functions, to display the time spent by the line itself,"
+                " without its calls. The built-in tracer is used."
+            )
+        )
+        self.gcTimeCheckBox.setText(_("GC time"))
+        self.gcTimeCheckBox.setToolTip(
+            _(
+                "Record the garbage collections, and display their time on the"
+                " profiled lines which triggered them, to tell the collection"
+                " pauses from the actual cost of the lines."
+            )
+        )
+        self.hitsOnlyCheckBox.setText(_("Hits only"))
+        self.hitsOnlyCheckBox.setToolTip(
+            _(
+                "Only count how many times each line runs, without timing,"
+                " with a cheaper tracer. Not available with the sampling."
+                " With <tt>kernprof</tt>, the built-in tracer is used."
+            )
+        )
 
     @QtCore.Slot()
     def accept(self):
@@ -425,10 +929,75 @@ class UiConfigDialog(QtWidgets.QDialog):
     def on_kernprofWidget_textChanged(self, text):
         self.display_status(self.kernprofWidget, self.kernprofStatusLabel)
 
+    @QtCore.Slot(str)
+    def on_pythonWidget_textChanged(self, text):
+        self.display_status(self.pythonWidget, self.pythonStatusLabel)
+
     @QtCore.Slot(str)
     def on_envWidget_textChanged(self, text):
         self.display_status(self.envWidget, self.envStatusLabel)
 
+    @QtCore.Slot(str)
+    def on_cpusWidget_textChanged(self, text):
+        self.display_status(self.cpusWidget, self.cpusStatusLabel)
+
+    def update_preload_enabled(self):
+        self.preloadWidget.setEnabled(self.forkserverCheckBox.isChecked())
+
+    @QtCore.Slot(int)
+    def on_forkserverCheckBox_stateChanged(self, state):
+        self.update_preload_enabled()
+
+    def update_blocking_threshold_enabled(self):
+        self.blockingThresholdSpinBox.setEnabled(self.asyncioCheckBox.isChecked())
+
+    @QtCore.Slot(int)
+    def on_asyncioCheckBox_stateChanged(self, state):
+        self.update_blocking_threshold_enabled()
+
+    def option_checkboxes(self):
+        """Return the check boxes of the options, see Config.enabled_options()."""
+        return {
+            "memory": self.memoryCheckBox,
+            "histograms": self.histogramsCheckBox,
+            "cpu_time": self.cpuTimeCheckBox,
+            "asyncio": self.asyncioCheckBox,
+            "threads": self.threadsCheckBox,
+            "calls": self.callsCheckBox,
+            "hits_only": self.hitsOnlyCheckBox,
+        }
+
+    def update_options_enabled(self):
+        """Disable the options which cannot be combined with the enabled ones.
+
+        The enabled options stay enabled even if they conflict, e.g. in a saved
+        configuration, so that one of them can be unchecked.
+        """
+        config = Config()
+        self.ui_to_config(config)
+        enabled = config.enabled_options()
+        for name, checkbox in self.option_checkboxes().items():
+            checkbox.setEnabled(
+                checkbox.isChecked() or not conflicting_options(name, enabled)
+            )
+        model = self.backendCombo.model()
+        for index in range(self.backendCombo.count()):
+            backend = self.backendCombo.itemData(index)
+            model.item(index).setEnabled(
+                backend == config.backend or not conflicting_options(backend, enabled)
+            )
+        self.update_profileButton_enabled()
+
+    @QtCore.Slot(int)
+    def on_backendCombo_currentIndexChanged(self, index):
+        config = Config()
+        self.ui_to_config(config)
+        self.backendStatusLabel.setVisible(not config.isvalid_backend)
+        sampling = config.backend == BACKEND_SAMPLING
+        self.samplingIntervalSpinBox.setVisible(sampling)
+        self.samplingAllCheckBox.setVisible(sampling)
+        self.update_options_enabled()
+
     @QtCore.Slot()
     def on_scriptButton_clicked(self):
         filename, _selfilter = QtWidgets.QFileDialog.getOpenFileName(
@@ -473,6 +1042,17 @@ class UiConfigDialog(QtWidgets.QDialog):
         if filename:
             self.kernprofWidget.setText(filename)
 
+    @QtCore.Slot()
+    def on_pythonButton_clicked(self):
+        filename, _selfilter = QtWidgets.QFileDialog.getOpenFileName(
+            self,
+            _("Select python executable"),
+            self.pythonWidget.text() or self.config.default_python,
+            _("python executable") + " (python*)",
+        )
+        if filename:
+            self.pythonWidget.setText(filename)
+
 
 class ConfigValidator(QtGui.QValidator):
     def __init__(self, config_dialog, widget_id):
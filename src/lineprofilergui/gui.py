@@ -2,6 +2,7 @@ import datetime
 import os
 import sys
 import textwrap
+import time
 import urllib
 from pathlib import Path
 
@@ -11,30 +12,161 @@ from PySide6.QtCore import Qt
 
 from . import __version__
 from .config import Config, UiConfigDialog
+from .perf import PIPELINE
 from .process import KernprofRun
-from .settings import UISettingsDialog
-from .theme import update_theme
 from .tree import ResultsTreeWidget, load_profile_data
 from .utils import ICONS, MONOSPACE_FONT, PIXMAPS
 from .utils import translate as _
+from .watch import LprofFolderWatcher, SourceWatcher
 
 LINE_PROFILER_GUI_GITHUB_URL = "https://github.com/Nodd/lineprofilergui"
 LINE_PROFILER_DOC_URL = "https://github.com/pyutils/line_profiler#id2"
 
 
+def describe_environment(environment):
+    """Human readable description of the run environment of a history entry."""
+    lines = []
+    if "python" in environment:
+        lines.append(_("Python {version}").format(version=environment["python"]))
+    if "cpus" in environment:
+        cpus = ", ".join(str(cpu) for cpu in environment["cpus"])
+        lines.append(_("CPU affinity: {cpus}").format(cpus=cpus))
+    if "nice" in environment:
+        lines.append(_("Niceness: {nice}").format(nice=environment["nice"]))
+    if "hash_seed" in environment:
+        hash_seed = environment["hash_seed"] or _("random")
+        lines.append(_("Hash seed: {seed}").format(seed=hash_seed))
+    if environment.get("gc_disabled"):
+        lines.append(_("Garbage collector disabled"))
+    if environment.get("cpu_usage") is not None:
+        lines.append(
+            _("System CPU usage before the run: {usage:.0%}").format(
+                usage=environment["cpu_usage"]
+            )
+        )
+    return "\n".join(lines)
+
+
+def format_size(size):
+    for unit in ("B", "kB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            break
+        size /= 1024
+    return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+
+
+def cpu_percent(resources):
+    """CPU time of the profiled process, in percent of the wall time."""
+    if "user_time" not in resources or not resources["wall_time"]:
+        return None
+    cpu_time = resources["user_time"] + resources["system_time"]
+    return 100 * cpu_time / resources["wall_time"]
+
+
+def summarize_resources(resources):
+    """Short description of the resource usage of a run, for the status bar."""
+    if not resources or "user_time" not in resources:
+        return ""
+    text = _("CPU {cpu:.0f}%").format(cpu=cpu_percent(resources))
+    if resources["peak_rss"]:
+        text += _(", peak RSS {rss}").format(rss=format_size(resources["peak_rss"]))
+    return text
+
+
+def describe_resources(resources):
+    """Human readable description of the resource usage of a run."""
+    if not resources or "user_time" not in resources:
+        return ""
+    lines = [
+        _(
+            "CPU time: {user:.3f}s user + {system:.3f}s system ({cpu:.0f}% of {wall:.3f}s)"
+        ).format(
+            user=resources["user_time"],
+            system=resources["system_time"],
+            cpu=cpu_percent(resources),
+            wall=resources["wall_time"],
+        )
+    ]
+    if resources["peak_rss"]:
+        lines.append(
+            _("Peak RSS: {rss}").format(rss=format_size(resources["peak_rss"]))
+        )
+    lines.append(
+        _("Page faults: {minor} minor, {major} major").format(
+            minor=resources["minor_faults"], major=resources["major_faults"]
+        )
+    )
+    lines.append(
+        _("Context switches: {voluntary} voluntary, {involuntary} involuntary").format(
+            voluntary=resources["voluntary_switches"],
+            involuntary=resources["involuntary_switches"],
+        )
+    )
+    return "\n".join(lines)
+
+
+def describe_run(profile_data):
+    """Tooltip of a history entry."""
+    return "\n".join(
+        text
+        for text in (
+            describe_resources(profile_data.resources),
+            describe_environment(profile_data.environment),
+        )
+        if text
+    )
+
+
 class UIMainWindow(QtWidgets.QMainWindow):
     # Used for testing purposes
     profile_finished = QtCore.Signal()
 
+    # Key of the history entries of watched files merged per script
+    MERGE_KEY_ROLE = Qt.UserRole + 1
+    # The watched files parsed in a burst are added to the history at once,
+    # when no file was parsed for the interval or after the maximum delay
+    WATCHED_RESULTS_INTERVAL = 200  # ms
+    WATCHED_RESULTS_MAX_DELAY = 2.0  # s
+    # Docks created on first display, with the modules they import
+    LAZY_DOCKS = (
+        "dockFunctionsWidget",
+        "dockRollupWidget",
+        "dockSourceWidget",
+        "dockQueueWidget",
+        "dockSweepWidget",
+        "dockRevisionsWidget",
+    )
+
     def __init__(self):
         self.config = Config()
 
         super().__init__()
+        self._job_queue = None
+        self._docks = {}  # {object name: dock}, see LAZY_DOCKS
+        self.dock_actions = {}  # {object name: action displaying the dock}
         self.setup_ui()
         self.kernprof_run = KernprofRun(self.config)
+        self.folder_watcher = LprofFolderWatcher(self)
+        # Files parsed by the folder watcher, added to the history at once
+        self.watched_results = []
+        self.watched_results_timer = QtCore.QTimer(self)
+        self.watched_results_timer.setSingleShot(True)
+        self.watched_results_timer.setInterval(self.WATCHED_RESULTS_INTERVAL)
+        self.watched_results_deadline = 0.0
+        self.source_watcher = SourceWatcher(self)
         self.connect_signals()
 
         self.profile_start_time = None
+        # Function level profile of the first phase of an automatic profiling
+        self.function_profile = None
+        # Comparisons and bisects of git revisions, which own worktrees
+        self.revision_tasks = []
+        # Line by line profiling repeated when the sources change
+        self.rerun_targets = None
+        self.rerun_function_profile = None
+        # The results of a run cancelled by a source change are discarded
+        self.run_cancelled = False
+        self._settings_dialog = None
 
     def setup_ui(self):  # noqa: PLR0915
         # Main window
@@ -52,6 +184,13 @@ class UIMainWindow(QtWidgets.QMainWindow):
         self.dockOutputWidget.setObjectName("dockOutputWidget")
         self.addDockWidget(Qt.BottomDockWidgetArea, self.dockOutputWidget)
 
+        # Pipeline timings widget, hidden by default
+        self.dockPipelineWidget = DockPipelineWidget(self)
+        self.dockPipelineWidget.setObjectName("dockPipelineWidget")
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.dockPipelineWidget)
+        self.tabifyDockWidget(self.dockOutputWidget, self.dockPipelineWidget)
+        self.dockPipelineWidget.hide()
+
         # Actions
         self.actionCollapse_all = QtGui.QAction(self)
         self.actionCollapse_all.setIcon(ICONS["COLLAPSE"])
@@ -59,12 +198,31 @@ class UIMainWindow(QtWidgets.QMainWindow):
         self.actionExpand_all.setIcon(ICONS["EXPAND"])
         self.actionRun = QtGui.QAction(self)
         self.actionRun.setIcon(ICONS["START"])
+        self.actionAutoProfile = QtGui.QAction(self)
+        self.actionAutoProfile.setIcon(ICONS["AUTOPROFILE"])
+        self.actionQueueJob = QtGui.QAction(self)
+        self.actionSweep = QtGui.QAction(self)
+        self.actionRevisions = QtGui.QAction(self)
         self.actionAbort = QtGui.QAction(self)
         self.actionAbort.setIcon(ICONS["STOP"])
+        self.actionAutoRerun = QtGui.QAction(self)
+        self.actionAutoRerun.setCheckable(True)
         self.actionShowOutput = self.dockOutputWidget.toggleViewAction()
         self.actionShowOutput.setIcon(ICONS["INFO"])
+        self.actionShowPipeline = self.dockPipelineWidget.toggleViewAction()
+        self.actionShowFunctions = self.dock_action("dockFunctionsWidget")
+        self.actionShowSource = self.dock_action("dockSourceWidget")
+        self.actionShowRollup = self.dock_action("dockRollupWidget")
+        self.actionShowQueue = self.dock_action("dockQueueWidget")
+        self.actionShowSweep = self.dock_action("dockSweepWidget")
+        self.actionShowRevisions = self.dock_action("dockRevisionsWidget")
         self.actionLoadLprof = QtGui.QAction(self)
         self.actionLoadLprof.setIcon(ICONS["READFILE"])
+        self.actionWatchFolder = QtGui.QAction(self)
+        self.actionWatchFolder.setIcon(ICONS["DIRECTORY"])
+        self.actionWatchFolder.setCheckable(True)
+        self.actionWatchMerge = QtGui.QAction(self)
+        self.actionWatchMerge.setCheckable(True)
         self.actionQuit = QtGui.QAction(self)
         self.actionQuit.setIcon(ICONS["ABORT"])
         self.actionConfigure = QtGui.QAction(self)
@@ -89,10 +247,17 @@ class UIMainWindow(QtWidgets.QMainWindow):
         self.menuProfiling.addAction(self.actionConfigure)
         self.menuProfiling.addSeparator()
         self.menuProfiling.addAction(self.actionRun)
+        self.menuProfiling.addAction(self.actionAutoProfile)
+        self.menuProfiling.addAction(self.actionQueueJob)
+        self.menuProfiling.addAction(self.actionSweep)
+        self.menuProfiling.addAction(self.actionRevisions)
         self.menuProfiling.addAction(self.actionAbort)
+        self.menuProfiling.addAction(self.actionAutoRerun)
         self.menuProfiling.addAction(self.actionShowOutput)
         self.menuProfiling.addSeparator()
         self.menuProfiling.addAction(self.actionLoadLprof)
+        self.menuProfiling.addAction(self.actionWatchFolder)
+        self.menuProfiling.addAction(self.actionWatchMerge)
         self.menuProfiling.addSeparator()
         self.menuProfiling.addAction(self.actionQuit)
         self.menubar.addAction(self.menuProfiling.menuAction())
@@ -102,6 +267,14 @@ class UIMainWindow(QtWidgets.QMainWindow):
         self.menuDisplay.addAction(self.actionCollapse_all)
         self.menuDisplay.addAction(self.actionExpand_all)
         self.menuDisplay.addSeparator()
+        self.menuDisplay.addAction(self.actionShowFunctions)
+        self.menuDisplay.addAction(self.actionShowRollup)
+        self.menuDisplay.addAction(self.actionShowSource)
+        self.menuDisplay.addAction(self.actionShowQueue)
+        self.menuDisplay.addAction(self.actionShowSweep)
+        self.menuDisplay.addAction(self.actionShowRevisions)
+        self.menuDisplay.addAction(self.actionShowPipeline)
+        self.menuDisplay.addSeparator()
         self.menuDisplay.addAction(self.actionSettings)
         self.menubar.addAction(self.menuDisplay.menuAction())
 
@@ -121,6 +294,7 @@ class UIMainWindow(QtWidgets.QMainWindow):
         self.toolBar.addAction(self.actionConfigure)
         self.toolBar.addSeparator()
         self.toolBar.addAction(self.actionRun)
+        self.toolBar.addAction(self.actionAutoProfile)
         self.toolBar.addAction(self.actionAbort)
         self.toolBar.addAction(self.actionShowOutput)
         self.toolBar.addSeparator()
@@ -130,6 +304,10 @@ class UIMainWindow(QtWidgets.QMainWindow):
         self.historyCombo = QtWidgets.QComboBox(self)
         self.historyCombo.setSizeAdjustPolicy(QtWidgets.QComboBox.AdjustToContents)
         self.toolBar.addWidget(self.historyCombo)
+        self.threadCombo = QtWidgets.QComboBox(self)
+        self.threadCombo.setSizeAdjustPolicy(QtWidgets.QComboBox.AdjustToContents)
+        self.threadComboAction = self.toolBar.addWidget(self.threadCombo)
+        self.threadComboAction.setVisible(False)
 
         # Statusbar
         self.statusbar = QtWidgets.QStatusBar(self)
@@ -146,24 +324,39 @@ class UIMainWindow(QtWidgets.QMainWindow):
         self.statusbar.addPermanentWidget(self.statusbar_running_indicator)
         self.statusbar_time = QtWidgets.QLabel()
         self.statusbar.addWidget(self.statusbar_time)
-
-        self.settingsDialog = UISettingsDialog(self)
+        self.statusbar_resources = QtWidgets.QLabel()
+        self.statusbar.addWidget(self.statusbar_resources)
+        self.statusbar_pipeline = QtWidgets.QLabel()
+        self.statusbar.addPermanentWidget(self.statusbar_pipeline)
 
         # Finalization
         self.retranslate_ui()
         self.read_settings()
         self.set_running_state(QtCore.QProcess.NotRunning)
-        update_theme()
+        # The theme is applied once the window is shown, to speed up the startup
+        QtCore.QTimer.singleShot(0, self.update_theme)
+        QtCore.QTimer.singleShot(0, self.restore_docks)
 
     def connect_signals(self):
         self.actionCollapse_all.triggered.connect(self.resultsTreeWidget.collapseAll)
         self.actionExpand_all.triggered.connect(self.resultsTreeWidget.expandAll)
         self.actionConfigure.triggered.connect(self.configure)
-        self.actionSettings.triggered.connect(self.settingsDialog.show)
+        self.actionSettings.triggered.connect(self.show_settings)
         self.actionRun.triggered.connect(self.profile)
+        self.actionAutoProfile.triggered.connect(self.auto_profile)
+        self.actionQueueJob.triggered.connect(self.queue_job)
+        self.actionSweep.triggered.connect(self.select_sweep)
+        self.actionRevisions.triggered.connect(self.select_revisions)
         self.actionAbort.triggered.connect(self.kernprof_run.kill)
+        self.actionAutoRerun.toggled.connect(self.set_auto_rerun)
+        self.source_watcher.changed.connect(self.sources_changed)
         self.actionShowOutput.toggled.connect(self.dockOutputWidget.setVisible)
         self.actionLoadLprof.triggered.connect(self.selectLprof)
+        self.actionWatchFolder.triggered.connect(self.select_watched_folder)
+        self.actionWatchMerge.toggled.connect(self.set_watch_merge)
+        self.folder_watcher.parser.parsed.connect(self.watched_file_parsed)
+        self.folder_watcher.parser.failed.connect(self.watched_file_failed)
+        self.watched_results_timer.timeout.connect(self.add_watched_results)
         self.actionQuit.triggered.connect(QtWidgets.QApplication.instance().quit)
         self.actionLine_profiler_documentation.triggered.connect(
             lambda: QtGui.QDesktopServices.openUrl(QtCore.QUrl(LINE_PROFILER_DOC_URL))
@@ -177,13 +370,13 @@ class UIMainWindow(QtWidgets.QMainWindow):
         self.actionAbout_Qt.triggered.connect(QtWidgets.QApplication.aboutQt)
         self.kernprof_run.output_text.connect(self.dockOutputWidget.append_log_text)
         self.kernprof_run.output_error.connect(self.dockOutputWidget.append_log_error)
-        self.settingsDialog.accepted.connect(self.resultsTreeWidget.updateColonsVisible)
-        self.settingsDialog.accepted.connect(update_theme)
         self.historyCombo.currentIndexChanged.connect(self.load_history)
+        self.threadCombo.currentIndexChanged.connect(self.show_thread)
 
     def retranslate_ui(self):
         self.update_window_title()
         self.toolBar.setWindowTitle(_("Tool bar"))
+        self.threadCombo.setToolTip(_("Display the results of a single thread"))
         self.menuDisplay.setTitle(_("&Display"))
         self.menuProfiling.setTitle(_("&Profiling"))
         self.menuHelp.setTitle(_("&Help"))
@@ -191,12 +384,61 @@ class UIMainWindow(QtWidgets.QMainWindow):
         self.actionExpand_all.setText(_("&Expand all"))
         self.actionRun.setText(_("&Profile"))
         self.actionRun.setShortcut(_("F5"))
+        self.actionAutoProfile.setText(_("&Auto profile..."))
+        self.actionAutoProfile.setToolTip(
+            _(
+                "Select the functions to profile line by line from a function level profile"
+            )
+        )
+        self.actionAutoProfile.setShortcut(_("Shift+F5"))
+        self.actionQueueJob.setText(_("Add to run &queue..."))
+        self.actionQueueJob.setToolTip(
+            _("Queue a profiling job, run along the other queued jobs")
+        )
+        self.actionQueueJob.setShortcut(_("Ctrl+F5"))
+        self.actionShowQueue.setText(_("&Run queue"))
+        self.actionSweep.setText(_("Input size s&weep..."))
+        self.actionSweep.setToolTip(
+            _("Profile the script for several input sizes, to see how each line scales")
+        )
+        self.actionShowSweep.setText(_("Sca&ling"))
+        self.actionRevisions.setText(_("Compare git &revisions..."))
+        self.actionRevisions.setToolTip(
+            _(
+                "Profile two git revisions of the script and compare them line by"
+                " line, or bisect a regression"
+            )
+        )
+        self.actionShowRevisions.setText(_("Re&visions"))
         self.actionAbort.setText(_("&Stop"))
         self.actionAbort.setShortcut(_("F6"))
+        self.actionAutoRerun.setText(_("Profile on &save"))
+        self.actionAutoRerun.setToolTip(
+            _(
+                "Profile again each time the script or the source files of the"
+                " profiled functions are saved"
+            )
+        )
         self.actionShowOutput.setText(_("&Console output"))
         self.actionShowOutput.setShortcut(_("F7"))
+        self.actionShowPipeline.setText(_("&Pipeline timings"))
+        self.actionShowFunctions.setText(_("&Function profile"))
+        self.actionShowRollup.setText(_("&Modules"))
+        self.actionShowSource.setText(_("&Source file"))
+        self.actionShowSource.setShortcut(_("F8"))
         self.actionLoadLprof.setText(_("&Load data..."))
         self.actionLoadLprof.setShortcut(_("Ctrl+O"))
+        self.actionWatchFolder.setText(_("&Watch folder..."))
+        self.actionWatchFolder.setToolTip(
+            _("Load the .lprof files appearing in a folder, e.g. from batch jobs")
+        )
+        self.actionWatchMerge.setText(_("&Merge watched files per script"))
+        self.actionWatchMerge.setToolTip(
+            _(
+                "Sum the timings of the watched files profiling the same source"
+                " files in a single history entry"
+            )
+        )
         self.actionQuit.setText(_("&Quit"))
         self.actionQuit.setShortcut(_("Ctrl+Q"))
         self.actionConfigure.setText(_("&Configuration..."))
@@ -210,6 +452,212 @@ class UIMainWindow(QtWidgets.QMainWindow):
         self.actionReportBug.setText(_("&Report bug..."))
         self.actionAbout_Qt.setText(_("&About Qt..."))
 
+    @property
+    def settingsDialog(self):
+        """Settings dialog, created on first use."""
+        if self._settings_dialog is None:
+            from .settings import UISettingsDialog  # noqa: PLC0415, lazy startup
+
+            self._settings_dialog = UISettingsDialog(self)
+            self._settings_dialog.accepted.connect(
+                self.resultsTreeWidget.updateColonsVisible
+            )
+            self._settings_dialog.accepted.connect(self.update_theme)
+        return self._settings_dialog
+
+    def dock_action(self, name):
+        """Checkable action displaying a dock created on first display."""
+        action = QtGui.QAction(self)
+        action.setCheckable(True)
+        action.toggled.connect(lambda visible: self.set_dock_visible(name, visible))
+        self.dock_actions[name] = action
+        return action
+
+    def set_dock_visible(self, name, visible):
+        # A dock is not created only to be hidden
+        if visible or name in self._docks:
+            getattr(self, name).setVisible(visible)
+
+    def add_lazy_dock(self, name, widget, title, area, *, tabified=False):
+        """Add a dock created on first use, at its place in the saved state."""
+        dock = QtWidgets.QDockWidget(title, self)
+        dock.setObjectName(name)
+        dock.setWidget(widget)
+        self._docks[name] = dock
+        if not self.restoreDockWidget(dock):
+            self.addDockWidget(area, dock)
+            if tabified:
+                self.tabifyDockWidget(self.dockOutputWidget, dock)
+            dock.hide()
+        action = self.dock_actions[name]
+        dock.toggleViewAction().toggled.connect(action.setChecked)
+        action.setChecked(not dock.isHidden())
+        return dock
+
+    @QtCore.Slot()
+    def restore_docks(self):
+        """Create the docks left open, once the window is shown."""
+        settings = QtCore.QSettings()
+        for name in settings.value("MainWindow/docks", [], list):
+            if name in self.LAZY_DOCKS:
+                getattr(self, name)
+
+    @property
+    def job_queue(self):
+        """Run queue, created on first use."""
+        if self._job_queue is None:
+            from .jobs import JobQueue  # noqa: PLC0415, lazy startup
+
+            self._job_queue = JobQueue(self)
+            self._job_queue.job_finished.connect(self.job_finished)
+        return self._job_queue
+
+    @property
+    def dockFunctionsWidget(self):
+        """Function level profile, created on first use."""
+        if "dockFunctionsWidget" not in self._docks:
+            from .autoprofile import FunctionStatsWidget  # noqa: PLC0415, lazy startup
+
+            widget = FunctionStatsWidget(self)
+            widget.setFrameShape(QtWidgets.QFrame.NoFrame)
+            widget.function_activated.connect(self.resultsTreeWidget.select_function)
+            self.resultsTreeWidget.function_selected.connect(widget.select_function)
+            self.add_lazy_dock(
+                "dockFunctionsWidget",
+                widget,
+                _("Function profile"),
+                Qt.RightDockWidgetArea,
+            )
+            self.update_function_profile()
+            self.resultsTreeWidget.current_item_changed(
+                self.resultsTreeWidget.currentItem(), None
+            )
+        return self._docks["dockFunctionsWidget"]
+
+    @property
+    def functionStatsWidget(self):
+        return self.dockFunctionsWidget.widget()
+
+    @property
+    def dockRollupWidget(self):
+        """Rollup by package and module, created on first use."""
+        if "dockRollupWidget" not in self._docks:
+            from .rollup import RollupWidget  # noqa: PLC0415, lazy startup
+
+            widget = RollupWidget(self)
+            widget.setFrameShape(QtWidgets.QFrame.NoFrame)
+            widget.function_activated.connect(self.resultsTreeWidget.select_function)
+            widget.line_activated.connect(self.resultsTreeWidget.select_line)
+            widget.set_profile_data(self.thread_profile_data())
+            self.add_lazy_dock(
+                "dockRollupWidget",
+                widget,
+                _("Modules"),
+                Qt.RightDockWidgetArea,
+            )
+        return self._docks["dockRollupWidget"]
+
+    @property
+    def rollupWidget(self):
+        return self.dockRollupWidget.widget()
+
+    @property
+    def dockSourceWidget(self):
+        """Whole source file, created on first use."""
+        if "dockSourceWidget" not in self._docks:
+            from .source import SourceView  # noqa: PLC0415, lazy startup
+
+            widget = SourceView(self)
+            widget.set_profile_data(self.thread_profile_data())
+            self.resultsTreeWidget.line_selected.connect(widget.show_line)
+            widget.line_selected.connect(self.resultsTreeWidget.select_line)
+            self.add_lazy_dock(
+                "dockSourceWidget",
+                widget,
+                _("Source"),
+                Qt.RightDockWidgetArea,
+            )
+            self.resultsTreeWidget.current_item_changed(
+                self.resultsTreeWidget.currentItem(), None
+            )
+        return self._docks["dockSourceWidget"]
+
+    @property
+    def sourceView(self):
+        return self.dockSourceWidget.widget()
+
+    @property
+    def dockQueueWidget(self):
+        """Run queue, created on first use."""
+        if "dockQueueWidget" not in self._docks:
+            from .jobs import JobQueueWidget  # noqa: PLC0415, lazy startup
+
+            widget = JobQueueWidget(self, self.job_queue)
+            widget.addButton.clicked.connect(self.queue_job)
+            widget.job_activated.connect(self.show_job_results)
+            self.add_lazy_dock(
+                "dockQueueWidget",
+                widget,
+                _("Run queue"),
+                Qt.BottomDockWidgetArea,
+                tabified=True,
+            )
+        return self._docks["dockQueueWidget"]
+
+    @property
+    def jobQueueWidget(self):
+        return self.dockQueueWidget.widget()
+
+    @property
+    def dockSweepWidget(self):
+        """Input size sweep, created on first use."""
+        if "dockSweepWidget" not in self._docks:
+            from .sweep import SweepWidget  # noqa: PLC0415, lazy startup
+
+            widget = SweepWidget(self)
+            widget.function_activated.connect(self.resultsTreeWidget.select_function)
+            widget.line_activated.connect(self.resultsTreeWidget.select_line)
+            self.add_lazy_dock(
+                "dockSweepWidget",
+                widget,
+                _("Scaling"),
+                Qt.RightDockWidgetArea,
+            )
+        return self._docks["dockSweepWidget"]
+
+    @property
+    def sweepWidget(self):
+        return self.dockSweepWidget.widget()
+
+    @property
+    def dockRevisionsWidget(self):
+        """Comparison of git revisions, created on first use."""
+        if "dockRevisionsWidget" not in self._docks:
+            from .revisions import RevisionsWidget  # noqa: PLC0415, lazy startup
+
+            self.add_lazy_dock(
+                "dockRevisionsWidget",
+                RevisionsWidget(self),
+                _("Revisions"),
+                Qt.BottomDockWidgetArea,
+                tabified=True,
+            )
+        return self._docks["dockRevisionsWidget"]
+
+    @property
+    def revisionsWidget(self):
+        return self.dockRevisionsWidget.widget()
+
+    @QtCore.Slot()
+    def show_settings(self):
+        self.settingsDialog.show()
+
+    @QtCore.Slot()
+    def update_theme(self):
+        from .theme import update_theme  # noqa: PLC0415, lazy startup
+
+        update_theme()
+
     def update_window_title(self):
         title = _("Line Profiler GUI")
         if self.config.script:
@@ -218,6 +666,13 @@ class UIMainWindow(QtWidgets.QMainWindow):
 
     def closeEvent(self, event):
         self.write_settings()
+        self.kernprof_run.forkserver.stop()
+        self.folder_watcher.shutdown()
+        if self._job_queue is not None:
+            self._job_queue.cancel_all()
+        for task in self.revision_tasks:
+            task.cleanup()
+        self.source_watcher.stop()
         QtWidgets.QMainWindow.closeEvent(self, event)
 
     def write_settings(self):
@@ -225,6 +680,9 @@ class UIMainWindow(QtWidgets.QMainWindow):
         settings.beginGroup("MainWindow")
         settings.setValue("geometry", self.saveGeometry())
         settings.setValue("state", self.saveState())
+        settings.setValue(
+            "docks", [name for name, dock in self._docks.items() if not dock.isHidden()]
+        )
         settings.endGroup()
 
     def read_settings(self):
@@ -253,21 +711,40 @@ class UIMainWindow(QtWidgets.QMainWindow):
     def configure(self):
         UiConfigDialog(self, self.config).exec()
         self.update_window_title()
+        self.update_watched_sources()
 
     @QtCore.Slot()
     def profile(self):
+        self.function_profile = None
+        self.start_profiling()
+
+    @QtCore.Slot()
+    def auto_profile(self):
+        """Profile all functions, then the selected ones line by line."""
+        self.function_profile = None
+        self.start_profiling(function_level=True)
+
+    def start_profiling(self, function_level=False, targets=None):
         # Configuration dialog in case of invalid config
         if not self.config.isvalid:
             self.configure()
         if not self.config.isvalid:
             return
 
+        if not function_level:
+            self.rerun_targets = targets
+            self.rerun_function_profile = self.function_profile
+
         # Start process
-        Path(self.config.stats).unlink(missing_ok=True)
+        stats = self.config.function_stats if function_level else self.config.stats
+        Path(stats).unlink(missing_ok=True)
         self.dockOutputWidget.clear()
-        process = self.kernprof_run.prepare()
+        process = self.kernprof_run.prepare(function_level, targets)
         process.stateChanged.connect(self.set_running_state)
-        process.finished.connect(self.process_finished)
+        if function_level:
+            process.finished.connect(self.function_profile_finished)
+        else:
+            process.finished.connect(self.process_finished)
         self.profile_start_time = datetime.datetime.now()
         self.kernprof_run.start()
 
@@ -275,6 +752,7 @@ class UIMainWindow(QtWidgets.QMainWindow):
     def set_running_state(self, running):
         running = running != QtCore.QProcess.NotRunning
         self.actionRun.setEnabled(not running)
+        self.actionAutoProfile.setEnabled(not running)
         self.actionAbort.setEnabled(running)
         self.actionConfigure.setEnabled(not running)
         self.statusbar_running_indicator.setVisible(running)
@@ -290,6 +768,62 @@ class UIMainWindow(QtWidgets.QMainWindow):
     @QtCore.Slot(int, QtCore.QProcess.ExitStatus)
     def process_finished(self, exit_code, exit_status):
         """Note: if process was aborted, exit_status should be 1."""
+        if self.run_cancelled:
+            self.run_cancelled = False
+            return
+        title = self.show_run_status(exit_code, exit_status)
+
+        # Load .lprof file
+        try:
+            self.load_lprof(
+                self.config.stats,
+                title,
+                self.function_profile,
+                self.kernprof_run.environment,
+                self.kernprof_run.resources,
+            )
+        except FileNotFoundError:
+            if self.config.stats_tmp:
+                self.resultsTreeWidget.warning_message(_("No profiling results"))
+            else:
+                self.resultsTreeWidget.warning_message(
+                    _('Profiling results not found: "{file}"').format(
+                        file=self.config.stats
+                    )
+                )
+        self.function_profile = None
+
+        # For testing purposes
+        self.profile_finished.emit()
+
+    @QtCore.Slot(int, QtCore.QProcess.ExitStatus)
+    def function_profile_finished(self, exit_code, exit_status):
+        """Select the functions to profile line by line, and profile them."""
+        if self.run_cancelled:
+            self.run_cancelled = False
+            return
+        self.show_run_status(exit_code, exit_status)
+        from .autoprofile import (  # noqa: PLC0415, lazy startup
+            UiTargetsDialog,
+            load_function_profile,
+        )
+
+        try:
+            function_profile = load_function_profile(self.config.function_stats)
+        except (OSError, EOFError, TypeError, ValueError):
+            self.resultsTreeWidget.warning_message(_("No function level results"))
+            self.profile_finished.emit()
+            return
+
+        dialog = UiTargetsDialog(self, function_profile)
+        if dialog.exec() != QtWidgets.QDialog.Accepted or not dialog.targets():
+            self.profile_finished.emit()
+            return
+        self.function_profile = function_profile
+        self.start_profiling(targets=dialog.targets())
+
+    def show_run_status(self, exit_code, exit_status):
+        """Display the status of the last run, and return the history title."""
         # Time and duration values
         profile_stop_time = datetime.datetime.now()
         profile_duration = profile_stop_time - self.profile_start_time
@@ -318,39 +852,415 @@ class UIMainWindow(QtWidgets.QMainWindow):
         # Output console status
         self.dockOutputWidget.set_exit_state(exit_status or exit_code)
 
-        # Load .lprof file
-        title = _("{duration}s at {time}").format(
+        return _("{duration}s at {time}").format(
             duration=profile_duration_str, time=profile_time_str
         )
+
+    def load_lprof(
+        self,
+        lprof_file,
+        title=None,
+        function_profile=None,
+        environment=None,
+        resources=None,
+    ):
+        with PIPELINE.run("load_lprof", file=os.fspath(lprof_file)):
+            profile_data = load_profile_data(lprof_file)
+            profile_data.function_profile = function_profile
+            # The values recorded by the runner are the actual ones
+            profile_data.environment = {
+                **(environment or {}),
+                **profile_data.environment,
+            }
+            profile_data.resources = resources
+            if not title:
+                title = self.history_title(lprof_file)
+            self.add_history(title, profile_data)
+            self.load_history(0)
+        self.show_pipeline_timings()
+
+    @staticmethod
+    def history_title(lprof_file):
+        time = datetime.datetime.now().strftime("%X")
+        name = os.path.basename(lprof_file)
+        return _("{name} at {time}").format(name=name, time=time)
+
+    def add_history(self, title, profile_data, merge_key=None):
+        """Insert results at the top of the history and make them current.
+
+        The results merged with the same ``merge_key`` replace the previous ones.
+        The results are not displayed, see load_history().
+        """
+        # Inserting an item shifts the current index, which would display
+        # the previous results before the new ones
+        with QtCore.QSignalBlocker(self.historyCombo):
+            if merge_key is not None:
+                # findData() does not compare the python objects by value
+                for index in range(self.historyCombo.count()):
+                    if (
+                        self.historyCombo.itemData(index, self.MERGE_KEY_ROLE)
+                        == merge_key
+                    ):
+                        self.historyCombo.removeItem(index)
+                        break
+            self.historyCombo.insertItem(0, title, profile_data)
+            self.historyCombo.setItemData(0, describe_run(profile_data), Qt.ToolTipRole)
+            self.historyCombo.setItemData(0, merge_key, self.MERGE_KEY_ROLE)
+            self.historyCombo.setCurrentIndex(0)
+
+    @QtCore.Slot()
+    def queue_job(self):
+        """Queue a profiling job, configured from a copy of the configuration."""
+        config = self.config.copy()
+        dialog = UiConfigDialog(self, config)
+        dialog.setWindowTitle(_("Queue a profiling job"))
+        # The job is run by the queue
+        dialog.profileButton.hide()
+        if dialog.exec() == QtWidgets.QDialog.Accepted:
+            self.add_job(config)
+
+    def add_job(self, config, label=None):
+        """Add a job to the run queue, labelled by its script by default."""
+        if not config.isvalid:
+            self.dockOutputWidget.append_log_error(
+                _("The job configuration is not valid: {script}").format(
+                    script=config.script
+                )
+            )
+            return None
+        self.dockQueueWidget.show()
+        return self.job_queue.add(config, label)
+
+    @QtCore.Slot(object)
+    def job_finished(self, job):
+        title = _("{label} at {time}").format(
+            label=job.label, time=datetime.datetime.now().strftime("%X")
+        )
         try:
-            self.load_lprof(self.config.stats, title)
+            self.load_lprof(
+                job.config.stats,
+                title,
+                environment=job.kernprof_run.environment,
+                resources=job.kernprof_run.resources,
+            )
         except FileNotFoundError:
-            if self.config.stats_tmp:
-                self.resultsTreeWidget.warning_message(_("No profiling results"))
-            else:
-                self.resultsTreeWidget.warning_message(
-                    _('Profiling results not found: "{file}"').format(
-                        file=self.config.stats
-                    )
-                )
+            self.dockOutputWidget.append_log_error(
+                _("No profiling results for the job {label}").format(label=job.label)
+            )
+            return
+        job.profile_data = self.historyCombo.currentData()
 
-        # For testing purposes
-        self.profile_finished.emit()
+    @QtCore.Slot(object)
+    def show_job_results(self, job):
+        for index in range(self.historyCombo.count()):
+            if self.historyCombo.itemData(index) is job.profile_data:
+                self.historyCombo.setCurrentIndex(index)
+                return
+
+    @QtCore.Slot()
+    def select_sweep(self):
+        if not self.config.isvalid:
+            self.configure()
+        if not self.config.isvalid:
+            return
+        from .sweep import UiSweepDialog  # noqa: PLC0415, lazy startup
+
+        dialog = UiSweepDialog(self, self.config)
+        if dialog.exec() == QtWidgets.QDialog.Accepted:
+            self.start_sweep(dialog.sizes(), dialog.template())
+
+    def start_sweep(self, sizes, template=None):
+        """Queue a profiling job per input size, replacing {n} in the arguments."""
+        from .sweep import Sweep, sweep_args  # noqa: PLC0415, lazy startup
+
+        if template is None:
+            template = self.config.args
+        jobs = {}
+        for size in sizes:
+            config = self.config.copy()
+            config.args = sweep_args(template, size)
+            label = _("{script} n={size}").format(
+                script=os.path.basename(config.script), size=size
+            )
+            job = self.add_job(config, label)
+            if job is None:
+                return None
+            jobs[job] = size
+        sweep = Sweep(self.job_queue, jobs, self)
+        sweep.finished.connect(self.show_sweep)
+        return sweep
+
+    @QtCore.Slot(object)
+    def show_sweep(self, sweep):
+        from .sweep import build_sweep  # noqa: PLC0415, lazy startup
+
+        with PIPELINE.run("sweep"):
+            results = sweep.results()
+            PIPELINE.count("runs", len(results))
+            sizes = sorted(size for size, _profile_data in results)
+            self.sweepWidget.set_sweep(sizes, build_sweep(results))
+        self.show_pipeline_timings()
+        self.dockSweepWidget.show()
+        self.dockSweepWidget.raise_()
+        sweep.deleteLater()
+
+    @QtCore.Slot()
+    def select_revisions(self):
+        if not self.config.isvalid:
+            self.configure()
+        if not self.config.isvalid:
+            return
+        from .revisions import (  # noqa: PLC0415, lazy startup
+            RevisionError,
+            UiRevisionsDialog,
+            git_toplevel,
+        )
+
+        try:
+            repo = git_toplevel(
+                os.path.dirname(os.path.join(self.config.wdir, self.config.script))
+            )
+        except RevisionError as error:
+            self.dockOutputWidget.append_log_error(
+                _("The script is not in a git repository: {error}").format(error=error)
+            )
+            return
+        profile_data = self.historyCombo.currentData()
+        functions = [func_data.name for func_data in profile_data or ()]
+        dialog = UiRevisionsDialog(self, repo, functions)
+        if dialog.exec() != QtWidgets.QDialog.Accepted:
+            return
+        if dialog.bisect:
+            self.bisect_revisions(
+                repo, *dialog.refs(), dialog.function(), dialog.threshold()
+            )
+        else:
+            self.compare_revisions(repo, *dialog.refs())
 
-    def load_lprof(self, lprof_file, title=None):
-        profile_data = load_profile_data(lprof_file)
-        if not title:
-            time = datetime.datetime.now().strftime("%X")
-            name = os.path.basename(lprof_file)
-            title = _("{name} at {time}").format(name=name, time=time)
-        self.historyCombo.insertItem(0, title, profile_data)
-        self.historyCombo.setCurrentIndex(0)
+    def compare_revisions(self, repo, ref_a, ref_b):
+        """Profile two revisions in temporary worktrees and compare them."""
+        from .revisions import RevisionComparison  # noqa: PLC0415, lazy startup
+
+        comparison = RevisionComparison(
+            repo, self.config, self.add_job, ref_a, ref_b, parent=self
+        )
+        comparison.finished.connect(self.revisions_compared)
+        return self.start_revision_task(comparison)
+
+    def bisect_revisions(self, repo, good, bad, function, threshold):
+        """Find the first commit where the time of ``function`` regressed."""
+        from .revisions import RevisionBisect  # noqa: PLC0415, lazy startup
+
+        bisect = RevisionBisect(
+            repo,
+            self.config,
+            self.add_job,
+            good,
+            bad,
+            function=function,
+            threshold=threshold,
+            parent=self,
+        )
+        bisect.step_finished.connect(
+            lambda step: self.revisionsWidget.add_bisect_step(bisect, step)
+        )
+        bisect.finished.connect(self.revisionsWidget.update_bisect)
+        self.start_revision_task(bisect)
+        self.revisionsWidget.set_bisect(bisect)
+        return bisect
+
+    def start_revision_task(self, task):
+        task.finished.connect(self.revision_task_finished)
+        self.revision_tasks.append(task)
+        self.dockRevisionsWidget.show()
+        self.dockRevisionsWidget.raise_()
+        task.start()
+        return task
+
+    @QtCore.Slot(object)
+    def revisions_compared(self, comparison):
+        if comparison.error is None:
+            self.revisionsWidget.set_comparison(comparison)
+
+    @QtCore.Slot(object)
+    def revision_task_finished(self, task):
+        if task.error is not None:
+            self.revisionsWidget.summaryLabel.setText(task.error)
+            self.dockOutputWidget.append_log_error(task.error)
+
+    @QtCore.Slot(bool)
+    def set_auto_rerun(self, enabled):
+        """Profile again after each save of the watched sources."""
+        with QtCore.QSignalBlocker(self.actionAutoRerun):
+            self.actionAutoRerun.setChecked(enabled)
+        if enabled:
+            self.update_watched_sources()
+        else:
+            self.source_watcher.stop()
+
+    def watched_sources(self):
+        """Script, warmup file and source files of the displayed functions."""
+        paths = set()
+        for filename in (self.config.script, self.config.warmup):
+            if filename:
+                paths.add(Path(self.config.wdir) / filename)
+        profile_data = self.historyCombo.currentData()
+        for func_data in profile_data or ():
+            paths.add(Path(self.config.wdir) / func_data.filename)
+        return paths
+
+    def update_watched_sources(self):
+        if self.actionAutoRerun.isChecked():
+            self.source_watcher.set_paths(self.watched_sources())
+
+    @QtCore.Slot(list)
+    def sources_changed(self, paths):
+        """Cancel the run in progress and profile the new sources."""
+        if not self.config.isvalid:
+            return
+        if self.kernprof_run.running:
+            self.run_cancelled = True
+            self.kernprof_run.kill()
+        self.function_profile = self.rerun_function_profile
+        self.start_profiling(targets=self.rerun_targets)
+        self.statusbar.showMessage(
+            _("Profiling again after the change of {files}").format(
+                files=", ".join(os.path.basename(path) for path in paths)
+            )
+        )
+
+    @QtCore.Slot()
+    def select_watched_folder(self):
+        if not self.actionWatchFolder.isChecked():
+            self.folder_watcher.stop()
+            return
+        directory = QtWidgets.QFileDialog.getExistingDirectory(
+            self, _("Select the folder to watch for .lprof files")
+        )
+        if directory:
+            self.watch_folder(directory)
+        else:
+            self.actionWatchFolder.setChecked(False)
+
+    def watch_folder(self, directory, merge=None):
+        """Load the new .lprof files of a directory as they appear."""
+        if merge is not None:
+            with QtCore.QSignalBlocker(self.actionWatchMerge):
+                self.actionWatchMerge.setChecked(merge)
+        self.folder_watcher.start(directory, self.actionWatchMerge.isChecked())
+        self.actionWatchFolder.setChecked(True)
+        self.statusbar.showMessage(
+            _("Watching {directory}").format(directory=self.folder_watcher.directory)
+        )
+
+    @QtCore.Slot(bool)
+    def set_watch_merge(self, merge):
+        self.folder_watcher.merge = merge
+
+    @QtCore.Slot(str, object, object, int)
+    def watched_file_parsed(self, lprof_file, profile_data, merge_key, count):
+        if merge_key is None:
+            title = self.history_title(lprof_file)
+        else:
+            name = ", ".join(os.path.basename(filename) for filename in merge_key)
+            title = _("{name} merged from {count} files").format(name=name, count=count)
+        self.watched_results.append((title, profile_data, merge_key))
+        if len(self.watched_results) == 1:
+            self.watched_results_deadline = (
+                time.monotonic() + self.WATCHED_RESULTS_MAX_DELAY
+            )
+        if time.monotonic() < self.watched_results_deadline:
+            self.watched_results_timer.start()
+
+    @QtCore.Slot(str, str)
+    def watched_file_failed(self, lprof_file, error):
+        self.dockOutputWidget.append_log_error(
+            _("Could not load {file}: {error}").format(file=lprof_file, error=error)
+        )
+
+    @QtCore.Slot()
+    def add_watched_results(self):
+        results, self.watched_results = self.watched_results, []
+        with self.folder_watcher.paused(), PIPELINE.run("watch folder"):
+            PIPELINE.count("files", len(results))
+            for title, profile_data, merge_key in results:
+                self.add_history(title, profile_data, merge_key)
+            # Only the last results are displayed
+            self.load_history(0)
+        self.show_pipeline_timings()
 
     @QtCore.Slot(int)
     def load_history(self, index):
         if index < 0:
             return
-        self.resultsTreeWidget.show_tree(self.historyCombo.currentData())
+        profile_data = self.historyCombo.currentData()
+        self.historyCombo.setToolTip(describe_run(profile_data))
+        self.statusbar_resources.setText(summarize_resources(profile_data.resources))
+        self.statusbar_resources.setToolTip(describe_resources(profile_data.resources))
+        self.update_thread_combo(profile_data)
+        with PIPELINE.run("show_history", title=self.historyCombo.currentText()):
+            self.show_results(self.thread_profile_data())
+        if "dockFunctionsWidget" in self._docks:
+            self.update_function_profile()
+        if profile_data.function_profile is not None:
+            self.dockFunctionsWidget.show()
+        self.update_watched_sources()
+        if not PIPELINE.running:
+            self.show_pipeline_timings()
+
+    def update_function_profile(self):
+        """Display the function level profile of the current history item."""
+        profile_data = self.historyCombo.currentData()
+        if profile_data is None:
+            return
+        self.functionStatsWidget.set_function_profile(
+            profile_data.function_profile,
+            line_profiled={func_data.func_id for func_data in profile_data},
+        )
+
+    def show_results(self, profile_data):
+        self.resultsTreeWidget.show_tree(profile_data)
+        # The docks not displayed yet are filled when created
+        if "dockSourceWidget" in self._docks:
+            with PIPELINE.phase("source view"):
+                self.sourceView.set_profile_data(profile_data)
+        if "dockRollupWidget" in self._docks:
+            with PIPELINE.phase("rollup"):
+                self.rollupWidget.set_profile_data(profile_data)
+
+    def update_thread_combo(self, profile_data):
+        """List the threads of the results, keeping the selected one if possible."""
+        thread = self.threadCombo.currentData()
+        with QtCore.QSignalBlocker(self.threadCombo):
+            self.threadCombo.clear()
+            self.threadCombo.addItem(_("All threads"), None)
+            for name in profile_data.threads:
+                self.threadCombo.addItem(name, name)
+            self.threadCombo.setCurrentIndex(max(0, self.threadCombo.findData(thread)))
+        self.threadComboAction.setVisible(bool(profile_data.threads))
+
+    def thread_profile_data(self):
+        """Results of the selected thread in the current history item."""
+        profile_data = self.historyCombo.currentData()
+        thread = self.threadCombo.currentData()
+        if thread is None:
+            return profile_data
+        return profile_data.threads[thread]
+
+    @QtCore.Slot(int)
+    def show_thread(self, index):
+        if index < 0 or self.historyCombo.currentIndex() < 0:
+            return
+        with PIPELINE.run("show_thread", thread=self.threadCombo.currentText()):
+            self.show_results(self.thread_profile_data())
+        self.show_pipeline_timings()
+
+    def show_pipeline_timings(self):
+        self.statusbar_pipeline.setText(
+            _("Displayed in {duration:.0f}ms").format(duration=PIPELINE.total * 1e3)
+        )
+        self.statusbar_pipeline.setToolTip(PIPELINE.summary())
+        self.dockPipelineWidget.set_timings(PIPELINE)
 
     @QtCore.Slot()
     def report_bug(self):
@@ -435,3 +1345,46 @@ class DockOutputWidget(QtWidgets.QDockWidget):
 
     def clear(self):
         self.outputWidget.clear()
+
+
+class DockPipelineWidget(QtWidgets.QDockWidget):
+    """Display the time spent by the GUI to load and display the results."""
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setup_ui()
+
+    def setup_ui(self):
+        self.setWindowTitle(_("Pipeline timings"))
+        self.timingsWidget = QtWidgets.QTreeWidget()
+        self.timingsWidget.setFrameShape(QtWidgets.QFrame.NoFrame)
+        self.timingsWidget.setRootIsDecorated(False)
+        self.timingsWidget.setHeaderLabels([_("Phase"), _("Time (ms)")])
+        self.timingsWidget.setMinimumSize(300, 50)
+        self.setWidget(self.timingsWidget)
+
+    def set_timings(self, timings):
+        self.timingsWidget.clear()
+        for name, duration in timings.phases.items():
+            item = QtWidgets.QTreeWidgetItem(self.timingsWidget)
+            item.setData(0, Qt.DisplayRole, name)
+            item.setData(1, Qt.DisplayRole, f"{duration * 1e3:.3f}")
+            item.setTextAlignment(1, Qt.AlignRight)
+        item = QtWidgets.QTreeWidgetItem(self.timingsWidget)
+        item.setData(
+            0,
+            Qt.DisplayRole,
+            _("Total ({operation})").format(operation=timings.operation),
+        )
+        item.setData(1, Qt.DisplayRole, f"{timings.total * 1e3:.3f}")
+        item.setTextAlignment(1, Qt.AlignRight)
+        font = item.font(0)
+        font.setBold(True)
+        item.setFont(0, font)
+        item.setFont(1, font)
+        for name, value in timings.counters.items():
+            item = QtWidgets.QTreeWidgetItem(self.timingsWidget)
+            item.setData(0, Qt.DisplayRole, _("{name} processed").format(name=name))
+            item.setData(1, Qt.DisplayRole, str(value))
+            item.setTextAlignment(1, Qt.AlignRight)
+        self.timingsWidget.resizeColumnToContents(0)
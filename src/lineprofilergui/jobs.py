@@ -0,0 +1,358 @@
+"""Queue of profiling jobs, each with its own configuration.
+
+The jobs are run in the order they were queued, with at most ``max_parallel``
+jobs running at the same time.
+"""
+
+import os
+import time
+from pathlib import Path
+
+from PySide6 import QtCore, QtWidgets
+from PySide6.QtCore import Qt
+
+from .process import KernprofRun
+from .utils import ICONS, SortableTreeWidgetItem
+from .utils import translate as _
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_FINISHED = "finished"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+JOB_STATE_TEXT = {
+    JOB_PENDING: _("Pending"),
+    JOB_RUNNING: _("Running"),
+    JOB_FINISHED: _("Finished"),
+    JOB_FAILED: _("Failed"),
+    JOB_CANCELLED: _("Cancelled"),
+}
+
+
+def job_label(config):
+    """Default label of a job: the script name and its arguments."""
+    return f"{Path(config.script).name} {config.args}".strip()
+
+
+class ProfilingJob(QtCore.QObject):
+    """A profiling run of a configuration, with its state and duration."""
+
+    finished = QtCore.Signal(object)
+
+    def __init__(self, config, label=None, parent=None):
+        super().__init__(parent)
+        # The jobs may run at the same time, so each one writes its results
+        # in the temporary directory of its configuration, never in a shared
+        # statistics file
+        config.stats_tmp = True
+        self.config = config
+        self.label = label or job_label(config)
+        self.state = JOB_PENDING
+        self.start_time = None
+        self.stop_time = None
+        self.errors = []
+        # Results, once loaded in the history
+        self.profile_data = None
+
+        self.kernprof_run = KernprofRun(config)
+        self.kernprof_run.output_error.connect(self.errors.append)
+
+    @property
+    def done(self):
+        return self.state in (JOB_FINISHED, JOB_FAILED, JOB_CANCELLED)
+
+    @property
+    def duration(self):
+        if self.start_time is None:
+            return None
+        return (self.stop_time or time.monotonic()) - self.start_time
+
+    def start(self):
+        Path(self.config.stats).unlink(missing_ok=True)
+        process = self.kernprof_run.prepare()
+        process.finished.connect(self.process_finished)
+        process.errorOccurred.connect(self.process_error)
+        self.state = JOB_RUNNING
+        self.start_time = time.monotonic()
+        self.kernprof_run.start()
+
+    def cancel(self):
+        if self.done:
+            return
+        running = self.state == JOB_RUNNING
+        self.state = JOB_CANCELLED
+        if running:
+            self.kernprof_run.kill()
+        else:
+            self.finished.emit(self)
+
+    @QtCore.Slot(int, QtCore.QProcess.ExitStatus)
+    def process_finished(self, exit_code, exit_status):
+        if self.state == JOB_RUNNING:
+            crashed = exit_status != QtCore.QProcess.NormalExit
+            self.state = JOB_FAILED if exit_code or crashed else JOB_FINISHED
+        self.stop()
+
+    @QtCore.Slot(QtCore.QProcess.ProcessError)
+    def process_error(self, error):
+        # The finished signal is not emitted if the process did not start
+        if error == QtCore.QProcess.FailedToStart and self.state == JOB_RUNNING:
+            self.state = JOB_FAILED
+            self.stop()
+
+    def stop(self):
+        self.stop_time = time.monotonic()
+        self.kernprof_run.forkserver.stop()
+        self.finished.emit(self)
+
+
+class JobQueue(QtCore.QObject):
+    """Run the queued jobs in order, at most ``max_parallel`` at a time."""
+
+    # The state of a job changed
+    job_changed = QtCore.Signal(object)
+    # A job ran to completion, or failed, but was not cancelled
+    job_finished = QtCore.Signal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = []
+        self.max_parallel = 1
+        self.cancelling = False
+
+    def running_jobs(self):
+        return [job for job in self.jobs if job.state == JOB_RUNNING]
+
+    def add(self, config, label=None):
+        job = ProfilingJob(config, label, self)
+        job.finished.connect(self.job_done)
+        self.jobs.append(job)
+        self.job_changed.emit(job)
+        self.start_pending()
+        return job
+
+    def set_max_parallel(self, max_parallel):
+        self.max_parallel = max(1, max_parallel)
+        self.start_pending()
+
+    def start_pending(self):
+        if self.cancelling:
+            return
+        running = len(self.running_jobs())
+        for job in self.jobs:
+            if running >= self.max_parallel:
+                break
+            if job.state == JOB_PENDING:
+                running += 1
+                job.start()
+                self.job_changed.emit(job)
+
+    def cancel(self, job):
+        job.cancel()
+
+    def cancel_all(self):
+        self.cancelling = True
+        try:
+            for job in self.jobs:
+                job.cancel()
+        finally:
+            self.cancelling = False
+
+    def clear_done(self):
+        for job in [job for job in self.jobs if job.done]:
+            self.jobs.remove(job)
+            job.deleteLater()
+
+    @QtCore.Slot(object)
+    def job_done(self, job):
+        # The results are loaded before the job is reported as done
+        if job.state != JOB_CANCELLED:
+            self.job_finished.emit(job)
+        self.job_changed.emit(job)
+        self.start_pending()
+
+
+class JobQueueWidget(QtWidgets.QWidget):
+    """Display the state of the queued jobs, and cancel them."""
+
+    job_activated = QtCore.Signal(object)
+
+    column_header_text = [
+        _("Label"),
+        _("Script"),
+        _("State"),
+        _("Duration (s)"),
+    ]
+    COL_LABEL = 0
+    COL_SCRIPT = 1
+    COL_STATE = 2
+    COL_DURATION = 3
+
+    def __init__(self, parent, job_queue):
+        super().__init__(parent)
+        self.job_queue = job_queue
+        self.items = {}  # {job: item}
+        self.setup_ui()
+
+        self.duration_timer = QtCore.QTimer(self)
+        self.duration_timer.setInterval(500)
+        self.duration_timer.timeout.connect(self.update_durations)
+
+        self.job_queue.job_changed.connect(self.update_job)
+        # The widget may be created after the first jobs were queued
+        for job in self.job_queue.jobs:
+            self.update_job(job)
+
+    def setup_ui(self):
+        self.verticalLayout = QtWidgets.QVBoxLayout(self)
+        self.verticalLayout.setContentsMargins(0, 0, 0, 0)
+
+        self.buttonsLayout = QtWidgets.QHBoxLayout()
+        self.addButton = QtWidgets.QToolButton(self)
+        self.addButton.setObjectName("addButton")
+        self.addButton.setAutoRaise(True)
+        self.buttonsLayout.addWidget(self.addButton)
+        self.cancelButton = QtWidgets.QToolButton(self)
+        self.cancelButton.setObjectName("cancelButton")
+        self.cancelButton.setIcon(ICONS["STOP"])
+        self.cancelButton.setAutoRaise(True)
+        self.buttonsLayout.addWidget(self.cancelButton)
+        self.cancelAllButton = QtWidgets.QToolButton(self)
+        self.cancelAllButton.setObjectName("cancelAllButton")
+        self.cancelAllButton.setAutoRaise(True)
+        self.buttonsLayout.addWidget(self.cancelAllButton)
+        self.clearButton = QtWidgets.QToolButton(self)
+        self.clearButton.setObjectName("clearButton")
+        self.clearButton.setAutoRaise(True)
+        self.buttonsLayout.addWidget(self.clearButton)
+        self.buttonsLayout.addStretch()
+        self.parallelLabel = QtWidgets.QLabel(self)
+        self.buttonsLayout.addWidget(self.parallelLabel)
+        self.parallelSpinBox = QtWidgets.QSpinBox(self)
+        self.parallelSpinBox.setObjectName("parallelSpinBox")
+        self.parallelSpinBox.setRange(1, os.cpu_count() or 1)
+        self.parallelSpinBox.setValue(self.job_queue.max_parallel)
+        self.buttonsLayout.addWidget(self.parallelSpinBox)
+        self.verticalLayout.addLayout(self.buttonsLayout)
+
+        self.jobsTree = QtWidgets.QTreeWidget(self)
+        self.jobsTree.setObjectName("jobsTree")
+        self.jobsTree.setFrameShape(QtWidgets.QFrame.NoFrame)
+        self.jobsTree.setRootIsDecorated(False)
+        self.jobsTree.setUniformRowHeights(True)
+        self.jobsTree.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        # Double-click displays the results
+        self.jobsTree.setEditTriggers(
+            QtWidgets.QAbstractItemView.SelectedClicked
+            | QtWidgets.QAbstractItemView.EditKeyPressed
+        )
+        self.jobsTree.setColumnCount(len(self.column_header_text))
+        self.jobsTree.setHeaderLabels(self.column_header_text)
+        self.verticalLayout.addWidget(self.jobsTree)
+
+        self.summaryLabel = QtWidgets.QLabel(self)
+        self.verticalLayout.addWidget(self.summaryLabel)
+
+        self.retranslate_ui()
+        QtCore.QMetaObject.connectSlotsByName(self)
+
+    def retranslate_ui(self):
+        self.addButton.setText(_("Add..."))
+        self.addButton.setToolTip(_("Queue a profiling job with its own configuration"))
+        self.cancelButton.setText(_("Cancel"))
+        self.cancelButton.setToolTip(_("Cancel the selected jobs"))
+        self.cancelAllButton.setText(_("Cancel all"))
+        self.clearButton.setText(_("Clear"))
+        self.clearButton.setToolTip(_("Remove the jobs which are done"))
+        self.parallelLabel.setText(_("Parallel jobs:"))
+        self.parallelSpinBox.setToolTip(
+            _("Maximum number of jobs running at the same time")
+        )
+        self.update_summary()
+
+    @QtCore.Slot(object)
+    def update_job(self, job):
+        # Only the edition of the labels is handled by on_jobsTree_itemChanged
+        with QtCore.QSignalBlocker(self.jobsTree):
+            self.update_item(job)
+        if any(job.state == JOB_RUNNING for job in self.items):
+            self.duration_timer.start()
+        else:
+            self.duration_timer.stop()
+        self.update_summary()
+
+    def update_item(self, job):
+        item = self.items.get(job)
+        if item is None:
+            item = self.items[job] = SortableTreeWidgetItem(self.jobsTree)
+            item.setFlags(item.flags() | Qt.ItemIsEditable)
+            item.setText(self.COL_LABEL, job.label)
+            item.setText(self.COL_SCRIPT, os.path.basename(job.config.script))
+            item.setToolTip(self.COL_SCRIPT, job.config.script)
+            item.setTextAlignment(self.COL_DURATION, Qt.AlignRight)
+        item.setText(self.COL_STATE, JOB_STATE_TEXT[job.state])
+        item.setToolTip(self.COL_STATE, "".join(job.errors[-10:]).strip())
+        self.update_duration(item, job)
+
+    def update_duration(self, item, job):
+        duration = job.duration
+        item.setText(self.COL_DURATION, "" if duration is None else f"{duration:.1f}")
+
+    @QtCore.Slot()
+    def update_durations(self):
+        with QtCore.QSignalBlocker(self.jobsTree):
+            for job, item in self.items.items():
+                if job.state == JOB_RUNNING:
+                    self.update_duration(item, job)
+
+    def update_summary(self):
+        states = [job.state for job in self.items]
+        self.summaryLabel.setText(
+            _("{running} running, {pending} pending, {done} done").format(
+                running=states.count(JOB_RUNNING),
+                pending=states.count(JOB_PENDING),
+                done=len(states)
+                - states.count(JOB_RUNNING)
+                - states.count(JOB_PENDING),
+            )
+        )
+
+    def selected_jobs(self):
+        selected = set(self.jobsTree.selectedItems())
+        return [job for job, item in self.items.items() if item in selected]
+
+    @QtCore.Slot()
+    def on_cancelButton_clicked(self):
+        for job in self.selected_jobs():
+            self.job_queue.cancel(job)
+
+    @QtCore.Slot()
+    def on_cancelAllButton_clicked(self):
+        self.job_queue.cancel_all()
+
+    @QtCore.Slot()
+    def on_clearButton_clicked(self):
+        self.job_queue.clear_done()
+        for job in [job for job in self.items if job not in self.job_queue.jobs]:
+            item = self.items.pop(job)
+            self.jobsTree.takeTopLevelItem(self.jobsTree.indexOfTopLevelItem(item))
+        self.update_summary()
+
+    @QtCore.Slot(int)
+    def on_parallelSpinBox_valueChanged(self, value):
+        self.job_queue.set_max_parallel(value)
+
+    @QtCore.Slot(QtWidgets.QTreeWidgetItem, int)
+    def on_jobsTree_itemChanged(self, item, column):
+        if column != self.COL_LABEL:
+            return
+        for job, job_item in self.items.items():
+            if job_item is item:
+                job.label = item.text(column)
+
+    @QtCore.Slot(QtWidgets.QTreeWidgetItem, int)
+    def on_jobsTree_itemActivated(self, item, column):
+        for job, job_item in self.items.items():
+            if job_item is item:
+                self.job_activated.emit(job)
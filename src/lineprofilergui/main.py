@@ -4,8 +4,15 @@ import sys
 from PySide6 import QtCore, QtWidgets
 
 from . import __version__
+from .config import (
+    BACKEND_KERNPROF,
+    BACKEND_MONITORING,
+    BACKEND_SAMPLING,
+    BACKEND_SETTRACE,
+    DEFAULT_BLOCKING_THRESHOLD,
+)
 from .gui import UIMainWindow
-from .utils import icons_factory
+from .perf import PIPELINE
 
 
 def positive_float(value):
@@ -15,6 +22,13 @@ def positive_float(value):
     return val
 
 
+def sweep_sizes(text):
+    """Input sizes of --sweep, the sweep module is only imported when used."""
+    from .sweep import parse_sizes  # noqa: PLC0415, lazy startup
+
+    return parse_sizes(text)
+
+
 def commandline_args(args):
     """Manage arguments with argparse."""
     parser = argparse.ArgumentParser(
@@ -33,6 +47,143 @@ def commandline_args(args):
     parser.add_argument(
         "-s", "--setup", help="Python script to execute before the code to profile"
     )
+    parser.add_argument(
+        "--backend",
+        choices=[
+            BACKEND_KERNPROF,
+            BACKEND_SETTRACE,
+            BACKEND_MONITORING,
+            BACKEND_SAMPLING,
+        ],
+        default=BACKEND_KERNPROF,
+        help="Line by line profiler: kernprof (default), the built-in sys.settrace"
+        " tracer, the sys.monitoring tracer (python >= 3.12), or the statistical"
+        " sampling of all the functions",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="Record the memory allocated by each line",
+    )
+    parser.add_argument(
+        "--histograms",
+        action="store_true",
+        help="Record the distribution of the line hit durations, to display"
+        " percentiles",
+    )
+    parser.add_argument(
+        "--cpu-time",
+        action="store_true",
+        help="Record the CPU time of each line in addition to the wall time",
+    )
+    parser.add_argument(
+        "--threads",
+        action="store_true",
+        help="Also record the results of each thread separately",
+    )
+    parser.add_argument(
+        "--calls",
+        action="store_true",
+        help="Also record the calls between the profiled functions, to display"
+        " the time spent by each line itself",
+    )
+    parser.add_argument(
+        "--gc-time",
+        action="store_true",
+        help="Record the garbage collections and their time on each line",
+    )
+    parser.add_argument(
+        "--hits-only",
+        action="store_true",
+        help="Only count the hits of each line, without timing",
+    )
+    parser.add_argument(
+        "--steady-function",
+        default="",
+        help="Discard the results collected until STEADY_FUNCTION returned"
+        " STEADY_CALLS times",
+    )
+    parser.add_argument(
+        "--steady-calls",
+        type=int,
+        default=1,
+        help="Number of warm-up calls of STEADY_FUNCTION (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--asyncio",
+        action="store_true",
+        help="Separate the time coroutines spend suspended at await from the"
+        " line times, and count the hits blocking the event loop",
+    )
+    parser.add_argument(
+        "--blocking-threshold",
+        type=float,
+        default=DEFAULT_BLOCKING_THRESHOLD,
+        help="Duration in ms above which a line hit blocks the event loop"
+        " (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--cpus",
+        default="",
+        help="Pin the profiled process to these CPUs, e.g. 0-3,6 (Linux only)",
+    )
+    parser.add_argument(
+        "--nice",
+        type=int,
+        default=0,
+        help="Increment of the niceness of the profiled process",
+    )
+    parser.add_argument(
+        "--hash-seed",
+        type=int,
+        help="Set PYTHONHASHSEED for reproducible set and dict iteration orders",
+    )
+    parser.add_argument(
+        "--disable-gc",
+        action="store_true",
+        help="Disable the garbage collector while the script runs",
+    )
+    parser.add_argument(
+        "--idle-check",
+        action="store_true",
+        help="Warn if the system is busy when the profiling starts",
+    )
+    parser.add_argument(
+        "--forkserver",
+        action="store_true",
+        help="Fork a warm python interpreter for each run (POSIX only)",
+    )
+    parser.add_argument(
+        "--preload",
+        default="",
+        help="Comma separated modules imported once by the fork server",
+    )
+    parser.add_argument(
+        "--sweep",
+        type=sweep_sizes,
+        metavar="SIZES",
+        help="Profile the script for each of the comma separated input SIZES,"
+        " replacing {n} in the script arguments (appended if absent)",
+    )
+    parser.add_argument(
+        "--rerun-on-save",
+        action="store_true",
+        help="Profile the script again each time its source files are saved",
+    )
+    parser.add_argument(
+        "--watch",
+        metavar="DIRECTORY",
+        help="Load the .lprof files appearing in DIRECTORY, e.g. from batch jobs",
+    )
+    parser.add_argument(
+        "--watch-merge",
+        action="store_true",
+        help="Merge the watched files profiling the same source files",
+    )
+    parser.add_argument(
+        "--perf-log",
+        help="Append the GUI pipeline timings to PERF_LOG as JSON lines",
+    )
     parser.add_argument("script", nargs="?", help="The python script file to run")
     parser.add_argument("args", nargs="...", help="Optional script arguments")
 
@@ -45,8 +196,8 @@ def commandline_args(args):
 
 def make_window(args=None):
     options = commandline_args(args)
-
-    icons_factory()
+    if options.perf_log:
+        PIPELINE.log_file = options.perf_log
 
     # Used for QSettings
     QtCore.QCoreApplication.setOrganizationName("OpenPyUtils")
@@ -56,21 +207,47 @@ def make_window(args=None):
     win = UIMainWindow()
     win.show()
 
+    # Everything else is done once the window is displayed
     if options.lprof:
-        win.load_lprof(options.lprof)
+        QtCore.QTimer.singleShot(0, lambda: win.load_lprof(options.lprof))
+    if options.watch:
+        win.watch_folder(options.watch, options.watch_merge)
 
     win.config.script = options.script
     win.config.args = options.args
     win.config.warmup = options.setup
     win.config.outfile = options.outfile
+    win.config.memory = options.memory
+    win.config.histograms = options.histograms
+    win.config.cpu_time = options.cpu_time
+    win.config.threads = options.threads
+    win.config.calls = options.calls
+    win.config.gc_time = options.gc_time
+    win.config.hits_only = options.hits_only
+    win.config.backend = options.backend
+    win.config.steady_function = options.steady_function
+    win.config.steady_calls = options.steady_calls
+    win.config.async_mode = options.asyncio
+    win.config.blocking_threshold = options.blocking_threshold
+    win.config.cpus = options.cpus
+    win.config.nice = options.nice
+    win.config.hash_seed = options.hash_seed
+    win.config.disable_gc = options.disable_gc
+    win.config.idle_check = options.idle_check
+    win.config.forkserver = options.forkserver
+    win.config.preload = options.preload
+    if options.rerun_on_save:
+        win.set_auto_rerun(True)
     if options.script:
         win.update_window_title()
         if options.run:
-            win.profile()
+            QtCore.QTimer.singleShot(0, win.profile)
+        elif options.sweep:
+            QtCore.QTimer.singleShot(0, lambda: win.start_sweep(options.sweep))
         else:
-            win.configure()
-    elif not options.lprof:
-        win.configure()
+            QtCore.QTimer.singleShot(0, win.configure)
+    elif not (options.lprof or options.watch):
+        QtCore.QTimer.singleShot(0, win.configure)
 
     return win
 
@@ -0,0 +1,61 @@
+"""Options of the profiling runner, shared with the configuration of the GUI.
+
+Like the runner, this module only depends on the standard library, as the
+runner executed as a script imports it from its directory. It is also cheap
+to import, unlike the runner, so that the GUI starts without loading it.
+"""
+
+import itertools
+
+BACKEND_SETTRACE = "settrace"
+BACKEND_MONITORING = "monitoring"
+BACKEND_SAMPLING = "sampling"
+
+DEFAULT_SAMPLING_INTERVAL = 1.0  # ms
+# Same as the default slow callback duration of asyncio in debug mode
+DEFAULT_BLOCKING_THRESHOLD = 100.0  # ms
+
+# Options timing the lines with their own sys.settrace tracer, by precedence
+LINE_MEASURES = ("memory", "histograms", "cpu_time", "asyncio")
+# Options recorded with sys.settrace, whatever the backend
+SETTRACE_OPTIONS = (*LINE_MEASURES, "calls", "threads")
+# Options which cannot be combined, as (option, ignored option) pairs, where
+# the backends are named after their --backend value
+OPTION_CONFLICTS = (
+    *itertools.combinations(LINE_MEASURES, 2),
+    ("asyncio", "calls"),
+    *((name, "hits_only") for name in SETTRACE_OPTIONS),
+    *(
+        (name, backend)
+        for name in SETTRACE_OPTIONS
+        for backend in (BACKEND_MONITORING, BACKEND_SAMPLING)
+    ),
+    ("hits_only", BACKEND_SAMPLING),
+)
+
+
+def conflicting_options(name, enabled):
+    """Return the enabled options which cannot be combined with the option."""
+    return [
+        other
+        for pair in OPTION_CONFLICTS
+        if name in pair
+        for other in pair
+        if other != name and other in enabled
+    ]
+
+
+def parse_cpus(text):
+    """Parse a list of CPUs like ``0-3,6``."""
+    cpus = set()
+    for part in text.split(","):
+        part = part.strip()  # noqa: PLW2901
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        first = int(first)
+        last = int(last) if last else first
+        if first < 0 or last < first:
+            raise ValueError(part)
+        cpus.update(range(first, last + 1))
+    return sorted(cpus)
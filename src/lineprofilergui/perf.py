@@ -0,0 +1,114 @@
+"""Self-instrumentation of the GUI pipeline.
+
+The time spent by the GUI itself to display profiling results is split into
+phases (unpickling, source lookup, parsing, tree population, expansion, column
+resizing...). Each top-level operation is recorded in ``PIPELINE`` and can be
+displayed in the GUI or logged as JSON lines for further analysis. The phases
+measured by other threads than the one running the operations, e.g. by
+background parsers, are not recorded.
+"""
+
+import datetime as dt
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+PERF_LOG_ENV = "LINEPROFILERGUI_PERF_LOG"
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineTimings:
+    """Phase timers and counters of the last pipeline operation."""
+
+    def __init__(self):
+        self.operation = None
+        self.context = {}
+        self.phases = {}
+        self.counters = {}
+        self.total = 0.0
+        self.log_file = os.environ.get(PERF_LOG_ENV) or None
+
+        self._depth = 0
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._depth > 0
+
+    def recording(self):
+        """Check if the current thread is the one running the operations."""
+        return self._thread is None or self._thread == threading.get_ident()
+
+    def reset(self, operation=None, **context):
+        self.operation = operation
+        self.context = context
+        self.phases = {}
+        self.counters = {}
+        self.total = 0.0
+
+    @contextmanager
+    def run(self, operation, **context):
+        """Record a top-level operation.
+
+        Nested calls are merged into the outermost operation, which resets the
+        timings on entry and publishes them on exit.
+        """
+        outermost = self._depth == 0
+        if outermost:
+            self.reset(operation, **context)
+            self._thread = threading.get_ident()
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+            if outermost:
+                self.total = time.perf_counter() - start
+                self.publish()
+
+    @contextmanager
+    def phase(self, name):
+        """Accumulate the time spent in the block in the ``name`` phase."""
+        if not self.recording():
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, value=1):
+        if self.recording():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def as_dict(self):
+        return {
+            "timestamp": dt.datetime.now().isoformat(),
+            "operation": self.operation,
+            **self.context,
+            "total": self.total,
+            "phases": dict(self.phases),
+            "counters": dict(self.counters),
+        }
+
+    def summary(self):
+        """Human readable one-line summary of the phases."""
+        return ", ".join(
+            f"{name} {duration * 1e3:.1f}ms" for name, duration in self.phases.items()
+        )
+
+    def publish(self):
+        record = json.dumps(self.as_dict())
+        logger.debug(record)
+        if self.log_file:
+            with open(self.log_file, "a", encoding="utf-8") as fid:
+                fid.write(record + "\n")
+
+
+PIPELINE = PipelineTimings()
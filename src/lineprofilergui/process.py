@@ -1,11 +1,289 @@
+import contextlib
+import json
 import linecache
 import os
 import shlex
+import sys
+import time
+import weakref
+from pathlib import Path
 
 from PySide6 import QtCore
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from .config import BACKEND_KERNPROF, BACKEND_SAMPLING
 from .utils import translate as _
 
+# Not imported, so that the GUI starts without loading the runner
+RUNNER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "runner.py")
+
+# Fraction of the CPU time used by the system above which it is not idle
+IDLE_THRESHOLD = 0.1
+# Duration of the measure of the CPU usage of the system before a run
+IDLE_CHECK_INTERVAL = 200  # ms
+
+
+def process_environment(config):
+    qenv = QtCore.QProcessEnvironment.systemEnvironment()
+    for name, value in config.env.items():
+        qenv.insert(name, value)
+    if config.hash_seed is not None:
+        qenv.insert("PYTHONHASHSEED", str(config.hash_seed))
+    return qenv
+
+
+def cpu_times():
+    """Total and idle CPU times of the whole system, or None if unknown.
+
+    They are read from ``/proc/stat``, on Linux only.
+    """
+    try:
+        with open("/proc/stat", encoding="ascii") as fid:
+            values = [int(value) for value in fid.readline().split()[1:]]
+        # Total, and idle + iowait
+        return sum(values), values[3] + values[4]
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def cpu_usage(start_times=None):
+    """Fraction of the CPU time used by the whole system, or None if unknown.
+
+    It is measured since the ``start_times`` returned by ``cpu_times()``,
+    else estimated from the load average.
+    """
+    stop_times = cpu_times()
+    if start_times is None or stop_times is None:
+        try:
+            return os.getloadavg()[0] / os.cpu_count()
+        except (AttributeError, OSError):
+            return None
+    total = stop_times[0] - start_times[0]
+    if total <= 0:
+        return 0.0
+    return 1 - (stop_times[1] - start_times[1]) / total
+
+
+class ResourceMonitor(QtCore.QObject):
+    """Measure the resource usage of the profiled process.
+
+    The profiling runner writes the usage of the process running the script in
+    ``usage_file``: its own, or the one of the child of the fork server.
+
+    Without it, the CPU times, page faults and context switches are the
+    increase of the usage of the terminated children of the GUI, which
+    includes the profiled process once QProcess has waited for it. This usage
+    is mixed when several processes run at the same time, and then dropped.
+    The maximum resident set size of ``getrusage`` is shared by all the
+    children, so on Linux the peak is also sampled from ``/proc`` while the
+    process runs.
+    """
+
+    SAMPLING_INTERVAL = 100  # ms
+
+    # Monitors of the processes running, see shared
+    running = weakref.WeakSet()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pid = None
+        self.peak_rss = 0
+        self.start_usage = None
+        self.start_time = 0.0
+        self.usage_file = None
+        # Another process ran at the same time
+        self.shared = False
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.sample)
+
+    def start(self, process, usage_file=None):
+        """Start the measure, before the process is started."""
+        self.pid = None
+        self.peak_rss = 0
+        self.usage_file = usage_file
+        if usage_file is not None:
+            Path(usage_file).unlink(missing_ok=True)
+        self.shared = bool(self.running)
+        for monitor in self.running:
+            monitor.shared = True
+        self.running.add(self)
+        if resource is not None:
+            self.start_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        self.start_time = time.perf_counter()
+        if usage_file is None:
+            process.started.connect(lambda: self.watch(process.processId()))
+
+    def watch(self, pid):
+        self.pid = pid
+        if os.path.exists(f"/proc/{pid}/status"):
+            self.sample()
+            self.timer.start(self.SAMPLING_INTERVAL)
+
+    @QtCore.Slot()
+    def sample(self):
+        try:
+            with open(f"/proc/{self.pid}/status", encoding="ascii") as fid:
+                for line in fid:
+                    if line.startswith("VmHWM:"):
+                        # Peak resident set size, in kB
+                        peak_rss = int(line.split()[1]) * 1024
+                        self.peak_rss = max(self.peak_rss, peak_rss)
+                        break
+        except (OSError, ValueError):
+            # The process is terminated
+            self.timer.stop()
+
+    def stop(self):
+        """Return the resource usage, once the process is finished."""
+        self.timer.stop()
+        self.running.discard(self)
+        usage = {"wall_time": time.perf_counter() - self.start_time}
+        if self.usage_file is not None:
+            with contextlib.suppress(OSError, ValueError):
+                usage.update(json.loads(Path(self.usage_file).read_text("utf-8")))
+            self.start_usage = None
+            return usage
+        if resource is None or self.start_usage is None or self.shared:
+            usage["peak_rss"] = self.peak_rss or None
+            self.start_usage = None
+            return usage
+        start = self.start_usage
+        stop = resource.getrusage(resource.RUSAGE_CHILDREN)
+        peak_rss = self.peak_rss
+        if stop.ru_maxrss > start.ru_maxrss:
+            # The profiled process is the biggest child so far
+            rss_unit = 1 if sys.platform == "darwin" else 1024
+            peak_rss = max(peak_rss, stop.ru_maxrss * rss_unit)
+        usage.update(
+            user_time=stop.ru_utime - start.ru_utime,
+            system_time=stop.ru_stime - start.ru_stime,
+            peak_rss=peak_rss or None,
+            minor_faults=stop.ru_minflt - start.ru_minflt,
+            major_faults=stop.ru_majflt - start.ru_majflt,
+            voluntary_switches=stop.ru_nvcsw - start.ru_nvcsw,
+            involuntary_switches=stop.ru_nivcsw - start.ru_nivcsw,
+        )
+        self.start_usage = None
+        return usage
+
+
+class ForkServer(QtCore.QObject):
+    """Warm python interpreter, which forks a child for each profiling run.
+
+    The configured modules are preloaded once by the server. It is restarted
+    when the files of the preloaded modules change on disk, or when the
+    configuration it depends on changes. The runs are requested by the
+    profiling runner, which runs the script itself if the server is not ready.
+    """
+
+    output_error = QtCore.Signal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.process = None
+        self.config = None
+        self.key = None
+        self.ready = False
+        self._output = ""
+
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.restart)
+
+    @property
+    def socket_path(self):
+        return os.path.join(self.config.temp_dir, "forkserver.sock")
+
+    def client_args(self):
+        return ["--connect", self.socket_path]
+
+    @staticmethod
+    def config_key(config):
+        return (
+            config.python,
+            tuple(config.preload_modules),
+            tuple(sorted(config.env.items())),
+            config.hash_seed,
+            config.wdir,
+        )
+
+    def ensure_started(self, config):
+        """Start the server, or restart it if its configuration changed."""
+        if self.process is not None and self.key == self.config_key(config):
+            return
+        self.config = config
+        self.start()
+
+    def start(self):
+        self.stop()
+        self.key = self.config_key(self.config)
+        self._output = ""
+        self.process = QtCore.QProcess(self)
+        self.process.setProcessEnvironment(process_environment(self.config))
+        self.process.setWorkingDirectory(self.config.wdir)
+        self.process.readyReadStandardOutput.connect(self.read_output)
+        self.process.readyReadStandardError.connect(self.read_error)
+        self.process.finished.connect(self.server_finished)
+        self.process.start(
+            self.config.python,
+            [
+                RUNNER_SCRIPT,
+                "--serve",
+                self.socket_path,
+                "--preload",
+                ",".join(self.config.preload_modules),
+            ],
+        )
+
+    def stop(self):
+        self.ready = False
+        if self.watcher.files():
+            self.watcher.removePaths(self.watcher.files())
+        if self.process is None:
+            return
+        process, self.process = self.process, None
+        process.finished.disconnect(self.server_finished)
+        if process.state() != QtCore.QProcess.NotRunning:
+            process.kill()
+            process.waitForFinished()
+        process.deleteLater()
+
+    @QtCore.Slot()
+    def restart(self):
+        if self.config is not None:
+            self.start()
+
+    @QtCore.Slot()
+    def read_output(self):
+        self._output += str(self.process.readAllStandardOutput(), "utf-8")
+        while "\n" in self._output:
+            line, self._output = self._output.split("\n", 1)
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if message.get("ready"):
+                self.ready = True
+                if message["files"]:
+                    self.watcher.addPaths(message["files"])
+
+    @QtCore.Slot()
+    def read_error(self):
+        self.output_error.emit(str(self.process.readAllStandardError(), "utf-8"))
+
+    @QtCore.Slot(int, QtCore.QProcess.ExitStatus)
+    def server_finished(self, exit_code, exit_status):
+        self.ready = False
+        if exit_status == QtCore.QProcess.NormalExit and exit_code == 0:
+            # Preloaded modules modified since the last run
+            self.start()
+        else:
+            self.process.deleteLater()
+            self.process = None
+
 
 class KernprofRun(QtCore.QObject):
     output_text = QtCore.Signal(str)
@@ -16,18 +294,53 @@ class KernprofRun(QtCore.QObject):
         self.config = config
 
         self.process = None
+        self.program = None
         self.p_args = None
+        # Resource usage written by the runner, kernprof does not measure it
+        self.usage_file = None
+
+        self.forkserver = ForkServer(self)
+        self.forkserver.output_error.connect(self.output_error)
+
+        # Run environment known before the run, completed by the runner
+        self.environment = {}
+
+        self.resource_monitor = ResourceMonitor(self)
+        self.resources = None
+
+        # Delays the start of the process while the system usage is measured
+        self.idle_start_times = None
+        self.idle_timer = QtCore.QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.timeout.connect(self.start_process)
+
+    def prepare(self, function_level=False, targets=None):
+        """Prepare the profiling process.
+
+        By default the decorated functions are profiled with ``kernprof -l``.
+        With ``function_level``, all the functions are profiled with cProfile
+        in ``config.function_stats``. If ``targets`` is given, the listed
+        functions are profiled line by line in addition to the decorated ones.
+        The profiling runner is also used instead of kernprof to record the
+        memory allocations, to reach a steady state, to control the run
+        environment, or if another backend or the fork server is configured.
+        """
+        self.environment = self.check_environment()
+
+        if self.config.forkserver:
+            self.forkserver.ensure_started(self.config)
+        else:
+            self.forkserver.stop()
 
-    def prepare(self):
         self.process = QtCore.QProcess(self)
         self.process.readyReadStandardOutput.connect(self.read_output)
         self.process.readyReadStandardError.connect(self.read_error)
+        # Connected first, so that the usage is known by the other slots
+        self.process.finished.connect(self.process_finished)
+        self.resources = None
 
         # Manage environment
-        qenv = QtCore.QProcessEnvironment.systemEnvironment()
-        for name, value in self.config.env.items():
-            qenv.insert(name, value)
-        self.process.setProcessEnvironment(qenv)
+        self.process.setProcessEnvironment(process_environment(self.config))
 
         self.process.setWorkingDirectory(self.config.wdir)
         filename = self.config.script
@@ -39,7 +352,26 @@ class KernprofRun(QtCore.QObject):
             filename = os.path.normpath(filename).replace(os.sep, "/")
             if warmup:
                 warmup = os.path.normpath(warmup).replace(os.sep, "/")
-        self.p_args = ["-l", "-o", self.config.stats]
+        self.usage_file = self.config.resources_file
+        if function_level:
+            self.program = self.config.python
+            self.p_args = [
+                RUNNER_SCRIPT,
+                *self.forkserver_args(),
+                *self.environment_args(),
+                "--resources",
+                self.config.resources_file,
+                "--function-level",
+                "-o",
+                self.config.function_stats,
+            ]
+        elif targets is not None or self.uses_runner():
+            self.program = self.config.python
+            self.p_args = self.runner_args(targets)
+        else:
+            self.program = self.config.kernprof
+            self.p_args = ["-l", "-o", self.config.stats]
+            self.usage_file = None
         if warmup:
             self.p_args.extend(["--setup", warmup])
         self.p_args.append(filename)
@@ -48,9 +380,135 @@ class KernprofRun(QtCore.QObject):
 
         return self.process
 
+    def uses_runner(self):
+        """Check if the configuration requires the profiling runner."""
+        config = self.config
+        return bool(
+            config.memory
+            or config.histograms
+            or config.cpu_time
+            or config.threads
+            or config.calls
+            or config.gc_time
+            or config.hits_only
+            or config.forkserver
+            or config.steady_function
+            or config.async_mode
+            or config.cpus
+            or config.nice
+            or config.disable_gc
+            or config.backend != BACKEND_KERNPROF
+        )
+
+    def runner_args(self, targets):
+        """Arguments of the profiling runner for line by line profiling."""
+        args = [
+            RUNNER_SCRIPT,
+            *self.forkserver_args(),
+            *self.environment_args(),
+            "--resources",
+            self.config.resources_file,
+            "-o",
+            self.config.stats,
+        ]
+        if self.config.backend != BACKEND_KERNPROF:
+            # kernprof is replaced by the built-in sys.settrace tracer
+            args.extend(["--backend", self.config.backend])
+        if self.config.backend == BACKEND_SAMPLING:
+            args.extend(["--interval", str(self.config.sampling_interval)])
+            if self.config.sampling_all_functions:
+                args.append("--all-functions")
+        if targets is not None:
+            with open(self.config.targets_file, "w", encoding="utf-8") as fid:
+                json.dump(targets, fid)
+            args.extend(["--targets", self.config.targets_file])
+        args.extend(self.options_args())
+        return args
+
+    def options_args(self):
+        args = []
+        if self.config.memory:
+            args.append("--memory")
+        if self.config.histograms:
+            args.append("--histograms")
+        if self.config.cpu_time:
+            args.append("--cpu-time")
+        if self.config.threads:
+            args.append("--threads")
+        if self.config.calls:
+            args.append("--calls")
+        if self.config.gc_time:
+            args.append("--gc-time")
+        if self.config.hits_only:
+            args.append("--hits-only")
+        if self.config.steady_function:
+            args.extend(
+                [
+                    "--steady-function",
+                    self.config.steady_function,
+                    "--steady-calls",
+                    str(self.config.steady_calls),
+                ]
+            )
+        if self.config.async_mode:
+            args.extend(
+                [
+                    "--asyncio",
+                    "--blocking-threshold",
+                    str(self.config.blocking_threshold),
+                ]
+            )
+        return args
+
+    def environment_args(self):
+        args = []
+        if self.config.cpus:
+            cpus = ",".join(str(cpu) for cpu in self.config.cpu_list)
+            args.extend(["--cpus", cpus])
+        if self.config.nice:
+            args.extend(["--nice", str(self.config.nice)])
+        if self.config.disable_gc:
+            args.append("--disable-gc")
+        return args
+
+    def check_environment(self):
+        """Describe the run, as known before it starts."""
+        environment = {}
+        if self.config.hash_seed is not None:
+            environment["hash_seed"] = str(self.config.hash_seed)
+        return environment
+
+    def check_idle(self):
+        """Check that the system was idle since the start was requested."""
+        usage = cpu_usage(self.idle_start_times)
+        self.environment["cpu_usage"] = usage
+        if usage is not None and usage > IDLE_THRESHOLD:
+            self.output_error.emit(
+                _(
+                    "WARNING: The system is not idle, {usage:.0%} of the CPU"
+                    " time is used: the timings may vary"
+                ).format(usage=usage)
+            )
+
+    def forkserver_args(self):
+        return self.forkserver.client_args() if self.config.forkserver else []
+
     def start(self):
+        """Start the process, once the system usage is measured if configured."""
+        self.idle_start_times = cpu_times() if self.config.idle_check else None
+        if self.idle_start_times is None:
+            self.start_process()
+        else:
+            # Measured while the event loop runs, so that the GUI is not blocked
+            self.idle_timer.start(IDLE_CHECK_INTERVAL)
+
+    @QtCore.Slot()
+    def start_process(self):
+        if self.config.idle_check:
+            self.check_idle()
+        self.resource_monitor.start(self.process, self.usage_file)
         self.process.start(
-            self.config.kernprof,
+            self.program,
             self.p_args,
             QtCore.QIODevice.ReadOnly | QtCore.QIODevice.Unbuffered,
         )
@@ -58,8 +516,13 @@ class KernprofRun(QtCore.QObject):
         linecache.checkcache()
 
         if not self.process.waitForStarted():
+            self.resource_monitor.stop()
             self.output_error.emit(_("ERROR: Process failed to start"))
 
+    @QtCore.Slot()
+    def process_finished(self):
+        self.resources = self.resource_monitor.stop()
+
     @QtCore.Slot()
     def read_output(self):
         qbytearray = self.process.readAllStandardOutput()
@@ -70,8 +533,19 @@ class KernprofRun(QtCore.QObject):
         qbytearray = self.process.readAllStandardError()
         self.output_error.emit(str(qbytearray, "utf-8"))
 
+    @property
+    def running(self):
+        return self.idle_timer.isActive() or (
+            self.process is not None
+            and self.process.state() != QtCore.QProcess.NotRunning
+        )
+
     @QtCore.Slot()
     def kill(self):
-        if self.process is not None and self.process.state() == QtCore.QProcess.Running:
+        if self.idle_timer.isActive():
+            # Not started yet, but finished as a killed process for the slots
+            self.idle_timer.stop()
+            self.process.finished.emit(-1, QtCore.QProcess.CrashExit)
+        elif self.running:
             self.process.kill()
             self.process.waitForFinished()
@@ -0,0 +1,700 @@
+"""Profiling of git revisions of the script, in temporary worktrees.
+
+Two revisions are profiled with the same configuration and their results are
+compared line by line, the lines being aligned on their code since the line
+numbers move between revisions. The bisect mode profiles the commits between a
+good and a bad revision to find the first commit where the time of a function
+grew beyond a threshold. Only the local git repository is used.
+"""
+
+import difflib
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+from PySide6 import QtCore, QtGui, QtWidgets
+from PySide6.QtCore import Qt
+
+from .utils import SortableTreeWidgetItem
+from .utils import translate as _
+
+DEFAULT_THRESHOLD = 20.0  # Percent slower than the good revision
+
+SLOWER_COLOR = QtGui.QColor.fromRgb(255, 0, 0, 160)
+FASTER_COLOR = QtGui.QColor.fromRgb(0, 200, 0, 160)
+# Relative time change highlighted in the comparison, if it is also a
+# significant fraction of the total time
+CHANGE_THRESHOLD = 0.05
+MIN_CHANGE_FRACTION = 0.01
+
+
+class RevisionError(Exception):
+    """A git command failed, or the script cannot be run at a revision."""
+
+
+def git(repo, *args):
+    """Run a local git command in ``repo`` and return its output."""
+    try:
+        result = subprocess.run(  # noqa: S603
+            ["git", *args],  # noqa: S607
+            cwd=repo,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except OSError as error:
+        raise RevisionError(str(error)) from error
+    except subprocess.CalledProcessError as error:
+        raise RevisionError(error.stderr.strip() or str(error)) from error
+    return result.stdout.strip()
+
+
+def git_toplevel(path):
+    """Root of the git repository containing ``path``."""
+    return os.path.normpath(git(path, "rev-parse", "--show-toplevel"))
+
+
+def resolve_commit(repo, ref):
+    """Return the ``(sha, subject)`` of a revision."""
+    sha, _sep, subject = git(repo, "log", "-1", "--format=%H%x00%s", ref).partition(
+        "\0"
+    )
+    return sha, subject
+
+
+def commit_range(repo, good, bad):
+    """Return the ``(sha, subject)`` of the good commit and the commits up to bad.
+
+    The first parents are followed, from the oldest to the newest commit.
+    """
+    commits = [resolve_commit(repo, good)]
+    output = git(
+        repo,
+        "log",
+        "--reverse",
+        "--first-parent",
+        "--format=%H%x00%s",
+        f"{commits[0][0]}..{bad}",
+    )
+    commits.extend(
+        tuple(line.partition("\0")[::2]) for line in output.splitlines() if line
+    )
+    return commits
+
+
+def add_worktree(repo, sha):
+    """Check out a commit in a new temporary worktree and return its path."""
+    path = tempfile.mkdtemp(prefix="lineprofilergui_", suffix="_worktree")
+    try:
+        git(repo, "worktree", "add", "--detach", path, sha)
+    except RevisionError:
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+    return path
+
+
+def remove_worktree(repo, path):
+    try:
+        git(repo, "worktree", "remove", "--force", path)
+    except RevisionError:
+        shutil.rmtree(path, ignore_errors=True)
+        git(repo, "worktree", "prune")
+
+
+def worktree_config(config, repo, worktree):
+    """Copy of the configuration running the files of the worktree.
+
+    The script, warmup script and working directory inside the repository are
+    moved to the worktree. The results are always saved in a temporary file.
+    """
+    wdir = Path(config.wdir)
+
+    def move(path):
+        if not path:
+            return path
+        absolute = Path(os.path.realpath(wdir / path))
+        try:
+            relative = absolute.relative_to(os.path.realpath(repo))
+        except ValueError:
+            return path
+        return os.fspath(Path(worktree) / relative)
+
+    copy = config.copy()
+    copy.config_wdir = move(os.fspath(wdir))
+    copy.script = move(config.script)
+    copy.warmup = move(config.warmup)
+    copy.stats_tmp = True
+    return copy
+
+
+def relative_filename(filename, root):
+    """Filename relative to the worktree, to match the functions of two revisions."""
+    try:
+        return os.fspath(Path(filename).relative_to(root))
+    except ValueError:
+        return filename
+
+
+def function_time(profile_data, name):
+    """Total time of the functions named ``name``, None if none was called."""
+    times = [
+        func_data.total_time
+        for func_data in profile_data
+        if func_data.name == name and func_data.was_called
+    ]
+    return sum(times) if times else None
+
+
+class LineDiff:
+    """A line of the two revisions, None if it is missing in one of them."""
+
+    def __init__(self, line_a, line_b):
+        self.line_a = line_a
+        self.line_b = line_b
+
+    @property
+    def code(self):
+        return (self.line_b or self.line_a).code
+
+    @property
+    def time_a(self):
+        return (self.line_a and self.line_a.total_time) or 0.0
+
+    @property
+    def time_b(self):
+        return (self.line_b and self.line_b.total_time) or 0.0
+
+
+class FunctionDiff:
+    """A function of the two revisions, with its lines aligned on their code."""
+
+    def __init__(self, name, filename, func_a, func_b):
+        self.name = name
+        self.filename = filename
+        self.func_a = func_a
+        self.func_b = func_b
+        self.time_a = func_a.total_time if func_a else 0.0
+        self.time_b = func_b.total_time if func_b else 0.0
+        self.lines = self.align_lines(
+            list(func_a or ()),
+            list(func_b or ()),
+        )
+
+    @staticmethod
+    def align_lines(lines_a, lines_b):
+        matcher = difflib.SequenceMatcher(
+            None,
+            [line.code.strip() for line in lines_a],
+            [line.code.strip() for line in lines_b],
+            autojunk=False,
+        )
+        lines = []
+        for tag, a_start, a_stop, b_start, b_stop in matcher.get_opcodes():
+            if tag == "equal":
+                lines.extend(
+                    LineDiff(line_a, line_b)
+                    for line_a, line_b in zip(
+                        lines_a[a_start:a_stop], lines_b[b_start:b_stop]
+                    )
+                )
+                continue
+            # A modified line is displayed as removed, then added
+            lines.extend(LineDiff(line_a, None) for line_a in lines_a[a_start:a_stop])
+            lines.extend(LineDiff(None, line_b) for line_b in lines_b[b_start:b_stop])
+        return lines
+
+
+def diff_profiles(profile_a, root_a, profile_b, root_b):
+    """Match the functions of two revisions by file and name, and align their lines."""
+    functions_a = {
+        (relative_filename(func.filename, root_a), func.name): func
+        for func in profile_a
+    }
+    functions_b = {
+        (relative_filename(func.filename, root_b), func.name): func
+        for func in profile_b
+    }
+    keys = list(functions_a) + [key for key in functions_b if key not in functions_a]
+    return [
+        FunctionDiff(key[1], key[0], functions_a.get(key), functions_b.get(key))
+        for key in keys
+    ]
+
+
+class RevisionRun(QtCore.QObject):
+    """Profile a commit of the script in a temporary worktree, through the run queue."""
+
+    finished = QtCore.Signal(object)
+
+    def __init__(self, repo, commit, config, add_job, parent=None):
+        super().__init__(parent)
+        self.repo = repo
+        self.sha, self.subject = commit
+        self.worktree = add_worktree(repo, self.sha)
+        job_config = worktree_config(config, repo, self.worktree)
+        if not job_config.isvalid:
+            self.remove()
+            raise RevisionError(
+                _("The script cannot be run at {sha}: {script}").format(
+                    sha=self.short_sha, script=job_config.script
+                )
+            )
+        label = _("{script} at {sha}").format(
+            script=os.path.basename(job_config.script), sha=self.short_sha
+        )
+        self.job = add_job(job_config, label)
+        self.job.finished.connect(self.job_finished)
+
+    @property
+    def short_sha(self):
+        return self.sha[:8]
+
+    @property
+    def profile_data(self):
+        return self.job.profile_data
+
+    @QtCore.Slot(object)
+    def job_finished(self, job):
+        # Connected after the run queue, so the results are already loaded
+        self.finished.emit(self)
+
+    def remove(self):
+        if self.worktree is not None:
+            remove_worktree(self.repo, self.worktree)
+            self.worktree = None
+
+
+class RevisionTask(QtCore.QObject):
+    """Base of the comparisons and bisects, which own their worktrees."""
+
+    finished = QtCore.Signal(object)
+
+    def __init__(self, repo, config, add_job, parent=None):
+        super().__init__(parent)
+        self.repo = repo
+        self.config = config
+        self.add_job = add_job
+        self.runs = []
+        self.error = None
+
+    def run(self, commit):
+        """Profile a commit, None if it could not be queued."""
+        try:
+            run = RevisionRun(self.repo, commit, self.config, self.add_job, self)
+        except RevisionError as error:
+            self.stop(str(error))
+            return None
+        self.runs.append(run)
+        run.finished.connect(self.run_finished)
+        return run
+
+    def stop(self, error=None):
+        self.error = error
+        self.finished.emit(self)
+
+    def cleanup(self):
+        """Remove the worktrees, once the sources are no longer needed."""
+        for run in self.runs:
+            try:
+                run.remove()
+            except RevisionError:
+                continue
+
+    @QtCore.Slot(object)
+    def run_finished(self, run):
+        raise NotImplementedError
+
+
+class RevisionComparison(RevisionTask):
+    """Profile two revisions and compare their results line by line."""
+
+    def __init__(  # noqa: PLR0913
+        self, repo, config, add_job, ref_a, ref_b, *, parent=None
+    ):
+        super().__init__(repo, config, add_job, parent)
+        self.refs = (ref_a, ref_b)
+        self.functions = []
+
+    def start(self):
+        try:
+            commits = [resolve_commit(self.repo, ref) for ref in self.refs]
+        except RevisionError as error:
+            self.stop(str(error))
+            return
+        for commit in commits:
+            if self.run(commit) is None:
+                return
+
+    @QtCore.Slot(object)
+    def run_finished(self, run):
+        if self.error is not None or not all(run.job.done for run in self.runs):
+            return
+        run_a, run_b = self.runs
+        if run_a.profile_data is None or run_b.profile_data is None:
+            self.stop(_("Both revisions must be profiled to be compared"))
+            return
+        self.functions = diff_profiles(
+            run_a.profile_data, run_a.worktree, run_b.profile_data, run_b.worktree
+        )
+        self.stop()
+
+
+class BisectStep:
+    def __init__(self, run, time, regressed):
+        self.sha = run.sha
+        self.short_sha = run.short_sha
+        self.subject = run.subject
+        self.time = time
+        self.regressed = regressed
+
+
+class RevisionBisect(RevisionTask):
+    """Find the first commit where the time of a function regressed.
+
+    The good revision gives the reference time, a commit regressed if the time
+    of the function is more than ``threshold`` percent above it.
+    """
+
+    step_finished = QtCore.Signal(object)
+
+    def __init__(  # noqa: PLR0913
+        self, repo, config, add_job, good, bad, *, function, threshold, parent=None
+    ):
+        super().__init__(repo, config, add_job, parent)
+        self.refs = (good, bad)
+        self.function = function
+        self.threshold = threshold
+        self.commits = []
+        self.steps = []
+        self.baseline = None
+        self.good = self.bad = None  # Indexes in commits
+        self.first_bad = None  # BisectStep
+
+    def start(self):
+        try:
+            self.commits = commit_range(self.repo, *self.refs)
+        except RevisionError as error:
+            self.stop(str(error))
+            return
+        if len(self.commits) < 2:
+            self.stop(_("No commit between the good and the bad revisions"))
+            return
+        self.good, self.bad = 0, len(self.commits) - 1
+        self.run(self.commits[0])
+
+    @property
+    def remaining_steps(self):
+        """Number of commits still to profile, at most."""
+        if self.baseline is None:
+            return (self.bad - self.good).bit_length() + 1
+        return max(0, (self.bad - self.good - 1).bit_length())
+
+    def index(self, run):
+        return next(
+            index
+            for index, (sha, _subject) in enumerate(self.commits)
+            if sha == run.sha
+        )
+
+    @QtCore.Slot(object)
+    def run_finished(self, run):
+        if run.profile_data is None:
+            self.stop(_("No profiling results at {sha}").format(sha=run.short_sha))
+            return
+        time = function_time(run.profile_data, self.function)
+        if time is None:
+            self.stop(
+                _("The function {function} was not profiled at {sha}").format(
+                    function=self.function, sha=run.short_sha
+                )
+            )
+            return
+        index = self.index(run)
+        if index == 0:
+            self.baseline = time
+            regressed = False
+        else:
+            regressed = time > self.baseline * (1 + self.threshold / 100)
+        step = BisectStep(run, time, regressed)
+        self.steps.append(step)
+        self.step_finished.emit(step)
+
+        if index == 0:
+            # The bad revision must be slower, to bisect
+            self.run(self.commits[self.bad])
+            return
+        if index == len(self.commits) - 1 and not regressed:
+            self.stop(
+                _("No regression of {function} beyond {threshold}%").format(
+                    function=self.function, threshold=self.threshold
+                )
+            )
+            return
+        if regressed:
+            self.bad = index
+            self.first_bad = step
+        else:
+            self.good = index
+        if self.bad - self.good > 1:
+            self.run(self.commits[(self.good + self.bad) // 2])
+        else:
+            self.stop()
+
+
+class RevisionsWidget(QtWidgets.QWidget):
+    """Display the comparison of two revisions, or the steps of a bisect."""
+
+    COL_NAME = 0
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setup_ui()
+
+    def setup_ui(self):
+        self.verticalLayout = QtWidgets.QVBoxLayout(self)
+        self.verticalLayout.setContentsMargins(0, 0, 0, 0)
+        self.summaryLabel = QtWidgets.QLabel(self)
+        self.summaryLabel.setWordWrap(True)
+        self.summaryLabel.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.verticalLayout.addWidget(self.summaryLabel)
+        self.revisionsTree = QtWidgets.QTreeWidget(self)
+        self.revisionsTree.setObjectName("revisionsTree")
+        self.revisionsTree.setFrameShape(QtWidgets.QFrame.NoFrame)
+        self.revisionsTree.setUniformRowHeights(True)
+        self.verticalLayout.addWidget(self.revisionsTree)
+        self.retranslate_ui()
+
+    def retranslate_ui(self):
+        self.summaryLabel.setText(
+            _("Compare the line timings of two git revisions of the script")
+        )
+
+    @staticmethod
+    def set_time(item, col, value):
+        item.setText(col, f"{value * 1e3:.3f}")
+        item.setData(col, item.SORT_ROLE, value)
+        item.setTextAlignment(col, Qt.AlignRight)
+
+    def set_change(self, item, col, time_a, time_b, total_time):
+        self.set_time(item, col, time_b - time_a)
+        if time_a:
+            ratio = time_b / time_a
+            item.setText(col + 1, f"{ratio:.2f}")
+            item.setData(col + 1, item.SORT_ROLE, ratio)
+            item.setTextAlignment(col + 1, Qt.AlignRight)
+        change = abs(time_b - time_a)
+        if (
+            change > CHANGE_THRESHOLD * max(time_a, time_b)
+            and change >= MIN_CHANGE_FRACTION * total_time
+        ):
+            color = SLOWER_COLOR if time_b > time_a else FASTER_COLOR
+            item.setBackground(col, color)
+
+    def set_comparison(self, comparison):
+        """Display the functions and lines of two revisions side by side."""
+        run_a, run_b = comparison.runs
+        headers = [
+            _("Function / Code"),
+            _("Line {sha}").format(sha=run_a.short_sha),
+            _("Line {sha}").format(sha=run_b.short_sha),
+            _("Time {sha} (ms)").format(sha=run_a.short_sha),
+            _("Time {sha} (ms)").format(sha=run_b.short_sha),
+            _("Change (ms)"),
+            _("Ratio"),
+        ]
+        total_a = sum(func_diff.time_a for func_diff in comparison.functions)
+        total_b = sum(func_diff.time_b for func_diff in comparison.functions)
+        total_time = max(total_a, total_b)
+        tree = self.revisionsTree
+        tree.clear()
+        tree.setColumnCount(len(headers))
+        tree.setHeaderLabels(headers)
+        tree.setSortingEnabled(False)
+        for func_diff in comparison.functions:
+            func_item = SortableTreeWidgetItem(tree)
+            func_item.setText(self.COL_NAME, func_diff.name)
+            func_item.setToolTip(self.COL_NAME, func_diff.filename)
+            self.set_time(func_item, 3, func_diff.time_a)
+            self.set_time(func_item, 4, func_diff.time_b)
+            self.set_change(
+                func_item, 5, func_diff.time_a, func_diff.time_b, total_time
+            )
+            for line_diff in func_diff.lines:
+                line_item = SortableTreeWidgetItem(func_item)
+                line_item.setText(self.COL_NAME, line_diff.code.strip())
+                for col, line in ((1, line_diff.line_a), (2, line_diff.line_b)):
+                    if line is not None:
+                        line_item.setText(col, str(line.line_no))
+                        line_item.setData(col, line_item.SORT_ROLE, line.line_no)
+                if line_diff.line_a is None or line_diff.line_b is None:
+                    # Added or removed line
+                    font = line_item.font(self.COL_NAME)
+                    font.setItalic(True)
+                    line_item.setFont(self.COL_NAME, font)
+                self.set_time(line_item, 3, line_diff.time_a)
+                self.set_time(line_item, 4, line_diff.time_b)
+                self.set_change(
+                    line_item, 5, line_diff.time_a, line_diff.time_b, total_time
+                )
+            func_item.setExpanded(True)
+        tree.setSortingEnabled(True)
+        tree.sortByColumn(5, Qt.DescendingOrder)
+        for col in range(tree.columnCount()):
+            tree.resizeColumnToContents(col)
+        self.summaryLabel.setText(
+            _(
+                "{sha_b} ({subject_b}) compared to {sha_a} ({subject_a}):"
+                " {total_b:.3f} ms instead of {total_a:.3f} ms"
+            ).format(
+                sha_a=run_a.short_sha,
+                subject_a=run_a.subject,
+                sha_b=run_b.short_sha,
+                subject_b=run_b.subject,
+                total_a=total_a * 1e3,
+                total_b=total_b * 1e3,
+            )
+        )
+
+    def set_bisect(self, bisect):
+        headers = [_("Commit"), _("Subject"), _("Time (ms)"), _("Verdict")]
+        tree = self.revisionsTree
+        tree.clear()
+        tree.setSortingEnabled(False)
+        tree.setColumnCount(len(headers))
+        tree.setHeaderLabels(headers)
+        self.update_bisect(bisect)
+
+    def add_bisect_step(self, bisect, step):
+        item = SortableTreeWidgetItem(self.revisionsTree)
+        item.setText(0, step.short_sha)
+        item.setToolTip(0, step.sha)
+        item.setText(1, step.subject)
+        self.set_time(item, 2, step.time)
+        if step is bisect.steps[0]:
+            item.setText(3, _("reference"))
+        else:
+            item.setText(3, _("regressed") if step.regressed else _("good"))
+            item.setBackground(3, SLOWER_COLOR if step.regressed else FASTER_COLOR)
+        for col in range(self.revisionsTree.columnCount()):
+            self.revisionsTree.resizeColumnToContents(col)
+        self.update_bisect(bisect)
+
+    def update_bisect(self, bisect):
+        if bisect.error is not None:
+            text = bisect.error
+        elif bisect.first_bad is not None and bisect.bad - bisect.good <= 1:
+            step = bisect.first_bad
+            text = _(
+                "First commit where {function} regressed: {sha} ({subject}),"
+                " {time:.3f} ms instead of {baseline:.3f} ms"
+            ).format(
+                function=bisect.function,
+                sha=step.short_sha,
+                subject=step.subject,
+                time=step.time * 1e3,
+                baseline=bisect.baseline * 1e3,
+            )
+        else:
+            text = _(
+                "Bisecting {count} commits for a regression of {function} beyond"
+                " {threshold}%, at most {steps} runs left"
+            ).format(
+                count=len(bisect.commits) - 1,
+                function=bisect.function,
+                threshold=bisect.threshold,
+                steps=bisect.remaining_steps,
+            )
+        self.summaryLabel.setText(text)
+
+
+class UiRevisionsDialog(QtWidgets.QDialog):
+    """Select the revisions to compare, or to bisect."""
+
+    def __init__(self, parent, repo, functions=()):
+        super().__init__(parent)
+        self.repo = repo
+        self.setup_ui()
+        self.refAWidget.setText("HEAD~1")
+        self.refBWidget.setText("HEAD")
+        self.functionCombo.addItems(sorted(set(functions)))
+        self.thresholdSpinBox.setValue(DEFAULT_THRESHOLD)
+
+    def setup_ui(self):
+        self.setModal(True)
+        self.formLayout = QtWidgets.QFormLayout(self)
+        self.repoLabel = QtWidgets.QLabel(self)
+        self.repoWidget = QtWidgets.QLabel(self.repo, self)
+        self.formLayout.addRow(self.repoLabel, self.repoWidget)
+        self.refALabel = QtWidgets.QLabel(self)
+        self.refAWidget = QtWidgets.QLineEdit(self)
+        self.formLayout.addRow(self.refALabel, self.refAWidget)
+        self.refBLabel = QtWidgets.QLabel(self)
+        self.refBWidget = QtWidgets.QLineEdit(self)
+        self.formLayout.addRow(self.refBLabel, self.refBWidget)
+
+        self.bisectGroupBox = QtWidgets.QGroupBox(self)
+        self.bisectGroupBox.setObjectName("bisectGroupBox")
+        self.bisectGroupBox.setCheckable(True)
+        self.bisectGroupBox.setChecked(False)
+        self.bisectLayout = QtWidgets.QFormLayout(self.bisectGroupBox)
+        self.functionLabel = QtWidgets.QLabel(self.bisectGroupBox)
+        self.functionCombo = QtWidgets.QComboBox(self.bisectGroupBox)
+        self.functionCombo.setEditable(True)
+        self.bisectLayout.addRow(self.functionLabel, self.functionCombo)
+        self.thresholdLabel = QtWidgets.QLabel(self.bisectGroupBox)
+        self.thresholdSpinBox = QtWidgets.QDoubleSpinBox(self.bisectGroupBox)
+        self.thresholdSpinBox.setRange(1, 1000)
+        self.thresholdSpinBox.setDecimals(0)
+        self.thresholdSpinBox.setSuffix(" %")
+        self.bisectLayout.addRow(self.thresholdLabel, self.thresholdSpinBox)
+        self.formLayout.addRow(self.bisectGroupBox)
+
+        self.buttonBox = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel, self
+        )
+        self.formLayout.addRow(self.buttonBox)
+        self.buttonBox.accepted.connect(self.accept)
+        self.buttonBox.rejected.connect(self.reject)
+        self.retranslate_ui()
+        QtCore.QMetaObject.connectSlotsByName(self)
+
+    def retranslate_ui(self):
+        self.setWindowTitle(_("Line Profiler GUI - Compare git revisions"))
+        self.repoLabel.setText(_("Repository"))
+        self.bisectGroupBox.setTitle(_("Bisect a regression"))
+        self.bisectGroupBox.setToolTip(
+            _(
+                "Profile the commits between the two revisions to find the first"
+                " one where the time of the function regressed"
+            )
+        )
+        self.functionLabel.setText(_("Function"))
+        self.thresholdLabel.setText(_("Slower by more than"))
+        self.update_labels()
+
+    def update_labels(self):
+        if self.bisectGroupBox.isChecked():
+            self.refALabel.setText(_("Good revision"))
+            self.refBLabel.setText(_("Bad revision"))
+        else:
+            self.refALabel.setText(_("Revision A"))
+            self.refBLabel.setText(_("Revision B"))
+
+    @QtCore.Slot(bool)
+    def on_bisectGroupBox_toggled(self, checked):
+        self.update_labels()
+
+    @property
+    def bisect(self):
+        return self.bisectGroupBox.isChecked()
+
+    def refs(self):
+        return self.refAWidget.text().strip(), self.refBWidget.text().strip()
+
+    def function(self):
+        return self.functionCombo.currentText().strip()
+
+    def threshold(self):
+        return self.thresholdSpinBox.value()
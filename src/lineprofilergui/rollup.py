@@ -0,0 +1,186 @@
+"""Rollup of the line profiler results by package and module.
+
+The time of each function is summed into its module (source file) and each of
+the packages (directories) containing it, so that the part of a large code
+base which dominates is visible at a glance.
+"""
+
+import os
+
+from PySide6 import QtCore, QtWidgets
+from PySide6.QtCore import Qt
+
+from .utils import SortableTreeWidgetItem
+from .utils import translate as _
+
+KIND_PACKAGE = "package"
+KIND_MODULE = "module"
+KIND_FUNCTION = "function"
+KIND_LINE = "line"
+
+
+class RollupNode:
+    """Aggregated time of a package, module, function or line."""
+
+    def __init__(self, kind, name, key=None):
+        self.kind = kind
+        self.name = name
+        # func_id of the functions, (filename, line_no) of the lines
+        self.key = key
+        self.total_time = 0.0
+        self.functions = 0
+        # Keyed by name, or by the first line of the functions
+        self.children = {}
+
+    def child(self, kind, name, key=None, node_id=None):
+        if node_id is None:
+            node_id = name
+        node = self.children.get(node_id)
+        if node is None:
+            node = self.children[node_id] = RollupNode(kind, name, key)
+        return node
+
+
+def package_parts(filename, root):
+    """Directories of ``filename`` below ``root``, and the module name."""
+    relative = os.path.relpath(filename, root)
+    *packages, module = relative.split(os.sep)
+    return packages, module
+
+
+def build_rollup(profile_data):
+    """Aggregate the times of all the levels in a single pass over the results."""
+    root = RollupNode(KIND_PACKAGE, "")
+    functions = [func_data for func_data in profile_data or () if func_data.was_called]
+    if not functions:
+        return root
+    common_dir = os.path.commonpath(
+        [os.path.dirname(os.path.abspath(func.filename)) for func in functions]
+    )
+    for func_data in functions:
+        packages, module = package_parts(
+            os.path.abspath(func_data.filename), common_dir
+        )
+        path = [root]
+        for package in packages:
+            path.append(path[-1].child(KIND_PACKAGE, package))
+        path.append(path[-1].child(KIND_MODULE, module, func_data.filename))
+        # The functions of a module can share a name (methods, redefinitions)
+        func_node = path[-1].child(
+            KIND_FUNCTION,
+            func_data.name,
+            func_data.func_id,
+            node_id=func_data.start_line_no,
+        )
+        for node in (*path, func_node):
+            node.total_time += func_data.total_time
+            node.functions += 1
+        for line_data in func_data:
+            if line_data.total_time:
+                line_node = func_node.child(
+                    KIND_LINE,
+                    line_data.line_no,
+                    (line_data.filename, line_data.line_no),
+                )
+                line_node.total_time = line_data.total_time
+                line_node.name = f"{line_data.line_no}: {line_data.code.strip()}"
+    return root
+
+
+class RollupWidget(QtWidgets.QTreeWidget):
+    """Display the time of each package, module, function and line."""
+
+    function_activated = QtCore.Signal(object)
+    line_activated = QtCore.Signal(str, int)
+
+    column_header_text = [
+        _("Name"),
+        _("Time (ms)"),
+        _("% Time"),
+        _("Functions"),
+    ]
+    COL_NAME = 0
+    COL_TIME = 1
+    COL_PERCENT = 2
+    COL_FUNCTIONS = 3
+
+    KIND_ROLE = Qt.UserRole + 1
+    KEY_ROLE = Qt.UserRole + 2
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.profile_data = None
+        self.populated = True
+        self.setup_ui()
+
+    def setup_ui(self):
+        self.setColumnCount(len(self.column_header_text))
+        self.setHeaderLabels(self.column_header_text)
+        self.setUniformRowHeights(True)
+        self.setSortingEnabled(True)
+        self.itemActivated.connect(self.item_activated)
+
+    def set_profile_data(self, profile_data):
+        """Display the rollup of the results, once the widget is visible."""
+        self.profile_data = profile_data
+        self.populated = False
+        if self.isVisible():
+            self.populate()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.populated:
+            self.populate()
+
+    def populate(self):
+        self.populated = True
+        self.clear()
+        root = build_rollup(self.profile_data)
+        self.setSortingEnabled(False)
+        for node in root.children.values():
+            self.add_node(self.invisibleRootItem(), node, root.total_time)
+        self.setSortingEnabled(True)
+        self.sortByColumn(self.COL_TIME, Qt.DescendingOrder)
+        # Packages and modules are expanded, functions are collapsed
+        for item in self.iter_items():
+            item.setExpanded(
+                item.data(self.COL_NAME, self.KIND_ROLE) in (KIND_PACKAGE, KIND_MODULE)
+            )
+        for col in range(self.columnCount()):
+            self.resizeColumnToContents(col)
+
+    def add_node(self, parent_item, node, total_time):
+        item = SortableTreeWidgetItem(parent_item)
+        item.setData(self.COL_NAME, Qt.DisplayRole, node.name)
+        item.setData(self.COL_NAME, self.KIND_ROLE, node.kind)
+        item.setData(self.COL_NAME, self.KEY_ROLE, node.key)
+        if node.kind == KIND_MODULE:
+            item.setToolTip(self.COL_NAME, node.key)
+        item.setData(self.COL_TIME, Qt.DisplayRole, f"{node.total_time * 1e3:.3f}")
+        item.setData(self.COL_TIME, item.SORT_ROLE, node.total_time)
+        percent = 100 * node.total_time / total_time if total_time else 0.0
+        item.setData(self.COL_PERCENT, Qt.DisplayRole, f"{percent:.1f}")
+        item.setData(self.COL_PERCENT, item.SORT_ROLE, node.total_time)
+        if node.kind != KIND_LINE:
+            item.setData(self.COL_FUNCTIONS, Qt.DisplayRole, str(node.functions))
+            item.setData(self.COL_FUNCTIONS, item.SORT_ROLE, node.functions)
+        for col in (self.COL_TIME, self.COL_PERCENT, self.COL_FUNCTIONS):
+            item.setTextAlignment(col, Qt.AlignRight)
+        for child in node.children.values():
+            self.add_node(item, child, total_time)
+        return item
+
+    def iter_items(self):
+        iterator = QtWidgets.QTreeWidgetItemIterator(self)
+        while iterator.value():
+            yield iterator.value()
+            iterator += 1
+
+    @QtCore.Slot(QtWidgets.QTreeWidgetItem)
+    def item_activated(self, item):
+        kind = item.data(self.COL_NAME, self.KIND_ROLE)
+        key = item.data(self.COL_NAME, self.KEY_ROLE)
+        if kind == KIND_FUNCTION:
+            self.function_activated.emit(key)
+        elif kind == KIND_LINE:
+            self.line_activated.emit(*key)
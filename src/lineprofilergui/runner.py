@@ -0,0 +1,1642 @@
+"""Run and profile a python script, as ``kernprof`` does.
+
+This runner is used for the profiling modes which are not available with
+``kernprof``. It is executed as a script by the python interpreter of the
+profiled code, so it must only depend on the standard library, and on the
+``options`` module next to it, and stay compatible with all the supported
+python versions.
+
+The line by line results are saved with the same layout as ``kernprof -l``
+(see ``tree.load_profile_data()``) in a ``types.SimpleNamespace``, so that
+they can be loaded without this module.
+
+On POSIX systems, the runner can also be started as a fork server with
+``--serve``, which preloads modules once and forks a child for each run
+requested by a runner started with ``--connect``.
+"""
+
+import argparse
+import array
+import builtins
+import collections
+import contextlib
+import functools
+import gc
+import importlib
+import inspect
+import json
+import os
+import pickle
+import platform
+import select
+import signal
+import socket
+import struct
+import sys
+import sysconfig
+import threading
+import time
+import traceback
+import tracemalloc
+import types
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+if __package__:
+    from .options import (
+        BACKEND_MONITORING,
+        BACKEND_SAMPLING,
+        BACKEND_SETTRACE,
+        DEFAULT_BLOCKING_THRESHOLD,
+        DEFAULT_SAMPLING_INTERVAL,
+        OPTION_CONFLICTS,
+        SETTRACE_OPTIONS,
+        parse_cpus,
+    )
+else:
+    # Executed as a script: the options module is next to this file, and is
+    # forgotten once imported so that it cannot shadow a profiled module
+    from options import (
+        BACKEND_MONITORING,
+        BACKEND_SAMPLING,
+        BACKEND_SETTRACE,
+        DEFAULT_BLOCKING_THRESHOLD,
+        DEFAULT_SAMPLING_INTERVAL,
+        OPTION_CONFLICTS,
+        SETTRACE_OPTIONS,
+        parse_cpus,
+    )
+
+    del sys.modules["options"]
+
+SUSPENDABLE_CODE_FLAGS = (
+    inspect.CO_COROUTINE
+    | inspect.CO_ITERABLE_COROUTINE
+    | inspect.CO_ASYNC_GENERATOR
+    | inspect.CO_GENERATOR
+)
+
+# Latency histograms have 2**HISTOGRAM_SUB_BITS buckets per power of 2
+HISTOGRAM_SUB_BITS = 2
+HISTOGRAM_SUB_MASK = (1 << HISTOGRAM_SUB_BITS) - 1
+
+
+def histogram_bucket(duration):
+    """Index of the logarithmic bucket of an integer duration.
+
+    The durations are exact below ``2 ** (HISTOGRAM_SUB_BITS + 1)`` timer
+    units, then the relative width of the buckets is at most
+    ``2 ** -HISTOGRAM_SUB_BITS``.
+    """
+    bits = duration.bit_length()
+    if bits <= HISTOGRAM_SUB_BITS + 1:
+        return duration
+    shift = bits - HISTOGRAM_SUB_BITS - 1
+    return ((shift + 1) << HISTOGRAM_SUB_BITS) + (
+        (duration >> shift) & HISTOGRAM_SUB_MASK
+    )
+
+
+def histogram_bucket_bounds(bucket):
+    """Lower (included) and upper (excluded) bounds of a histogram bucket."""
+    if bucket < 2 << HISTOGRAM_SUB_BITS:
+        return bucket, bucket + 1
+    shift = (bucket >> HISTOGRAM_SUB_BITS) - 1
+    mantissa = (1 << HISTOGRAM_SUB_BITS) + (bucket & HISTOGRAM_SUB_MASK)
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+class LineProfiler:
+    """Line by line profiler based on ``sys.settrace``.
+
+    The profiled functions are either decorated with ``@profile``, or given as
+    targets identified by their ``(filename, first line, name)``.
+    """
+
+    unit = 1e-9
+    stats_factory = dict
+
+    def __init__(self, targets=()):
+        self.targets = {tuple(target) for target in targets}
+        self.code_stats = {}  # {code: {line_no: [hits, time]}}
+        self.ignored_codes = set()
+        self.timer = time.perf_counter_ns
+        # Description of the run environment, saved with the stats
+        self.environment = None
+        # Garbage collections recorder with the gc time option, see GcRecorder
+        self.gc_recorder = None
+
+    def __call__(self, func):
+        """Decorate a function to profile it."""
+        self.add_function(func)
+        return func
+
+    def add_function(self, func):
+        code = getattr(func, "__code__", None)
+        if code is not None:
+            self.code_stats.setdefault(code, self.stats_factory())
+
+    def enable(self):
+        threading.settrace(self.trace_call)
+        sys.settrace(self.trace_call)
+
+    def disable(self):
+        sys.settrace(None)
+        threading.settrace(None)
+
+    def code_stats_for(self, code):
+        """Return the stats of a code object, or None if it is not profiled."""
+        stats = self.code_stats.get(code)
+        if stats is not None or code in self.ignored_codes:
+            return stats
+        if self.is_target(code):
+            stats = self.code_stats[code] = self.stats_factory()
+        else:
+            self.ignored_codes.add(code)
+        return stats
+
+    def is_target(self, code):
+        return (code.co_filename, code.co_firstlineno, code.co_name) in self.targets
+
+    def reset(self):
+        """Discard the stats collected so far, e.g. during the warm-up.
+
+        Can be called from the profiled script as ``profile.reset()``. The
+        stats are cleared in place, since the running tracers hold them.
+        """
+        for stats in self.code_stats.values():
+            stats.clear()
+        if self.gc_recorder is not None:
+            self.gc_recorder.reset()
+
+    def trace_call(self, frame, event, arg):
+        stats = self.frame_stats(frame)
+        if stats is None:
+            return None
+        return self.line_tracer(stats)
+
+    def frame_stats(self, frame):
+        """Return the stats recording the lines of a frame, or None."""
+        return self.code_stats_for(frame.f_code)
+
+    def line_tracer(self, stats):
+        """Create the local trace function of a profiled frame."""
+        timer = self.timer
+        last_line = None
+        last_time = 0
+
+        def trace_line(frame, event, arg):  # noqa: ARG001
+            nonlocal last_line, last_time
+            if event not in ("line", "return"):
+                return trace_line
+            now = timer()
+            if last_line is not None:
+                line_stats = stats.get(last_line)
+                if line_stats is None:
+                    stats[last_line] = [1, now - last_time]
+                else:
+                    line_stats[0] += 1
+                    line_stats[1] += now - last_time
+            if event == "line":
+                last_line = frame.f_lineno
+                last_time = timer()
+            else:
+                last_line = None
+            return trace_line
+
+        return trace_line
+
+    def iter_code_stats(self):
+        """Iterate over the ``(code, stats)`` of the profiled functions."""
+        return self.code_stats.items()
+
+    def merged_stats(self, code_stats=None):
+        """Return the sorted ``(line_no, line_stats)`` of each function key."""
+        if code_stats is None:
+            code_stats = self.iter_code_stats()
+        else:
+            code_stats = code_stats.items()
+        merged_stats = {}
+        for code, stats in code_stats:
+            # Several code objects can share the same key if a module is reloaded
+            key = (code.co_filename, code.co_firstlineno, code.co_name)
+            merged = merged_stats.setdefault(key, {})
+            for line_no, line_stats in stats.items():
+                old_stats = merged.get(line_no)
+                if old_stats is None:
+                    merged[line_no] = list(line_stats)
+                else:
+                    merged[line_no] = self.merge_line_stats(old_stats, line_stats)
+        return {key: sorted(merged.items()) for key, merged in merged_stats.items()}
+
+    def merge_line_stats(self, stats1, stats2):
+        return [a + b for a, b in zip(stats1, stats2)]
+
+    def get_timings(self, code_stats=None):
+        return {
+            key: [
+                (line_no, line_stats[0], line_stats[1]) for line_no, line_stats in lines
+            ]
+            for key, lines in self.merged_stats(code_stats).items()
+        }
+
+    def get_stats(self):
+        return types.SimpleNamespace(timings=self.get_timings(), unit=self.unit)
+
+    def dump_stats(self, filename):
+        stats = self.get_stats()
+        if self.environment is not None:
+            stats.environment = self.environment
+        if self.gc_recorder is not None:
+            # Separated from the timings to keep the layout of kernprof results
+            stats.gc = self.gc_recorder.get_stats()
+        with open(filename, "wb") as fid:
+            pickle.dump(stats, fid, pickle.HIGHEST_PROTOCOL)
+
+
+class MonitoringLineProfiler(LineProfiler):
+    """Line by line profiler based on ``sys.monitoring`` (PEP 669, python >= 3.12).
+
+    Only the start of the functions is monitored globally. These events are
+    disabled for the code objects which are not profiled, and the line events
+    are enabled locally for the profiled ones, so that the rest of the code
+    runs without any overhead.
+    """
+
+    def __init__(self, targets=()):
+        super().__init__(targets)
+        self.monitored_codes = set()
+        self.local = threading.local()
+
+    def callbacks(self):
+        events = sys.monitoring.events
+        return {
+            events.PY_START: self.start_frame,
+            events.PY_RESUME: self.start_frame,
+            events.PY_THROW: self.throw_frame,
+            events.LINE: self.line,
+            events.PY_RETURN: self.stop_frame,
+            events.PY_YIELD: self.stop_frame,
+            events.PY_UNWIND: self.stop_frame,
+        }
+
+    def global_events(self):
+        events = sys.monitoring.events
+        return events.PY_START | events.PY_RESUME | events.PY_THROW | events.PY_UNWIND
+
+    def local_events(self):
+        """Events enabled for the profiled code objects only."""
+        events = sys.monitoring.events
+        return events.LINE | events.PY_RETURN | events.PY_YIELD
+
+    def enable(self):
+        monitoring = sys.monitoring
+        self.tool_id = monitoring.PROFILER_ID
+        monitoring.use_tool_id(self.tool_id, "lineprofilergui")
+        for event, callback in self.callbacks().items():
+            monitoring.register_callback(self.tool_id, event, callback)
+        monitoring.set_events(self.tool_id, self.global_events())
+
+    def monitor_code(self, code):
+        if code not in self.monitored_codes:
+            sys.monitoring.set_local_events(self.tool_id, code, self.local_events())
+            self.monitored_codes.add(code)
+
+    def disable(self):
+        monitoring = sys.monitoring
+        monitoring.set_events(self.tool_id, monitoring.events.NO_EVENTS)
+        for code in self.monitored_codes:
+            monitoring.set_local_events(self.tool_id, code, monitoring.events.NO_EVENTS)
+        monitoring.free_tool_id(self.tool_id)
+
+    def frames(self):
+        """Stack of the profiled frames running in the current thread."""
+        try:
+            return self.local.frames
+        except AttributeError:
+            frames = self.local.frames = []
+            return frames
+
+    def start_frame(self, code, instruction_offset):
+        stats = self.code_stats_for(code)
+        if stats is None:
+            return sys.monitoring.DISABLE
+        self.push_frame(code, stats)
+        return None
+
+    def throw_frame(self, code, instruction_offset, exception):
+        # A generator resumed by throw(): the event cannot be disabled
+        stats = self.code_stats_for(code)
+        if stats is not None:
+            self.push_frame(code, stats)
+
+    def push_frame(self, code, stats):
+        self.monitor_code(code)
+        # [code, stats, last line, last time]
+        self.frames().append([code, stats, None, 0])
+
+    def line(self, code, line_no):
+        now = self.timer()
+        frames = getattr(self.local, "frames", None)
+        if not frames or frames[-1][0] is not code:
+            # The frame was started before the profiler, or in another way
+            # than the monitored events
+            return
+        frame = frames[-1]
+        last_line = frame[2]
+        if last_line is not None:
+            stats = frame[1]
+            line_stats = stats.get(last_line)
+            if line_stats is None:
+                stats[last_line] = [1, now - frame[3]]
+            else:
+                line_stats[0] += 1
+                line_stats[1] += now - frame[3]
+        frame[2] = line_no
+        frame[3] = self.timer()
+
+    def stop_frame(self, code, instruction_offset, value):
+        now = self.timer()
+        frames = self.frames()
+        if not frames or frames[-1][0] is not code:
+            # Unwinding of a function which is not profiled
+            return
+        _code, stats, last_line, last_time = frames.pop()
+        if last_line is not None:
+            line_stats = stats.get(last_line)
+            if line_stats is None:
+                stats[last_line] = [1, now - last_time]
+            else:
+                line_stats[0] += 1
+                line_stats[1] += now - last_time
+
+
+class HitsOnlyMixin:
+    """Only count the hits of each line, without timing, for minimal overhead.
+
+    The stats of each code object are ``{line_no: hits}``.
+    """
+
+    stats_factory = staticmethod(functools.partial(collections.defaultdict, int))
+
+    def get_stats(self):
+        merged_stats = {}
+        for code, stats in self.code_stats.items():
+            key = (code.co_filename, code.co_firstlineno, code.co_name)
+            merged = merged_stats.setdefault(key, {})
+            for line_no, hits in stats.items():
+                merged[line_no] = merged.get(line_no, 0) + hits
+        timings = {
+            key: [(line_no, hits, 0) for line_no, hits in sorted(merged.items())]
+            for key, merged in merged_stats.items()
+        }
+        return types.SimpleNamespace(timings=timings, unit=self.unit, hits_only=True)
+
+
+class HitsLineProfiler(HitsOnlyMixin, LineProfiler):
+    """Count the line hits with ``sys.settrace``."""
+
+    def line_tracer(self, stats):
+        def trace_line(frame, event, arg):  # noqa: ARG001
+            if event == "line":
+                stats[frame.f_lineno] += 1
+            return trace_line
+
+        return trace_line
+
+
+class HitsMonitoringLineProfiler(HitsOnlyMixin, MonitoringLineProfiler):
+    """Count the line hits with ``sys.monitoring``.
+
+    No frame is tracked: the start of each function is only monitored until
+    the line events are enabled for it, or forever disabled if not profiled.
+    """
+
+    def callbacks(self):
+        events = sys.monitoring.events
+        code_stats = self.code_stats
+
+        def count_line(code, line_no):
+            code_stats[code][line_no] += 1
+
+        return {events.PY_START: self.start_code, events.LINE: count_line}
+
+    def global_events(self):
+        return sys.monitoring.events.PY_START
+
+    def local_events(self):
+        return sys.monitoring.events.LINE
+
+    def start_code(self, code, instruction_offset):
+        if self.code_stats_for(code) is not None:
+            self.monitor_code(code)
+        return sys.monitoring.DISABLE
+
+
+def normalized_path(filename):
+    """Absolute path of a file, comparable with the library paths."""
+    return os.path.normcase(os.path.abspath(filename))
+
+
+def library_paths(names=("stdlib", "platstdlib", "purelib", "platlib")):
+    """Directories of the standard library and of the installed packages."""
+    paths = sysconfig.get_paths()
+    return tuple(normalized_path(paths[name]) for name in names if name in paths)
+
+
+class SamplingProfiler(LineProfiler):
+    """Statistical line profiler, which samples the stacks of all the threads.
+
+    A background thread periodically looks at the line executed by each frame
+    of the other threads. The time elapsed since the previous sample is
+    attributed to these lines, for the profiled functions, or for all the
+    functions outside of the python installation with ``all_functions``. The
+    hits are the number of samples.
+    """
+
+    def __init__(
+        self, targets=(), interval=DEFAULT_SAMPLING_INTERVAL, all_functions=False
+    ):
+        super().__init__(targets)
+        self.interval = interval / 1000
+        self.all_functions = all_functions
+        self.excluded_paths = library_paths()
+        self.stop_event = threading.Event()
+        self.sampler = None
+        self.switch_interval = None
+
+    def is_target(self, code):
+        if super().is_target(code):
+            return True
+        if not self.all_functions or code.co_name.startswith("<"):
+            return False
+        filename = code.co_filename
+        if filename.startswith("<") or filename == __file__:
+            return False
+        return not normalized_path(filename).startswith(self.excluded_paths)
+
+    def enable(self):
+        # The sampler can only run when the profiled thread releases the GIL
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.switch_interval, self.interval))
+        self.stop_event.clear()
+        self.sampler = threading.Thread(
+            target=self.sample, name="lineprofilergui sampler", daemon=True
+        )
+        self.sampler.start()
+
+    def disable(self):
+        self.stop_event.set()
+        self.sampler.join()
+        sys.setswitchinterval(self.switch_interval)
+
+    def sample(self):
+        sampler_id = threading.get_ident()
+        last_time = self.timer()
+        while not self.stop_event.wait(self.interval):
+            now = self.timer()
+            elapsed = now - last_time
+            last_time = now
+            for thread_id, frame in sys._current_frames().items():  # noqa: SLF001
+                if thread_id != sampler_id:
+                    self.sample_stack(frame, elapsed)
+
+    def sample_stack(self, frame, elapsed):
+        sampled = set()  # Recursive calls are sampled once
+        while frame is not None:
+            code = frame.f_code
+            stats = self.code_stats_for(code)
+            line_no = frame.f_lineno
+            if stats is not None and (code, line_no) not in sampled:
+                sampled.add((code, line_no))
+                line_stats = stats.get(line_no)
+                if line_stats is None:
+                    stats[line_no] = [1, elapsed]
+                else:
+                    line_stats[0] += 1
+                    line_stats[1] += elapsed
+            frame = frame.f_back
+
+    def get_stats(self):
+        stats = super().get_stats()
+        stats.sampling_interval = self.interval
+        return stats
+
+
+class HistogramLineProfiler(LineProfiler):
+    """Line profiler which also records the distribution of the hit durations.
+
+    The stats of each line are ``[hits, time, max time, histogram]``, where
+    the histogram is ``{bucket: hits}`` with logarithmic buckets (see
+    ``histogram_bucket()``), so that its size is bounded whatever the hits.
+    """
+
+    def line_tracer(self, stats):
+        timer = self.timer
+        bucket_of = histogram_bucket
+        last_line = None
+        last_time = 0
+
+        def trace_line(frame, event, arg):  # noqa: ARG001
+            nonlocal last_line, last_time
+            if event not in ("line", "return"):
+                return trace_line
+            now = timer()
+            if last_line is not None:
+                duration = now - last_time
+                line_stats = stats.get(last_line)
+                if line_stats is None:
+                    line_stats = stats[last_line] = [0, 0, 0, {}]
+                line_stats[0] += 1
+                line_stats[1] += duration
+                if duration > line_stats[2]:  # noqa: PLR1730, faster than max()
+                    line_stats[2] = duration
+                histogram = line_stats[3]
+                bucket = bucket_of(duration)
+                histogram[bucket] = histogram.get(bucket, 0) + 1
+            if event == "line":
+                last_line = frame.f_lineno
+                last_time = timer()
+            else:
+                last_line = None
+            return trace_line
+
+        return trace_line
+
+    def merge_line_stats(self, stats1, stats2):
+        histogram = dict(stats1[3])
+        for bucket, hits in stats2[3].items():
+            histogram[bucket] = histogram.get(bucket, 0) + hits
+        return [
+            stats1[0] + stats2[0],
+            stats1[1] + stats2[1],
+            max(stats1[2], stats2[2]),
+            histogram,
+        ]
+
+    def get_stats(self):
+        stats = super().get_stats()
+        # Separated from the timings to keep the layout of kernprof results
+        stats.histograms = {
+            key: [
+                (line_no, line_stats[2], line_stats[3]) for line_no, line_stats in lines
+            ]
+            for key, lines in self.merged_stats().items()
+        }
+        return stats
+
+
+class CpuTimeLineProfiler(LineProfiler):
+    """Line profiler which also records the CPU time of the running thread.
+
+    The stats of each line are ``[hits, wall time, CPU time]``. The difference
+    is the time spent waiting, e.g. for I/O, locks or sleeps.
+    """
+
+    def line_tracer(self, stats):
+        timer = self.timer
+        cpu_timer = time.thread_time_ns
+        last_line = None
+        last_time = last_cpu_time = 0
+
+        def trace_line(frame, event, arg):  # noqa: ARG001
+            nonlocal last_line, last_time, last_cpu_time
+            if event not in ("line", "return"):
+                return trace_line
+            now = timer()
+            cpu_now = cpu_timer()
+            if last_line is not None:
+                line_stats = stats.get(last_line)
+                if line_stats is None:
+                    stats[last_line] = [1, now - last_time, cpu_now - last_cpu_time]
+                else:
+                    line_stats[0] += 1
+                    line_stats[1] += now - last_time
+                    line_stats[2] += cpu_now - last_cpu_time
+            if event == "line":
+                last_line = frame.f_lineno
+                last_cpu_time = cpu_timer()
+                last_time = timer()
+            else:
+                last_line = None
+            return trace_line
+
+        return trace_line
+
+    def get_stats(self):
+        stats = super().get_stats()
+        # Separated from the timings to keep the layout of kernprof results
+        stats.cpu_times = {
+            key: [(line_no, line_stats[2]) for line_no, line_stats in lines]
+            for key, lines in self.merged_stats().items()
+        }
+        return stats
+
+
+class ThreadsMixin:
+    """Also record the stats of each thread separately, with ``sys.settrace``.
+
+    Mixed in any line profiler based on ``sys.settrace``, whose line stats are
+    recorded per thread. The threads are identified by their name, so that
+    the workers of a pool keep the same identity between runs. Threads
+    sharing a name are merged.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # {thread name: {code: {line_no: line stats}}}
+        self.thread_stats = {}
+
+    def frame_stats(self, frame):
+        if self.code_stats_for(frame.f_code) is None:
+            return None
+        code_stats = self.thread_stats.setdefault(threading.current_thread().name, {})
+        stats = code_stats.get(frame.f_code)
+        if stats is None:
+            stats = code_stats[frame.f_code] = self.stats_factory()
+        return stats
+
+    def iter_code_stats(self):
+        for code_stats in list(self.thread_stats.values()):
+            yield from list(code_stats.items())
+        # The functions which no thread ran keep their empty stats
+        yield from list(self.code_stats.items())
+
+    def reset(self):
+        super().reset()
+        for code_stats in list(self.thread_stats.values()):
+            for stats in list(code_stats.values()):
+                stats.clear()
+
+    def get_stats(self):
+        stats = super().get_stats()
+        # The timings of all the threads are merged as usual, to keep the
+        # layout of kernprof results
+        stats.threads = {
+            name: self.get_timings(code_stats)
+            for name, code_stats in list(self.thread_stats.items())
+        }
+        return stats
+
+
+class CallsMixin:
+    """Also record the calls between profiled functions, with ``sys.settrace``.
+
+    Mixed in any line profiler based on ``sys.settrace``. The line times are
+    inclusive: a line calling a profiled function also counts the time of the
+    callee. The calls made by each line to the other profiled functions are
+    recorded with their duration, so that the time spent by the line itself
+    can be told apart. Each resume of a generator or a coroutine counts as a
+    call.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # {(caller code, line_no, callee code): [calls, time]}
+        self.call_stats = {}
+
+    def trace_call(self, frame, event, arg):
+        trace_line = super().trace_call(frame, event, arg)
+        if trace_line is None:
+            return None
+        caller = frame.f_back
+        if caller is None or self.code_stats_for(caller.f_code) is None:
+            return trace_line
+        key = (caller.f_code, caller.f_lineno, frame.f_code)
+        call_stats = self.call_stats.get(key)
+        if call_stats is None:
+            call_stats = self.call_stats[key] = [0, 0]
+        return self.call_tracer(trace_line, call_stats)
+
+    def call_tracer(self, trace_line, call_stats):
+        """Wrap the local trace function to time the call until it returns."""
+        timer = self.timer
+        call_stats[0] += 1
+        start = timer()
+
+        def trace_called_line(frame, event, arg):
+            trace_line(frame, event, arg)
+            if event == "return":
+                call_stats[1] += timer() - start
+            return trace_called_line
+
+        return trace_called_line
+
+    def reset(self):
+        super().reset()
+        # Reset in place, since the running tracers hold the stats
+        for call_stats in list(self.call_stats.values()):
+            call_stats[:] = [0, 0]
+
+    def get_stats(self):
+        stats = super().get_stats()
+        # Separated from the timings to keep the layout of kernprof results
+        merged = {}
+        for (caller, line_no, callee), (calls, duration) in list(
+            self.call_stats.items()
+        ):
+            caller_key = (caller.co_filename, caller.co_firstlineno, caller.co_name)
+            callee_key = (callee.co_filename, callee.co_firstlineno, callee.co_name)
+            # Several code objects can share the same key if a module is reloaded
+            old_calls, old_duration = merged.get(
+                (caller_key, line_no, callee_key), (0, 0)
+            )
+            merged[caller_key, line_no, callee_key] = (
+                old_calls + calls,
+                old_duration + duration,
+            )
+        stats.calls = {}
+        for (caller_key, line_no, callee_key), (calls, duration) in sorted(
+            merged.items()
+        ):
+            if calls:
+                stats.calls.setdefault(caller_key, []).append(
+                    (line_no, callee_key, calls, duration)
+                )
+        return stats
+
+
+class AsyncioLineProfiler(LineProfiler):
+    """Line profiler which separates the time suspended at an ``await``.
+
+    The stats of each line are ``[hits, time, suspended time, blocking hits]``.
+    The time of a line only includes its execution: when a coroutine (or a
+    generator) is suspended, the time until it is resumed is the suspended
+    time of the awaiting line, whose execution goes on after the resume.
+    The hits executing longer than ``blocking_threshold`` without suspension
+    block the event loop, they are counted and reported.
+    """
+
+    def __init__(self, targets=(), blocking_threshold=DEFAULT_BLOCKING_THRESHOLD):
+        super().__init__(targets)
+        self.blocking_threshold = blocking_threshold / 1000  # seconds
+
+    def trace_call(self, frame, event, arg):
+        if self.code_stats_for(frame.f_code) is None:
+            return None
+        tracer = frame.f_trace
+        if tracer is not None and frame.f_code.co_flags & SUSPENDABLE_CODE_FLAGS:
+            # Resumed frame, the tracer keeps the line where it was suspended
+            return tracer(frame, "resume", arg)
+        return super().trace_call(frame, event, arg)
+
+    def line_tracer(self, stats):
+        timer = self.timer
+        threshold = int(self.blocking_threshold / self.unit)
+        last_line = None
+        last_time = 0
+        # Line executed before the suspension, or resumed and not yet counted
+        suspended_line = None
+
+        def trace_line(frame, event, arg):  # noqa: ARG001
+            nonlocal last_line, last_time, suspended_line
+            if event == "resume":
+                now = timer()
+                if suspended_line is not None:
+                    stats[suspended_line][2] += now - last_time
+                    last_line = suspended_line
+                last_time = timer()
+                return trace_line
+            if event not in ("line", "return"):
+                return trace_line
+            now = timer()
+            if last_line is not None:
+                duration = now - last_time
+                line_stats = stats.get(last_line)
+                if line_stats is None:
+                    line_stats = stats[last_line] = [0, 0, 0, 0]
+                if last_line != suspended_line:
+                    # A resumed line was already counted before its suspension
+                    line_stats[0] += 1
+                line_stats[1] += duration
+                if duration > threshold:
+                    line_stats[3] += 1
+            if event == "line":
+                last_line = frame.f_lineno
+                suspended_line = None
+                last_time = timer()
+            else:
+                # Suspension, or end of the frame
+                suspended_line = last_line
+                last_line = None
+                last_time = timer()
+            return trace_line
+
+        return trace_line
+
+    def get_stats(self):
+        stats = super().get_stats()
+        # Separated from the timings to keep the layout of kernprof results
+        stats.asyncio = {
+            key: [
+                (line_no, line_stats[2], line_stats[3]) for line_no, line_stats in lines
+            ]
+            for key, lines in self.merged_stats().items()
+        }
+        stats.blocking_threshold = self.blocking_threshold
+        return stats
+
+    def report_blocking_lines(self):
+        """Write the lines which blocked the event loop on stderr."""
+        for (filename, _first_line, name), lines in self.merged_stats().items():
+            for line_no, (_hits, _time, _suspended, blocking) in lines:
+                if blocking:
+                    sys.stderr.write(
+                        f"Event loop blocked {blocking} times for more than"
+                        f" {self.blocking_threshold * 1000:g}ms by {name} in file"
+                        f' "{filename}", line {line_no}\n'
+                    )
+
+    def dump_stats(self, filename):
+        super().dump_stats(filename)
+        self.report_blocking_lines()
+
+
+class MemoryLineProfiler(LineProfiler):
+    """Line profiler which also records the memory allocated by each line.
+
+    The allocated memory is the increase of the memory traced by
+    ``tracemalloc`` while the line runs. Since python 3.9 the peak is reset
+    for each line, so that temporary allocations are included. The number of
+    allocations is the increase of the number of memory blocks allocated by
+    the interpreter. Allocations in called functions are included.
+    """
+
+    def __init__(self, targets=()):
+        super().__init__(targets)
+        self.overhead = (0, 0)
+
+    def enable(self):
+        tracemalloc.start()
+        self.calibrate()
+        super().enable()
+
+    def calibrate(self, count=100):
+        """Measure the memory allocated by the tracer itself, to subtract it."""
+        self.overhead = (0, 0)
+        stats = {}
+        trace_line = self.line_tracer(stats)
+        frame = inspect.currentframe()
+        for _ in range(count):
+            trace_line(frame, "line", None)
+        trace_line(frame, "return", None)
+        # All the hits are recorded on the line of the loop
+        [(hits, _time, memory, blocks)] = stats.values()
+        self.overhead = (memory // hits, blocks // hits)
+
+    def disable(self):
+        super().disable()
+        tracemalloc.stop()
+
+    def line_tracer(self, stats):
+        timer = self.timer
+        get_traced_memory = tracemalloc.get_traced_memory
+        reset_peak = getattr(tracemalloc, "reset_peak", None)
+        get_allocated_blocks = sys.getallocatedblocks
+        memory_overhead, blocks_overhead = self.overhead
+        last_line = None
+        last_time = last_memory = last_blocks = 0
+
+        def trace_line(frame, event, arg):  # noqa: ARG001
+            nonlocal last_line, last_time, last_memory, last_blocks
+            if event not in ("line", "return"):
+                return trace_line
+            now = timer()
+            memory, peak = get_traced_memory()
+            blocks = get_allocated_blocks()
+            if last_line is not None:
+                if reset_peak is not None:
+                    memory = max(memory, peak)
+                allocated = max(memory - last_memory - memory_overhead, 0)
+                allocations = max(blocks - last_blocks - blocks_overhead, 0)
+                line_stats = stats.get(last_line)
+                if line_stats is None:
+                    stats[last_line] = [1, now - last_time, allocated, allocations]
+                else:
+                    line_stats[0] += 1
+                    line_stats[1] += now - last_time
+                    line_stats[2] += allocated
+                    line_stats[3] += allocations
+            if event == "line":
+                last_line = frame.f_lineno
+                if reset_peak is not None:
+                    reset_peak()
+                last_memory = get_traced_memory()[0]
+                last_blocks = get_allocated_blocks()
+                last_time = timer()
+            else:
+                last_line = None
+            return trace_line
+
+        return trace_line
+
+    def get_stats(self):
+        stats = super().get_stats()
+        # Separated from the timings to keep the layout of kernprof results
+        stats.memory = {
+            key: [
+                (line_no, line_stats[2], line_stats[3]) for line_no, line_stats in lines
+            ]
+            for key, lines in self.merged_stats().items()
+        }
+        return stats
+
+
+class SteadyState:
+    """Reset the profiler stats after the warm-up calls of a function.
+
+    The calls are counted with ``sys.setprofile``, which is removed once the
+    stats are reset so that the steady state runs without this overhead. The
+    function is identified by its name or qualified name.
+    """
+
+    def __init__(self, profiler, function, calls):
+        self.profiler = profiler
+        self.function = function
+        self.calls = calls
+        self.count = 0
+        self.reached = False
+
+    def enable(self):
+        threading.setprofile(self.count_call)
+        sys.setprofile(self.count_call)
+
+    def disable(self):
+        sys.setprofile(None)
+        threading.setprofile(None)
+
+    def is_function(self, code):
+        return self.function in (code.co_name, getattr(code, "co_qualname", None))
+
+    def count_call(self, frame, event, arg):
+        if self.reached or event != "return" or not self.is_function(frame.f_code):
+            return
+        self.count += 1
+        if self.count >= self.calls:
+            self.reached = True
+            self.profiler.reset()
+            self.disable()
+
+    def warn_not_reached(self):
+        if not self.reached:
+            sys.stderr.write(
+                f"Steady state not reached: {self.function} was called"
+                f" {self.count} times out of {self.calls}, the results"
+                " include the warm-up\n"
+            )
+
+
+class GcRecorder:
+    """Attribute the garbage collections to the profiled lines running them.
+
+    The collections are timed with ``gc.callbacks``. A collection runs in the
+    thread whose allocation triggered it, so it is attributed to the innermost
+    profiled frame of the stack at that time. The time of a collection is also
+    included in the time of its line.
+    """
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.code_stats = {}  # {code: {line_no: [collections, time]}}
+        self.start_time = None
+
+    def enable(self):
+        gc.callbacks.append(self.collected)
+
+    def disable(self):
+        with contextlib.suppress(ValueError):
+            gc.callbacks.remove(self.collected)
+
+    def reset(self):
+        self.code_stats = {}
+
+    def collected(self, phase, info):
+        if phase == "start":
+            self.start_time = self.profiler.timer()
+            return
+        if self.start_time is None:
+            return
+        duration = self.profiler.timer() - self.start_time
+        self.start_time = None
+        frame = inspect.currentframe().f_back
+        while frame is not None and self.profiler.code_stats_for(frame.f_code) is None:
+            frame = frame.f_back
+        if frame is None:
+            # Not triggered by a profiled function
+            return
+        stats = self.code_stats.setdefault(frame.f_code, {})
+        line_stats = stats.get(frame.f_lineno)
+        if line_stats is None:
+            stats[frame.f_lineno] = [1, duration]
+        else:
+            line_stats[0] += 1
+            line_stats[1] += duration
+
+    def get_stats(self):
+        """Return the sorted ``(line_no, collections, time)`` of each function key."""
+        merged_stats = {}
+        for code, stats in list(self.code_stats.items()):
+            # Several code objects can share the same key if a module is reloaded
+            key = (code.co_filename, code.co_firstlineno, code.co_name)
+            merged = merged_stats.setdefault(key, {})
+            for line_no, (count, duration) in stats.items():
+                old_count, old_duration = merged.get(line_no, (0, 0))
+                merged[line_no] = (
+                    old_count + count,
+                    old_duration + duration,
+                )
+        return {
+            key: [
+                (line_no, *line_stats) for line_no, line_stats in sorted(merged.items())
+            ]
+            for key, merged in merged_stats.items()
+        }
+
+
+def set_up_environment(options):
+    """Apply the run controls, and return the actual run environment."""
+    if options.cpus:
+        try:
+            os.sched_setaffinity(0, options.cpus)
+        except (AttributeError, OSError) as exc:
+            sys.stderr.write(f"CPU affinity not set: {exc}\n")
+    if options.nice:
+        try:
+            os.nice(options.nice)
+        except (AttributeError, OSError) as exc:
+            sys.stderr.write(f"Niceness not set: {exc}\n")
+
+    environment = {
+        "python": platform.python_version(),
+        "hash_seed": os.environ.get("PYTHONHASHSEED") or None,
+        "gc_disabled": options.disable_gc,
+    }
+    if hasattr(os, "sched_getaffinity"):
+        environment["cpus"] = sorted(os.sched_getaffinity(0))
+    if hasattr(os, "nice"):
+        environment["nice"] = os.nice(0)
+    return environment
+
+
+def option_flag(name):
+    """Return the command line flag of an option of OPTION_CONFLICTS."""
+    if name in (BACKEND_MONITORING, BACKEND_SAMPLING):
+        return f"--backend {name}"
+    return "--" + name.replace("_", "-")
+
+
+def ignore_conflicting_options(options):
+    """Warn about the options which cannot be combined, and disable them.
+
+    The first option of each pair of OPTION_CONFLICTS is kept.
+    """
+    enabled = {options.backend}
+    enabled.update(
+        name for name in (*SETTRACE_OPTIONS, "hits_only") if getattr(options, name)
+    )
+    for name, ignored in OPTION_CONFLICTS:
+        if name not in enabled or ignored not in enabled:
+            continue
+        enabled.discard(ignored)
+        sys.stderr.write(
+            f"Option {option_flag(ignored)} ignored, it cannot be combined"
+            f" with {option_flag(name)}\n"
+        )
+        if ignored == options.backend:
+            options.backend = BACKEND_SETTRACE
+        else:
+            setattr(options, ignored, False)
+
+
+def function_level_profiler():
+    """Create a function level profiler, with a no-op ``@profile`` decorator."""
+    import cProfile  # noqa: PLC0415, only needed for function level profiles
+
+    profiler = cProfile.Profile()
+    builtins.profile = lambda func: func
+    return profiler
+
+
+def mixed_profiler_class(profiler_class, mixin):
+    """Return a subclass of the profiler class also recording with the mixin."""
+    name = mixin.__name__[: -len("Mixin")] + profiler_class.__name__
+    return type(name, (mixin, profiler_class), {})
+
+
+# Profilers of the options requiring sys.settrace, by decreasing precedence
+SETTRACE_PROFILERS = (
+    ("memory", MemoryLineProfiler),
+    ("histograms", HistogramLineProfiler),
+    ("cpu_time", CpuTimeLineProfiler),
+    ("asyncio", AsyncioLineProfiler),
+    ("calls", LineProfiler),
+    ("threads", LineProfiler),
+)
+
+
+def settrace_profiler_class(options):
+    """Return the class of the profiler for the ``sys.settrace`` options, if any."""
+    for name, profiler_class in SETTRACE_PROFILERS:
+        if getattr(options, name):
+            return profiler_class
+    return None
+
+
+def line_profiler(options, targets):
+    """Create the line by line profiler for the command line options.
+
+    The calls and the stats of each thread are recorded in addition to the
+    other measures. The calls are not recorded with asyncio, whose resumed
+    frames keep their tracer.
+    """
+    profiler_class = settrace_profiler_class(options)
+    if profiler_class is None:
+        if options.backend == BACKEND_SAMPLING and not options.hits_only:
+            return SamplingProfiler(targets, options.interval, options.all_functions)
+        if options.backend == BACKEND_MONITORING:
+            if options.hits_only:
+                profiler_class = HitsMonitoringLineProfiler
+            else:
+                profiler_class = MonitoringLineProfiler
+        elif options.hits_only:
+            profiler_class = HitsLineProfiler
+        else:
+            profiler_class = LineProfiler
+    kwargs = {}
+    if profiler_class is AsyncioLineProfiler:
+        kwargs["blocking_threshold"] = options.blocking_threshold
+    if options.calls and profiler_class is not AsyncioLineProfiler:
+        profiler_class = mixed_profiler_class(profiler_class, CallsMixin)
+    if options.threads:
+        profiler_class = mixed_profiler_class(profiler_class, ThreadsMixin)
+    return profiler_class(targets, **kwargs)
+
+
+def commandline_args(args):
+    parser = argparse.ArgumentParser(
+        description="Run and profile a python script for Line Profiler GUI."
+    )
+    parser.add_argument("-o", "--outfile", required=True, help="Save stats to OUTFILE")
+    parser.add_argument(
+        "-s", "--setup", help="Python script to execute before the code to profile"
+    )
+    parser.add_argument(
+        "--function-level",
+        action="store_true",
+        help="Profile all functions with cProfile instead of line by line",
+    )
+    parser.add_argument(
+        "--targets",
+        help="JSON file listing the (filename, first line, name) of the functions"
+        " to profile line by line, in addition to the decorated ones",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="Record the memory allocated by each line with tracemalloc",
+    )
+    parser.add_argument(
+        "--histograms",
+        action="store_true",
+        help="Record the distribution of the durations of each line hit"
+        " with sys.settrace",
+    )
+    parser.add_argument(
+        "--cpu-time",
+        action="store_true",
+        help="Record the CPU time of the thread running each line, in addition"
+        " to the wall time, with sys.settrace",
+    )
+    parser.add_argument(
+        "--threads",
+        action="store_true",
+        help="Also record the stats of each thread separately, with sys.settrace",
+    )
+    parser.add_argument(
+        "--calls",
+        action="store_true",
+        help="Also record the calls made by each line to the other profiled"
+        " functions, to compute the time spent by the line itself, with sys.settrace",
+    )
+    parser.add_argument(
+        "--gc-time",
+        action="store_true",
+        help="Record the garbage collections with gc.callbacks, and attribute"
+        " their time to the profiled lines running them",
+    )
+    parser.add_argument(
+        "--asyncio",
+        action="store_true",
+        help="Separate the time suspended at an await from the execution time,"
+        " and report the lines blocking the event loop, with sys.settrace",
+    )
+    parser.add_argument(
+        "--blocking-threshold",
+        type=float,
+        default=DEFAULT_BLOCKING_THRESHOLD,
+        help="Execution time in milliseconds above which a line blocks the event"
+        " loop (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=[BACKEND_SETTRACE, BACKEND_MONITORING, BACKEND_SAMPLING],
+        default=BACKEND_SETTRACE,
+        help="Line by line profiling based on sys.settrace, on sys.monitoring"
+        " (python >= 3.12), or on the sampling of the stacks",
+    )
+    parser.add_argument(
+        "--hits-only",
+        action="store_true",
+        help="Only count the hits of each line, without timing",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_SAMPLING_INTERVAL,
+        help="Sampling interval in milliseconds (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--all-functions",
+        action="store_true",
+        help="Sample all the functions outside of the python installation,"
+        " in addition to the decorated ones",
+    )
+    parser.add_argument(
+        "--steady-function",
+        help="Reset the stats once STEADY_FUNCTION returned STEADY_CALLS times,"
+        " to discard the warm-up",
+    )
+    parser.add_argument(
+        "--steady-calls",
+        type=int,
+        default=1,
+        help="Number of warm-up calls of STEADY_FUNCTION (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--cpus",
+        type=parse_cpus,
+        help="Pin the process to these CPUs, e.g. 0-3,6 (Linux only)",
+    )
+    parser.add_argument(
+        "--nice", type=int, default=0, help="Increment of the process niceness"
+    )
+    parser.add_argument(
+        "--disable-gc",
+        action="store_true",
+        help="Disable the garbage collector while the script runs",
+    )
+    parser.add_argument(
+        "--resources",
+        metavar="FILE",
+        help="Save the resource usage of the process running the script to FILE",
+    )
+    parser.add_argument(
+        "--connect",
+        metavar="SOCKET",
+        help="Run in a child of the fork server listening on SOCKET,"
+        " or in this process if the server is not available",
+    )
+    parser.add_argument("script", help="The python script file to run")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Script arguments")
+    options = parser.parse_args(args)
+    if options.backend == BACKEND_MONITORING and not hasattr(sys, "monitoring"):
+        parser.error("the monitoring backend requires python >= 3.12")
+    return options
+
+
+def usage_dict(usage):
+    """Resource usage of a process, from ``getrusage`` or ``wait4``."""
+    rss_unit = 1 if sys.platform == "darwin" else 1024
+    return {
+        "user_time": usage.ru_utime,
+        "system_time": usage.ru_stime,
+        "peak_rss": usage.ru_maxrss * rss_unit,
+        "minor_faults": usage.ru_minflt,
+        "major_faults": usage.ru_majflt,
+        "voluntary_switches": usage.ru_nvcsw,
+        "involuntary_switches": usage.ru_nivcsw,
+    }
+
+
+def write_resources(filename, usage):
+    with open(filename, "w", encoding="utf-8") as fid:
+        json.dump(usage, fid)
+
+
+def without_option(args, name):
+    """Remove an option and its value from the command line arguments."""
+    if name not in args:
+        return args
+    index = args.index(name)
+    return args[:index] + args[index + 2 :]
+
+
+def send_message(sock, message):
+    data = json.dumps(message).encode("utf-8")
+    sock.sendall(struct.pack("!I", len(data)) + data)
+
+
+def receive_exactly(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise EOFError
+        data += chunk
+    return data
+
+
+def receive_message(sock):
+    (size,) = struct.unpack("!I", receive_exactly(sock, 4))
+    return json.loads(receive_exactly(sock, size).decode("utf-8"))
+
+
+def send_fds(sock, fds):
+    fds = array.array("i", fds)
+    sock.sendmsg([b"F"], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fds)])
+
+
+def receive_fds(sock, count):
+    fds = array.array("i")
+    _msg, ancdata, _flags, _addr = sock.recvmsg(
+        1, socket.CMSG_LEN(count * fds.itemsize)
+    )
+    for level, kind, data in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(data[: len(data) - len(data) % fds.itemsize])
+    return list(fds)
+
+
+def loaded_files():
+    """Modification time of the files of the loaded modules, but the stdlib."""
+    stdlib = library_paths(("stdlib", "platstdlib"))
+    packages = library_paths(("purelib", "platlib"))  # Can be inside stdlib
+    files = {}
+    for module in list(sys.modules.values()):
+        filename = getattr(module, "__file__", None)
+        if not filename or not os.path.isfile(filename):
+            continue
+        path = normalized_path(filename)
+        if path.startswith(stdlib) and not path.startswith(packages):
+            continue
+        files[filename] = os.stat(filename).st_mtime_ns
+    return files
+
+
+def is_modified(files):
+    for filename, mtime in files.items():
+        try:
+            if os.stat(filename).st_mtime_ns != mtime:
+                return True
+        except OSError:
+            return True
+    return False
+
+
+def serve(socket_path, preload):
+    """Preload modules, then fork a child for each requested run.
+
+    When ready, the list of the files of the preloaded modules is written on
+    stdout as JSON. If one of them is modified, the server exits at the next
+    request, which is then run by the client itself.
+    """
+    for module in preload:
+        importlib.import_module(module)
+    files = loaded_files()
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    listener.bind(socket_path)
+    listener.listen()
+    sys.stdout.write(json.dumps({"ready": True, "files": sorted(files)}) + "\n")
+    sys.stdout.flush()
+
+    while True:
+        conn, _addr = listener.accept()
+        try:
+            fds = receive_fds(conn, 3)
+            request = receive_message(conn)
+        except (OSError, EOFError, ValueError):
+            conn.close()
+            continue
+        if is_modified(files):
+            send_message(conn, {"stale": True})
+            conn.close()
+            break
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            listener.close()
+            conn.close()
+            run_forked(request, fds)
+        for fd in fds:
+            os.close(fd)
+        threading.Thread(target=wait_child, args=(conn, pid), daemon=True).start()
+
+    listener.close()
+    os.unlink(socket_path)
+
+
+def run_forked(request, fds):
+    """Run a request in the forked child, with the streams of the client."""
+    for target_fd, fd in enumerate(fds):
+        os.dup2(fd, target_fd)
+        os.close(fd)
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["env"])
+
+    exit_code = 0
+    try:
+        main(request["args"])
+    except SystemExit as exc:
+        exit_code = exc.code
+    except BaseException:  # noqa: BLE001
+        traceback.print_exc()
+        exit_code = 1
+    if exit_code is None:
+        exit_code = 0
+    elif not isinstance(exit_code, int):
+        sys.stderr.write(f"{exit_code}\n")
+        exit_code = 1
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(exit_code)
+
+
+def wait_child(conn, pid):
+    """Send the exit code and resource usage of the child.
+
+    The child is killed if the client dies.
+    """
+    killed = False
+    while True:
+        readable, _, _ = select.select([conn], [], [], 0.01)
+        if readable and not killed and not conn.recv(1):
+            os.kill(pid, signal.SIGKILL)
+            killed = True
+        done_pid, status, usage = os.wait4(pid, os.WNOHANG)
+        if done_pid:
+            break
+    if os.WIFEXITED(status):
+        exit_code = os.WEXITSTATUS(status)
+    else:
+        exit_code = 128 + os.WTERMSIG(status)
+    with contextlib.suppress(OSError):
+        # The client is gone
+        send_message(conn, {"exit_code": exit_code, "usage": usage_dict(usage)})
+    conn.close()
+
+
+def run_in_server(socket_path, args):
+    """Run in the fork server, return its reply or None if unavailable.
+
+    The reply holds the ``exit_code`` and the resource ``usage`` of the child.
+    Once the run is requested, the script may have run in the server, so a
+    missing reply is a failed run rather than an unavailable server.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(socket_path)
+            sys.stdout.flush()
+            sys.stderr.flush()
+            send_fds(sock, [0, 1, 2])
+            send_message(
+                sock, {"args": args, "cwd": os.getcwd(), "env": dict(os.environ)}
+            )
+        except OSError:
+            return None
+        try:
+            return receive_message(sock)
+        except (OSError, EOFError, ValueError) as exc:
+            sys.stderr.write(f"No reply from the fork server: {exc!r}\n")
+            return {"exit_code": 1}
+    finally:
+        sock.close()
+
+
+def run_connected(options, args):
+    """Exit once the run is done by the fork server, if it is available."""
+    # The usage of the child is measured by the server, not by the child
+    child_args = without_option(without_option(args, "--connect"), "--resources")
+    reply = run_in_server(options.connect, child_args)
+    if reply is not None:
+        if options.resources and "usage" in reply:
+            write_resources(options.resources, reply["usage"])
+        sys.exit(reply.get("exit_code"))
+
+
+def serve_commandline_args(args):
+    parser = argparse.ArgumentParser(
+        description="Fork server of the runner of Line Profiler GUI."
+    )
+    parser.add_argument("--serve", metavar="SOCKET", required=True)
+    parser.add_argument(
+        "--preload",
+        default="",
+        help="Comma separated list of the modules to import once",
+    )
+    options = parser.parse_args(args)
+    options.preload = [
+        name.strip() for name in options.preload.split(",") if name.strip()
+    ]
+    return options
+
+
+def compile_script(filename):
+    with open(filename, "rb") as fid:
+        return compile(fid.read(), filename, "exec")
+
+
+def create_profiler(options, environment):
+    if options.function_level:
+        return function_level_profiler()
+    targets = []
+    if options.targets:
+        with open(options.targets, encoding="utf-8") as fid:
+            targets = json.load(fid)
+    profiler = line_profiler(options, targets)
+    profiler.environment = environment
+    builtins.profile = profiler
+    return profiler
+
+
+def create_main_module(options):
+    """Prepare to run the script as __main__, from its own directory."""
+    sys.argv = [options.script, *options.args]
+    sys.path[0] = os.path.dirname(os.path.abspath(options.script))
+    main_module = types.ModuleType("__main__")
+    main_module.__file__ = options.script
+    main_module.__builtins__ = builtins
+    sys.modules["__main__"] = main_module
+
+    if options.setup:
+        exec(compile_script(options.setup), main_module.__dict__)  # noqa: S102
+    return main_module
+
+
+def main(args=None):  # noqa: C901, PLR0912
+    if args is None:
+        args = sys.argv[1:]
+    if args[:1] == ["--serve"]:
+        options = serve_commandline_args(args)
+        serve(options.serve, options.preload)
+        return
+
+    options = commandline_args(args)
+    if options.connect:
+        run_connected(options, args)
+
+    ignore_conflicting_options(options)
+    profiler = create_profiler(options, set_up_environment(options))
+    gc_recorder = None
+    if options.gc_time and not options.function_level:
+        gc_recorder = profiler.gc_recorder = GcRecorder(profiler)
+    steady_state = None
+    if options.steady_function and not options.function_level:
+        steady_state = SteadyState(
+            profiler, options.steady_function, options.steady_calls
+        )
+
+    main_module = create_main_module(options)
+    code = compile_script(options.script)
+    exit_code = 0
+    if options.disable_gc:
+        gc.collect()
+        gc.disable()
+    try:
+        profiler.enable()
+        if gc_recorder is not None:
+            gc_recorder.enable()
+        if steady_state is not None:
+            steady_state.enable()
+        try:
+            exec(code, main_module.__dict__)  # noqa: S102
+        finally:
+            if steady_state is not None:
+                steady_state.disable()
+                steady_state.warn_not_reached()
+            if gc_recorder is not None:
+                gc_recorder.disable()
+            profiler.disable()
+    except SystemExit as exc:
+        exit_code = exc.code
+    finally:
+        gc.enable()
+        profiler.dump_stats(options.outfile)
+        sys.stdout.write(f"Wrote profile results to {options.outfile}\n")
+        if options.resources and resource is not None:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            write_resources(options.resources, usage_dict(usage))
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
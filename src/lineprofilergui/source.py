@@ -0,0 +1,190 @@
+"""Annotated view of the whole source file of the profiled functions.
+
+The results tree only shows the block of each profiled function. The source
+view displays the whole file once, with the hits and time of the profiled lines
+in a heat gutter, so that the code between the functions stays visible.
+"""
+
+import linecache
+import os
+
+from PySide6 import QtCore, QtGui, QtWidgets
+from PySide6.QtCore import Qt
+
+from .utils import MONOSPACE_FONT
+from .utils import translate as _
+
+
+class HeatGutter(QtWidgets.QWidget):
+    """Margin of the source view with the line numbers, hits and times."""
+
+    MARGIN = 4  # Pixels around the text
+
+    def __init__(self, source_view):
+        super().__init__(source_view)
+        self.source_view = source_view
+
+    def sizeHint(self):
+        return QtCore.QSize(self.source_view.gutter_width(), 0)
+
+    def paintEvent(self, event):
+        self.source_view.paint_gutter(event)
+
+
+class SourceView(QtWidgets.QPlainTextEdit):
+    """Read-only view of a source file, annotated with the line profiler results.
+
+    Only the visible lines of the gutter are painted, and the layout of the
+    text is done lazily by QPlainTextEdit, so that large modules stay fast.
+    """
+
+    # (filename, line_no) of the line under the cursor
+    line_selected = QtCore.Signal(str, int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.filename = None
+        # {filename: {line_no: LineData}} of the displayed results
+        self.file_lines = {}
+        self.hits_only = False
+        # Location to display once the view is shown
+        self.pending_location = None
+        self.setup_ui()
+
+    def setup_ui(self):
+        self.setReadOnly(True)
+        self.setLineWrapMode(QtWidgets.QPlainTextEdit.NoWrap)
+        self.setFont(MONOSPACE_FONT)
+        self.setFrameShape(QtWidgets.QFrame.NoFrame)
+        self.gutter = HeatGutter(self)
+        self.gutter.setFont(MONOSPACE_FONT)
+        self.gutter.setToolTip(
+            _("Line number, hits and time (ms) of the profiled lines")
+        )
+        self.blockCountChanged.connect(self.update_gutter_width)
+        self.updateRequest.connect(self.update_gutter)
+        self.cursorPositionChanged.connect(self.cursor_position_changed)
+        self.update_gutter_width()
+
+    def set_profile_data(self, profile_data):
+        """Annotate the source with the results of a run."""
+        self.file_lines = {}
+        self.hits_only = bool(profile_data and profile_data.hits_only)
+        for func_data in profile_data or ():
+            lines = self.file_lines.setdefault(func_data.filename, {})
+            for line_data in func_data:
+                if line_data.hits is not None:
+                    lines[line_data.line_no] = line_data
+        self.update_gutter_width()
+        self.gutter.update()
+
+    @property
+    def lines(self):
+        return self.file_lines.get(self.filename, {})
+
+    def load_file(self, filename):
+        """Display a source file, from the same cache as the results tree."""
+        self.filename = filename
+        with QtCore.QSignalBlocker(self):
+            self.setPlainText("".join(linecache.getlines(filename)))
+        self.setDocumentTitle(os.path.basename(filename))
+        self.update_gutter_width()
+
+    @QtCore.Slot(str, int)
+    def show_line(self, filename, line_no):
+        """Display and select a line of a file, loading the file if needed."""
+        if not self.isVisible():
+            # Loading large files is deferred until the view is displayed
+            self.pending_location = (filename, line_no)
+            return
+        if filename != self.filename:
+            self.load_file(filename)
+        block = self.document().findBlockByNumber(line_no - 1)
+        if not block.isValid() or self.textCursor().blockNumber() == line_no - 1:
+            return
+        with QtCore.QSignalBlocker(self):
+            self.setTextCursor(QtGui.QTextCursor(block))
+        self.centerCursor()
+        self.gutter.update()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.pending_location is not None:
+            location, self.pending_location = self.pending_location, None
+            self.show_line(*location)
+
+    @QtCore.Slot()
+    def cursor_position_changed(self):
+        if self.filename is not None:
+            self.line_selected.emit(self.filename, self.textCursor().blockNumber() + 1)
+        self.gutter.update()
+
+    def annotation(self, line_data):
+        """Text of the gutter for a profiled line."""
+        if self.hits_only:
+            return f"{line_data.hits:>9}"
+        return f"{line_data.hits:>9} {line_data.total_time * 1e3:>11.3f}"
+
+    def gutter_width(self):
+        digits = len(str(max(1, self.blockCount())))
+        if self.lines:
+            digits += len(self.annotation(next(iter(self.lines.values())))) + 1
+        return 2 * HeatGutter.MARGIN + self.fontMetrics().horizontalAdvance(
+            "9" * digits
+        )
+
+    @QtCore.Slot(int)
+    def update_gutter_width(self, _block_count=0):
+        self.setViewportMargins(self.gutter_width(), 0, 0, 0)
+        self.update_gutter_geometry()
+
+    def update_gutter_geometry(self):
+        contents = self.contentsRect()
+        self.gutter.setGeometry(
+            QtCore.QRect(
+                contents.left(), contents.top(), self.gutter_width(), contents.height()
+            )
+        )
+
+    @QtCore.Slot(QtCore.QRect, int)
+    def update_gutter(self, rect, dy):
+        if dy:
+            self.gutter.scroll(0, dy)
+        else:
+            self.gutter.update(0, rect.y(), self.gutter.width(), rect.height())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_gutter_geometry()
+
+    def paint_gutter(self, event):
+        """Paint the visible lines of the gutter, colored like the results tree."""
+        painter = QtGui.QPainter(self.gutter)
+        painter.fillRect(event.rect(), self.palette().window())
+        lines = self.lines
+        digits = len(str(max(1, self.blockCount())))
+        current_line_no = self.textCursor().blockNumber() + 1
+        width = self.gutter.width() - HeatGutter.MARGIN
+        height = self.fontMetrics().height()
+        block = self.firstVisibleBlock()
+        top = round(
+            self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
+        )
+        while block.isValid() and top <= event.rect().bottom():
+            bottom = top + round(self.blockBoundingRect(block).height())
+            if block.isVisible() and bottom >= event.rect().top():
+                line_no = block.blockNumber() + 1
+                line_data = lines.get(line_no)
+                text = f"{line_no:>{digits}}"
+                if line_data is not None:
+                    painter.fillRect(
+                        0, top, self.gutter.width(), bottom - top, line_data.color
+                    )
+                    text += " " + self.annotation(line_data)
+                font = painter.font()
+                font.setBold(line_no == current_line_no)
+                painter.setFont(font)
+                painter.setPen(self.palette().color(QtGui.QPalette.WindowText))
+                painter.drawText(0, top, width, height, Qt.AlignRight, text)
+            block = block.next()
+            top = bottom
@@ -0,0 +1,441 @@
+"""Input size sweep: how the time of each line grows with the input size.
+
+The script is profiled once per input size, the size replacing ``{n}`` in the
+script arguments. The growth exponent of the time and of the hits of each line
+is fitted in log-log space: a time exponent of 1 means the line scales
+linearly with the input size, 2 quadratically.
+"""
+
+import math
+import re
+
+from PySide6 import QtCore, QtGui, QtWidgets
+from PySide6.QtCore import Qt
+
+from .utils import SortableTreeWidgetItem
+from .utils import translate as _
+
+SIZE_PLACEHOLDER = "{n}"
+
+# Lines scaling worse than linear, with a margin for the measurement noise
+SUPERLINEAR_EXPONENT = 1.2
+# Lines taking less of the largest run are not flagged
+MIN_TIME_FRACTION = 0.01
+
+SUPERLINEAR_COLOR = QtGui.QColor.fromRgb(255, 0, 0, 160)
+
+
+def parse_sizes(text):
+    """Parse the comma or space separated input sizes, at least two distinct."""
+    sizes = []
+    for token in re.split(r"[,\s]+", text.strip()):
+        if not token:
+            continue
+        size = float(token)
+        if not size > 0:
+            raise ValueError(token)
+        sizes.append(int(size) if size.is_integer() else size)
+    if len(set(sizes)) < 2:
+        # At least two distinct sizes are required to fit the growth
+        raise ValueError(text)
+    return sorted(set(sizes))
+
+
+def sweep_args(template, size):
+    """Script arguments for an input size, appended if there is no ``{n}``."""
+    if SIZE_PLACEHOLDER in template:
+        return template.replace(SIZE_PLACEHOLDER, str(size))
+    return f"{template} {size}".strip()
+
+
+def fit_exponent(values):
+    """Least squares slope of log(value) against log(size).
+
+    ``values`` is a ``{size: value}`` dict. The sizes with no positive value
+    are ignored. Return None if less than two sizes remain.
+    """
+    points = [
+        (math.log(size), math.log(value))
+        for size, value in values.items()
+        if value and value > 0
+    ]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _y in points) / len(points)
+    mean_y = sum(y for _x, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _y in points)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    return covariance / variance
+
+
+def complexity_label(exponent):
+    """Name the closest integer complexity, e.g. O(n²) for 1.9."""
+    if exponent is None:
+        return ""
+    nearest = round(exponent)
+    if abs(exponent - nearest) <= 0.15 and 0 <= nearest <= 3:
+        return ("O(1)", "O(n)", "O(n²)", "O(n³)")[nearest]
+    return f"O(n^{exponent:.1f})"
+
+
+class SweepSeries:
+    """Times and hits of a function or a line over the input sizes."""
+
+    def __init__(self, name, key):
+        self.name = name
+        # func_id of the functions, (filename, line_no) of the lines
+        self.key = key
+        self.times = {}  # {size: time}
+        self.hits = {}  # {size: hits}
+        self.children = []
+        self.time_exponent = None
+        self.hits_exponent = None
+        self.superlinear = False
+
+    def fit(self, min_time):
+        self.time_exponent = fit_exponent(self.times)
+        self.hits_exponent = fit_exponent(self.hits)
+        largest_time = self.times[max(self.times)] if self.times else 0.0
+        self.superlinear = (
+            self.time_exponent is not None
+            and self.time_exponent > SUPERLINEAR_EXPONENT
+            and largest_time >= min_time
+        )
+
+
+def build_sweep(results):
+    """Fit the growth of each function and line from ``[(size, profile_data)]``.
+
+    Return the function series, ordered as in the results of the largest size.
+    """
+    functions = {}
+    lines = {}
+    total_times = {}
+    for size, profile_data in sorted(results, key=lambda result: result[0]):
+        total_times[size] = 0.0
+        for func_data in profile_data:
+            if not func_data.was_called:
+                continue
+            total_times[size] += func_data.total_time
+            func_series = functions.get(func_data.func_id)
+            if func_series is None:
+                func_series = functions[func_data.func_id] = SweepSeries(
+                    func_data.name, func_data.func_id
+                )
+            func_series.times[size] = func_data.total_time
+            for line_data in func_data:
+                if line_data.hits is None:
+                    continue
+                key = (line_data.filename, line_data.line_no)
+                line_series = lines.get(key)
+                if line_series is None:
+                    line_series = lines[key] = SweepSeries(
+                        f"{line_data.line_no}: {line_data.code.strip()}", key
+                    )
+                    func_series.children.append(line_series)
+                line_series.times[size] = line_data.total_time
+                line_series.hits[size] = line_data.hits
+    min_time = MIN_TIME_FRACTION * total_times[max(total_times)] if total_times else 0
+    for func_series in functions.values():
+        func_series.fit(min_time)
+        func_series.children.sort(key=lambda series: series.key[1])
+        for line_series in func_series.children:
+            line_series.fit(min_time)
+    return list(functions.values())
+
+
+class Sweep(QtCore.QObject):
+    """Jobs of the queue profiling the script for each input size."""
+
+    finished = QtCore.Signal(object)
+
+    def __init__(self, job_queue, jobs, parent=None):
+        super().__init__(parent)
+        self.job_queue = job_queue
+        self.jobs = jobs  # {job: size}
+        self.job_queue.job_changed.connect(self.job_changed)
+
+    @property
+    def sizes(self):
+        return sorted(self.jobs.values())
+
+    def results(self):
+        """``[(size, profile_data)]`` of the jobs with results."""
+        return [
+            (size, job.profile_data)
+            for job, size in self.jobs.items()
+            if job.profile_data is not None
+        ]
+
+    @QtCore.Slot(object)
+    def job_changed(self, job):
+        if job in self.jobs and all(job.done for job in self.jobs):
+            self.job_queue.job_changed.disconnect(self.job_changed)
+            self.finished.emit(self)
+
+
+class ScalingPlot(QtWidgets.QWidget):
+    """Log-log plot of the time and hits of a series, relative to the smallest size."""
+
+    MARGIN = 30
+    TIME_COLOR = QtGui.QColor.fromRgb(64, 128, 255)
+    HITS_COLOR = QtGui.QColor.fromRgb(255, 160, 0)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.series = None
+        self.setMinimumHeight(150)
+
+    def set_series(self, series):
+        self.series = series
+        self.update()
+
+    @staticmethod
+    def ratios(values):
+        values = {size: value for size, value in values.items() if value}
+        if not values:
+            return {}
+        reference = values[min(values)]
+        return {size: value / reference for size, value in values.items()}
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        palette = self.palette()
+        rect = self.rect().adjusted(self.MARGIN, self.MARGIN // 2, -10, -self.MARGIN)
+        painter.setPen(palette.color(QtGui.QPalette.Mid))
+        painter.drawRect(rect)
+        if self.series is None or rect.width() <= 0 or rect.height() <= 0:
+            return
+        curves = [
+            (self.ratios(self.series.times), self.TIME_COLOR, _("time")),
+            (self.ratios(self.series.hits), self.HITS_COLOR, _("hits")),
+        ]
+        sizes = sorted({size for ratios, _c, _n in curves for size in ratios})
+        values = [value for ratios, _c, _n in curves for value in ratios.values()]
+        if len(sizes) < 2:
+            return
+        log_x = (math.log(sizes[0]), math.log(sizes[-1]))
+        # Linear growth is shown for reference
+        linear = sizes[-1] / sizes[0]
+        log_y = (
+            min(0.0, *(math.log(value) for value in values)),
+            max(math.log(linear), *(math.log(value) for value in values)),
+        )
+
+        def point(size, ratio):
+            x = (math.log(size) - log_x[0]) / (log_x[1] - log_x[0])
+            y = (math.log(ratio) - log_y[0]) / ((log_y[1] - log_y[0]) or 1.0)
+            return QtCore.QPointF(
+                rect.left() + x * rect.width(), rect.bottom() - y * rect.height()
+            )
+
+        pen = QtGui.QPen(palette.color(QtGui.QPalette.Mid), 1, Qt.DashLine)
+        painter.setPen(pen)
+        painter.drawLine(point(sizes[0], 1.0), point(sizes[-1], linear))
+        painter.setPen(palette.color(QtGui.QPalette.Text))
+        painter.drawText(
+            QtCore.QRectF(rect.left(), rect.bottom() + 2, rect.width(), 20),
+            Qt.AlignLeft,
+            f"n = {sizes[0]}",
+        )
+        painter.drawText(
+            QtCore.QRectF(rect.left(), rect.bottom() + 2, rect.width(), 20),
+            Qt.AlignRight,
+            f"n = {sizes[-1]}",
+        )
+        for index, (ratios, color, name) in enumerate(curves):
+            if not ratios:
+                continue
+            painter.setPen(QtGui.QPen(color, 2))
+            points = [point(size, ratios[size]) for size in sorted(ratios)]
+            painter.drawPolyline(points)
+            for curve_point in points:
+                painter.drawEllipse(curve_point, 3, 3)
+            painter.drawText(rect.left() + 5, rect.top() + 15 * (index + 1), name)
+
+
+class SweepWidget(QtWidgets.QWidget):
+    """Display the growth of the time of each function and line."""
+
+    function_activated = QtCore.Signal(object)
+    line_activated = QtCore.Signal(str, int)
+
+    COL_NAME = 0
+    KEY_ROLE = Qt.UserRole + 2
+    SERIES_ROLE = Qt.UserRole + 3
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.sizes = []
+        self.setup_ui()
+
+    def setup_ui(self):
+        self.verticalLayout = QtWidgets.QVBoxLayout(self)
+        self.verticalLayout.setContentsMargins(0, 0, 0, 0)
+        self.summaryLabel = QtWidgets.QLabel(self)
+        self.summaryLabel.setWordWrap(True)
+        self.verticalLayout.addWidget(self.summaryLabel)
+        self.splitter = QtWidgets.QSplitter(Qt.Vertical, self)
+        self.sweepTree = QtWidgets.QTreeWidget(self.splitter)
+        self.sweepTree.setObjectName("sweepTree")
+        self.sweepTree.setFrameShape(QtWidgets.QFrame.NoFrame)
+        self.sweepTree.setUniformRowHeights(True)
+        self.scalingPlot = ScalingPlot(self.splitter)
+        self.verticalLayout.addWidget(self.splitter)
+        self.retranslate_ui()
+        QtCore.QMetaObject.connectSlotsByName(self)
+
+    def retranslate_ui(self):
+        self.summaryLabel.setText(
+            _("Profile the script for several input sizes to see how each line scales")
+        )
+
+    @property
+    def col_time_exponent(self):
+        return len(self.sizes) + 1
+
+    @property
+    def col_hits_exponent(self):
+        return len(self.sizes) + 2
+
+    @property
+    def col_complexity(self):
+        return len(self.sizes) + 3
+
+    def set_sweep(self, sizes, functions):
+        self.sizes = sizes
+        self.sweepTree.clear()
+        headers = [
+            _("Function / Line"),
+            *(_("Time (ms) n={size}").format(size=size) for size in sizes),
+            _("Time exponent"),
+            _("Hits exponent"),
+            _("Complexity"),
+        ]
+        self.sweepTree.setColumnCount(len(headers))
+        self.sweepTree.setHeaderLabels(headers)
+        self.sweepTree.setSortingEnabled(False)
+        superlinear = 0
+        for func_series in functions:
+            func_item = self.add_series(self.sweepTree.invisibleRootItem(), func_series)
+            for line_series in func_series.children:
+                self.add_series(func_item, line_series)
+                superlinear += line_series.superlinear
+            func_item.setExpanded(True)
+        self.sweepTree.setSortingEnabled(True)
+        self.sweepTree.sortByColumn(len(sizes), Qt.DescendingOrder)
+        for col in range(self.sweepTree.columnCount()):
+            self.sweepTree.resizeColumnToContents(col)
+        self.summaryLabel.setText(
+            _(
+                "{count} lines scale worse than linear over n = {sizes}"
+                " (time exponent above {threshold})"
+            ).format(
+                count=superlinear,
+                sizes=", ".join(str(size) for size in sizes),
+                threshold=SUPERLINEAR_EXPONENT,
+            )
+        )
+        self.scalingPlot.set_series(None)
+
+    def add_series(self, parent_item, series):
+        item = SortableTreeWidgetItem(parent_item)
+        item.setText(self.COL_NAME, series.name)
+        item.setData(self.COL_NAME, self.KEY_ROLE, series.key)
+        item.setData(self.COL_NAME, self.SERIES_ROLE, series)
+        for col, size in enumerate(self.sizes, 1):
+            if size in series.times:
+                item.setText(col, f"{series.times[size] * 1e3:.3f}")
+                item.setData(col, item.SORT_ROLE, series.times[size])
+            item.setTextAlignment(col, Qt.AlignRight)
+        for col, exponent in (
+            (self.col_time_exponent, series.time_exponent),
+            (self.col_hits_exponent, series.hits_exponent),
+        ):
+            if exponent is not None:
+                item.setText(col, f"{exponent:.2f}")
+                item.setData(col, item.SORT_ROLE, exponent)
+            item.setTextAlignment(col, Qt.AlignRight)
+        item.setText(self.col_complexity, complexity_label(series.time_exponent))
+        if series.superlinear:
+            for col in (self.col_time_exponent, self.col_complexity):
+                item.setBackground(col, SUPERLINEAR_COLOR)
+        return item
+
+    def item_series(self, item):
+        return item.data(self.COL_NAME, self.SERIES_ROLE)
+
+    @QtCore.Slot(QtWidgets.QTreeWidgetItem, QtWidgets.QTreeWidgetItem)
+    def on_sweepTree_currentItemChanged(self, current, previous):
+        self.scalingPlot.set_series(self.item_series(current) if current else None)
+
+    @QtCore.Slot(QtWidgets.QTreeWidgetItem, int)
+    def on_sweepTree_itemActivated(self, item, column):
+        key = item.data(self.COL_NAME, self.KEY_ROLE)
+        if item.parent() is None:
+            self.function_activated.emit(key)
+        else:
+            self.line_activated.emit(*key)
+
+
+class UiSweepDialog(QtWidgets.QDialog):
+    """Select the input sizes and where they go in the script arguments."""
+
+    def __init__(self, parent, config):
+        super().__init__(parent)
+        self.setup_ui()
+        args = config.args or ""
+        if SIZE_PLACEHOLDER not in args:
+            args = f"{args} {SIZE_PLACEHOLDER}".strip()
+        self.argsWidget.setText(args)
+        self.sizesWidget.setText("1000, 10000, 100000")
+
+    def setup_ui(self):
+        self.setModal(True)
+        self.formLayout = QtWidgets.QFormLayout(self)
+        self.argsLabel = QtWidgets.QLabel(self)
+        self.argsWidget = QtWidgets.QLineEdit(self)
+        self.argsWidget.setObjectName("argsWidget")
+        self.formLayout.addRow(self.argsLabel, self.argsWidget)
+        self.sizesLabel = QtWidgets.QLabel(self)
+        self.sizesWidget = QtWidgets.QLineEdit(self)
+        self.sizesWidget.setObjectName("sizesWidget")
+        self.formLayout.addRow(self.sizesLabel, self.sizesWidget)
+        self.buttonBox = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel, self
+        )
+        self.formLayout.addRow(self.buttonBox)
+        self.buttonBox.accepted.connect(self.accept)
+        self.buttonBox.rejected.connect(self.reject)
+        self.retranslate_ui()
+        QtCore.QMetaObject.connectSlotsByName(self)
+
+    def retranslate_ui(self):
+        self.setWindowTitle(_("Line Profiler GUI - Input size sweep"))
+        self.argsLabel.setText(_("Arguments"))
+        self.argsWidget.setToolTip(
+            _("Script arguments, where {n} is replaced by each input size")
+        )
+        self.sizesLabel.setText(_("Input sizes"))
+        self.sizesWidget.setToolTip(
+            _(
+                "Comma separated input sizes. The jobs are added to the run queue:"
+                " keep one parallel job for comparable timings."
+            )
+        )
+
+    def sizes(self):
+        try:
+            return parse_sizes(self.sizesWidget.text())
+        except ValueError:
+            return None
+
+    def template(self):
+        return self.argsWidget.text()
+
+    @QtCore.Slot(str)
+    def on_sizesWidget_textChanged(self, text):
+        self.buttonBox.button(QtWidgets.QDialogButtonBox.Ok).setEnabled(
+            self.sizes() is not None
+        )
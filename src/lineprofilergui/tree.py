@@ -10,12 +10,20 @@ import zlib
 from PySide6 import QtCore, QtGui, QtWidgets
 from PySide6.QtCore import Qt
 
-from .utils import MONOSPACE_FONT
+from .perf import PIPELINE
+from .utils import MONOSPACE_FONT, SortableTreeWidgetItem
 from .utils import translate as _
 
 
 def load_profile_data(filename):
     """Load line profiler data saved by kernprof module."""
+    with PIPELINE.phase("unpickle"), open(filename, "rb") as fid:
+        stats = pickle.load(fid)  # noqa: S301
+    return parse_profile_stats(stats)
+
+
+def parse_profile_stats(stats):
+    """Create the profile data from the unpickled line profiler stats."""
     # stats has the following layout :
     # stats.timings =
     #     {(filename1, line_no1, function_name1):
@@ -26,39 +34,205 @@ def load_profile_data(filename):
     #          (line_no2, hits2, total_time2),
     #          (line_no3, hits3, total_time3)]}
     # stats.unit = time_factor
-    with open(filename, "rb") as fid:
-        stats = pickle.load(fid)  # noqa: S301
+    # With the memory option of the profiling runner, stats.memory has the same
+    # layout as stats.timings with (line_no, allocated_bytes, allocations).
+    # With the sampling backend, the hits are the number of samples and
+    # stats.sampling_interval is set, in seconds.
+    # With the hits only option, the times are 0 and stats.hits_only is True.
+    # With the histograms option, stats.histograms has the same layout as
+    # stats.timings with (line_no, max_time, {bucket: hits}), see
+    # runner.histogram_bucket().
+    # With the CPU time option, stats.cpu_times has the same layout as
+    # stats.timings with (line_no, cpu_time).
+    # With the asyncio option, stats.asyncio has the same layout as
+    # stats.timings with (line_no, suspended_time, blocking_hits), and
+    # stats.blocking_threshold is set, in seconds.
+    # With the threads option, stats.threads has the layout of stats.timings
+    # for each thread name: {thread_name: timings}.
+    # With the calls option, stats.calls has the calls made by each line to
+    # the other profiled functions: {(filename1, line_no1, function_name1):
+    # [(line_no, (filename2, line_no2, function_name2), calls, total_time)]}.
+    # With the gc time option, stats.gc has the same layout as stats.timings
+    # with (line_no, collections, gc_time).
+    # The profiling runner also describes the run in stats.environment.
+    memory = getattr(stats, "memory", None)
+    histograms = getattr(stats, "histograms", None)
+    cpu_times = getattr(stats, "cpu_times", None)
+    asyncio_stats = getattr(stats, "asyncio", None)
+    calls = getattr(stats, "calls", None)
+    gc_stats = getattr(stats, "gc", None)
 
-    data = []
+    data = ProfileData()
+    data.has_memory = memory is not None
+    data.has_histograms = histograms is not None
+    data.has_cpu_times = cpu_times is not None
+    data.has_calls = calls is not None
+    data.has_gc = gc_stats is not None
+    data.blocking_threshold = getattr(stats, "blocking_threshold", None)
+    data.sampling_interval = getattr(stats, "sampling_interval", None)
+    data.hits_only = getattr(stats, "hits_only", False)
+    data.environment = dict(getattr(stats, "environment", {}))
     for func_info, func_stats in stats.timings.items():
         # func_info is a tuple containing (filename, line, function name)
-        func_data = FunctionData(func_info, func_stats, stats.unit)
+        memory_stats = None if memory is None else memory.get(func_info, [])
+        histogram_stats = None if histograms is None else histograms.get(func_info, [])
+        cpu_time_stats = None if cpu_times is None else cpu_times.get(func_info, [])
+        func_data = FunctionData(
+            func_info,
+            func_stats,
+            stats.unit,
+            memory_stats=memory_stats,
+            hits_only=data.hits_only,
+            histogram_stats=histogram_stats,
+            cpu_time_stats=cpu_time_stats,
+            asyncio_stats=(
+                None if asyncio_stats is None else asyncio_stats.get(func_info, [])
+            ),
+            calls_stats=None if calls is None else calls.get(func_info, []),
+            gc_stats=None if gc_stats is None else gc_stats.get(func_info, []),
+        )
         data.append(func_data)
+    for name, timings in sorted(getattr(stats, "threads", {}).items()):
+        data.threads[name] = ProfileData(
+            FunctionData(func_info, func_stats, stats.unit)
+            for func_info, func_stats in timings.items()
+        )
+    data.link_threads()
+    PIPELINE.count("functions", len(data))
     return data
 
 
+class ProfileData:
+    """Profiling results of a whole run, as a sequence of FunctionData.
+
+    This is not a list subclass, since Qt would convert it to a plain list
+    when stored as item data.
+    """
+
+    def __init__(self, functions=()):
+        self.functions = list(functions)
+        self.has_memory = False
+        self.has_histograms = False
+        self.has_cpu_times = False
+        self.has_calls = False
+        self.has_gc = False
+        # Set with the asyncio option
+        self.blocking_threshold = None
+        self.sampling_interval = None
+        self.hits_only = False
+        # Run environment, e.g. {"cpus": [0, 1], "gc_disabled": True}
+        self.environment = {}
+        # Resource usage of the profiled process, see process.ResourceMonitor
+        self.resources = None
+        # Function level profile when the functions were selected automatically
+        self.function_profile = None
+        # Results of each thread with the threads option, {name: ProfileData}
+        self.threads = {}
+
+    def append(self, func_data):
+        self.functions.append(func_data)
+
+    def link_threads(self):
+        """Give each line the matching lines of each thread, as LineData.thread_lines."""
+        lines = {
+            (func_data.func_id, line_data.line_no): line_data
+            for func_data in self
+            for line_data in func_data
+        }
+        for name, thread_data in self.threads.items():
+            for thread_func_data in thread_data:
+                for thread_line_data in thread_func_data:
+                    line_data = lines.get(
+                        (thread_func_data.func_id, thread_line_data.line_no)
+                    )
+                    if line_data is None or thread_line_data.hits is None:
+                        continue
+                    if line_data.thread_lines is None:
+                        line_data.thread_lines = []
+                    line_data.thread_lines.append((name, thread_line_data))
+
+    def __iter__(self):
+        yield from self.functions
+
+    def __len__(self):
+        return len(self.functions)
+
+    def __getitem__(self, index):
+        return self.functions[index]
+
+
 class FunctionData:
-    def __init__(self, func_info, stats, time_unit):
+    def __init__(  # noqa: PLR0913
+        self,
+        func_info,
+        stats,
+        time_unit,
+        *,
+        memory_stats=None,
+        hits_only=False,
+        histogram_stats=None,
+        cpu_time_stats=None,
+        asyncio_stats=None,
+        calls_stats=None,
+        gc_stats=None,
+    ):
         self.filename, self.start_line_no, self.name = func_info
         self.filename = os.path.normpath(self.filename)
+        self.hits_only = hits_only
         self.total_time = 0.0
+        self.max_hits = 0
+        self.total_memory = None
+        self.max_memory = None
+        self.total_gc_time = None
         self.was_called = False
         self.time_unit = time_unit
 
-        self.load_code()
-        self.parse_stats(stats)
+        with PIPELINE.phase("source lookup"):
+            self.load_code()
+        with PIPELINE.phase("parse"):
+            self.parse_stats(stats)
+            if memory_stats is not None:
+                self.parse_memory_stats(memory_stats)
+            if histogram_stats is not None:
+                self.parse_histogram_stats(histogram_stats)
+            if cpu_time_stats is not None:
+                self.parse_cpu_time_stats(cpu_time_stats)
+            if asyncio_stats is not None:
+                self.parse_asyncio_stats(asyncio_stats)
+            if calls_stats is not None:
+                self.parse_calls_stats(calls_stats)
+            if gc_stats is not None:
+                self.parse_gc_stats(gc_stats)
+        PIPELINE.count("lines", len(self.line_data))
 
     @property
     def func_id(self):
         return (self.filename, self.name)
 
+    @property
+    def func_info(self):
+        """Unique identifier, even for the functions sharing a name in a file."""
+        return (self.filename, self.start_line_no, self.name)
+
     def load_code(self):
         # Note : linecache cache was checked at start of profiling
         # This way if the file has changed since the code ran there
         # is a chance that the correct version was in cache and we get
         # the correct lines.
         all_lines = linecache.getlines(self.filename)
-        self.code_lines = inspect.getblock(all_lines[self.start_line_no :])
+        block = inspect.getblock(all_lines[self.start_line_no - 1 :])
+
+        # The first line is the first decorator, if any. Decorators are skipped.
+        code_start_index = next(
+            (
+                index
+                for index, line in enumerate(block)
+                if line.lstrip().startswith(("def ", "async def "))
+            ),
+            0,
+        )
+        self.code_start_line_no = self.start_line_no + code_start_index
+        self.code_lines = block[code_start_index:]
 
     def parse_stats(self, stats):
         self.line_data = []
@@ -66,7 +240,7 @@ class FunctionData:
         self.was_called = False
         next_stat_index = 0
         for func_line_no, code_line_raw in enumerate(self.code_lines):
-            line_no = func_line_no + self.start_line_no + 1  # Lines start at 1
+            line_no = func_line_no + self.code_start_line_no
             code_line = code_line_raw.rstrip()
 
             # stats contains data for runned lines only : (line_no, hits, total_time)
@@ -78,12 +252,82 @@ class FunctionData:
                 hits, line_total_time = stats[next_stat_index][1:]
                 line_total_time *= self.time_unit
                 self.total_time += line_total_time
+                self.max_hits = max(self.max_hits, hits)
                 next_stat_index += 1
                 self.was_called = True
             self.line_data.append(
                 LineData(self, line_no, code_line, line_total_time, hits)
             )
 
+    def parse_memory_stats(self, memory_stats):
+        memory_stats = {line_no: stats for line_no, *stats in memory_stats}
+        self.total_memory = 0
+        self.max_memory = 0
+        for line_data in self.line_data:
+            if line_data.hits is None:
+                continue
+            line_data.memory, line_data.allocs = memory_stats.get(
+                line_data.line_no, (0, 0)
+            )
+            self.total_memory += line_data.memory
+            self.max_memory = max(self.max_memory, line_data.memory)
+
+    def parse_histogram_stats(self, histogram_stats):
+        histogram_stats = {
+            line_no: (max_time, histogram)
+            for line_no, max_time, histogram in histogram_stats
+        }
+        for line_data in self.line_data:
+            if line_data.hits is None or line_data.line_no not in histogram_stats:
+                continue
+            max_time, line_data.histogram = histogram_stats[line_data.line_no]
+            line_data.max_time = max_time * self.time_unit
+
+    def parse_cpu_time_stats(self, cpu_time_stats):
+        cpu_time_stats = dict(cpu_time_stats)
+        for line_data in self.line_data:
+            if line_data.hits is None:
+                continue
+            cpu_time = cpu_time_stats.get(line_data.line_no, 0)
+            line_data.cpu_time = cpu_time * self.time_unit
+
+    def parse_asyncio_stats(self, asyncio_stats):
+        asyncio_stats = {line_no: stats for line_no, *stats in asyncio_stats}
+        for line_data in self.line_data:
+            if line_data.hits is None:
+                continue
+            suspended_time, line_data.blocking = asyncio_stats.get(
+                line_data.line_no, (0, 0)
+            )
+            line_data.suspended_time = suspended_time * self.time_unit
+
+    def parse_calls_stats(self, calls_stats):
+        callees = {}
+        for line_no, (filename, first_line, name), calls, total_time in calls_stats:
+            func_info = (os.path.normpath(filename), first_line, name)
+            callees.setdefault(line_no, []).append(
+                (func_info, calls, total_time * self.time_unit)
+            )
+        for line_data in self.line_data:
+            if line_data.hits is None:
+                continue
+            line_data.callees = callees.get(line_data.line_no, [])
+            # The callee times are included in the line time
+            callees_time = sum(
+                total_time for _func_info, _calls, total_time in line_data.callees
+            )
+            line_data.self_time = max(line_data.total_time - callees_time, 0.0)
+
+    def parse_gc_stats(self, gc_stats):
+        gc_stats = {line_no: stats for line_no, *stats in gc_stats}
+        self.total_gc_time = 0.0
+        for line_data in self.line_data:
+            if line_data.hits is None:
+                continue
+            line_data.gc_collections, gc_time = gc_stats.get(line_data.line_no, (0, 0))
+            line_data.gc_time = gc_time * self.time_unit
+            self.total_gc_time += line_data.gc_time
+
     @functools.cached_property
     def color(self):
         """Choose deteministic unique color for the function."""
@@ -110,7 +354,32 @@ class FunctionData:
 
 
 class LineData:
-    __slots__ = ["_func_data", "line_no", "code", "total_time", "hits", "filename"]
+    __slots__ = [
+        "_func_data",
+        "line_no",
+        "code",
+        "total_time",
+        "hits",
+        "filename",
+        "memory",
+        "allocs",
+        "max_time",
+        "histogram",
+        "cpu_time",
+        "suspended_time",
+        "blocking",
+        "thread_lines",
+        "self_time",
+        "callees",
+        "gc_collections",
+        "gc_time",
+    ]
+
+    HISTOGRAM_WIDTH = 30  # Characters of the longest bar
+
+    MEMORY_COLOR = QtGui.QColor.fromRgb(255, 64, 160)
+    WAIT_COLOR = QtGui.QColor.fromRgb(64, 128, 255)
+    BLOCKING_COLOR = QtGui.QBrush(QtGui.QColor.fromRgb(255, 0, 0, 160))
 
     def __init__(self, func_data, line_no, code, total_time, hits):  # noqa: PLR0913
         self._func_data = func_data
@@ -119,6 +388,25 @@ class LineData:
         self.total_time = total_time
         self.hits = hits
         self.filename = func_data.filename
+        # Only recorded with the memory option
+        self.memory = None
+        self.allocs = None
+        # Only recorded with the histograms option, {bucket: hits}
+        self.max_time = None
+        self.histogram = None
+        # Only recorded with the CPU time option
+        self.cpu_time = None
+        # Only recorded with the asyncio option
+        self.suspended_time = None
+        self.blocking = None
+        # Only recorded with the threads option, [(thread_name, LineData)]
+        self.thread_lines = None
+        # Only recorded with the calls option, [(callee func_info, calls, time)]
+        self.self_time = None
+        self.callees = None
+        # Only recorded with the gc time option
+        self.gc_collections = None
+        self.gc_time = None
 
     @property
     def percent_str(self):
@@ -141,10 +429,172 @@ class LineData:
     def hits_str(self):
         return "" if self.hits is None else str(self.hits)
 
+    @property
+    def memory_str(self):
+        return "" if self.memory is None else f"{self.memory / 1024:.1f}"
+
+    @property
+    def allocs_str(self):
+        return "" if self.allocs is None else str(self.allocs)
+
+    def percentile(self, percent):
+        """Duration of a hit at the given percentile, in seconds.
+
+        The middle of the histogram bucket is returned, so the precision is
+        the width of the buckets.
+        """
+        if not self.histogram:
+            return None
+        from .runner import histogram_bucket_bounds  # noqa: PLC0415, lazy startup
+
+        threshold = self.hits * percent / 100
+        count = 0
+        for bucket in sorted(self.histogram):
+            count += self.histogram[bucket]
+            if count >= threshold:
+                break
+        low, high = histogram_bucket_bounds(bucket)
+        return min((low + high) / 2 * self._func_data.time_unit, self.max_time)
+
+    def percentile_str(self, percent):
+        duration = self.percentile(percent)
+        return "" if duration is None else f"{duration * 1e3:.3f}"
+
+    @property
+    def max_time_str(self):
+        return "" if self.max_time is None else f"{self.max_time * 1e3:.3f}"
+
+    @property
+    def histogram_html(self):
+        """Text histogram of the hit durations, for the tooltips."""
+        if not self.histogram:
+            return ""
+        from .runner import histogram_bucket_bounds  # noqa: PLC0415, lazy startup
+
+        time_unit = self._func_data.time_unit
+        max_hits = max(self.histogram.values())
+        rows = []
+        for bucket in sorted(self.histogram):
+            hits = self.histogram[bucket]
+            low, high = histogram_bucket_bounds(bucket)
+            bar = "█" * max(1, round(self.HISTOGRAM_WIDTH * hits / max_hits))
+            rows.append(
+                f"{low * time_unit * 1e3:10.4f} - {high * time_unit * 1e3:10.4f} ms"
+                f"  {bar} {hits}"
+            )
+        return "<pre>{}</pre>".format("\n".join(rows))
+
+    @property
+    def cpu_time_str(self):
+        return "" if self.cpu_time is None else f"{self.cpu_time * 1e3:.3f}"
+
+    @property
+    def wait_ratio(self):
+        """Fraction of the wall time not spent running on a CPU."""
+        if self.cpu_time is None or not self.total_time:
+            return None
+        return min(max(1 - self.cpu_time / self.total_time, 0.0), 1.0)
+
+    @property
+    def wait_str(self):
+        wait_ratio = self.wait_ratio
+        return "" if wait_ratio is None else f"{100 * wait_ratio:.1f}"
+
+    @property
+    def wait_color(self):
+        """More opaque for the lines waiting a lot, weighted by their time."""
+        color = QtGui.QColor(self.WAIT_COLOR)  # Makes a copy
+        ratio = self.wait_ratio or 0.0
+        if self._func_data.total_time > 0:
+            ratio *= math.log10(9 * self.total_time / self._func_data.total_time + 1)
+        color.setAlphaF(ratio)
+        return QtGui.QBrush(color)
+
+    @property
+    def suspended_str(self):
+        if self.suspended_time is None:
+            return ""
+        return f"{self.suspended_time * 1e3:.3f}"
+
+    @property
+    def blocking_str(self):
+        return "" if self.blocking is None else str(self.blocking)
+
+    @property
+    def threads_str(self):
+        return "" if self.thread_lines is None else str(len(self.thread_lines))
+
+    @property
+    def threads_html(self):
+        """Time and hits of each thread running the line, for the tooltips."""
+        if not self.thread_lines:
+            return ""
+        width = max(len(name) for name, _thread_line_data in self.thread_lines)
+        rows = []
+        for name, thread_line_data in sorted(
+            self.thread_lines, key=lambda thread: thread[1].total_time, reverse=True
+        ):
+            percent = (
+                100 * thread_line_data.total_time / self.total_time
+                if self.total_time
+                else 0.0
+            )
+            rows.append(
+                f"{name:<{width}}  {thread_line_data.total_time * 1e3:10.3f} ms"
+                f"  {percent:5.1f} %  {thread_line_data.hits} hits"
+            )
+        return "<pre>{}</pre>".format("\n".join(rows))
+
+    @property
+    def self_time_str(self):
+        return "" if self.self_time is None else f"{self.self_time * 1e3:.3f}"
+
+    @property
+    def callees_str(self):
+        if not self.callees:
+            return ""
+        return ", ".join(name for (*_func_info, name), _calls, _time in self.callees)
+
+    @property
+    def callees_html(self):
+        """Calls and time of each profiled function called, for the tooltips."""
+        if not self.callees:
+            return ""
+        width = max(len(name) for (*_func_info, name), _calls, _time in self.callees)
+        rows = [
+            f"{name:<{width}}  {total_time * 1e3:10.3f} ms  {calls} calls"
+            for (*_func_info, name), calls, total_time in self.callees
+        ]
+        return "<pre>{}</pre>".format("\n".join(rows))
+
+    @property
+    def gc_time_str(self):
+        return "" if self.gc_time is None else f"{self.gc_time * 1e3:.3f}"
+
+    @property
+    def gc_html(self):
+        if not self.gc_collections:
+            return ""
+        return _("{collections} garbage collections").format(
+            collections=self.gc_collections
+        )
+
+    @property
+    def memory_color(self):
+        color = QtGui.QColor(self.MEMORY_COLOR)  # Makes a copy
+        if self._func_data.max_memory:
+            ratio = self.memory / self._func_data.max_memory
+        else:
+            ratio = 0
+        color.setAlphaF(math.log10(9 * ratio + 1))
+        return QtGui.QBrush(color)
+
     @property
     def color(self):
         color = QtGui.QColor(self._func_data.color)  # Makes a copy
-        if self._func_data.total_time > 0:
+        if self._func_data.hits_only:
+            ratio = self.hits / self._func_data.max_hits
+        elif self._func_data.total_time > 0:
             ratio = self.total_time / self._func_data.total_time
         else:
             ratio = 0
@@ -156,6 +606,11 @@ class LineData:
 class ResultsTreeWidget(QtWidgets.QTreeWidget):
     """Tree widget to view line_profiler results."""
 
+    # func_id of the function of the current item
+    function_selected = QtCore.Signal(object)
+    # (filename, line_no) of the current item, the first line for a function
+    line_selected = QtCore.Signal(str, int)
+
     column_header_text = [
         _("Line #"),
         _("Hits"),
@@ -163,6 +618,20 @@ class ResultsTreeWidget(QtWidgets.QTreeWidget):
         _("Per Hit (ms)"),
         _("% Time"),
         _("Line Contents"),
+        _("Memory (KiB)"),
+        _("Allocations"),
+        _("p50 (ms)"),
+        _("p95 (ms)"),
+        _("p99 (ms)"),
+        _("Max (ms)"),
+        _("CPU (ms)"),
+        _("Wait %"),
+        _("Suspended (ms)"),
+        _("Blocking"),
+        _("Threads"),
+        _("Self (ms)"),
+        _("Calls"),
+        _("GC time (ms)"),
     ]
     COL_0 = 0
     COL_NO = 0
@@ -171,12 +640,55 @@ class ResultsTreeWidget(QtWidgets.QTreeWidget):
     COL_PERHIT = 3
     COL_PERCENT = 4
     COL_LINE = 5
+    COL_MEMORY = 6
+    COL_ALLOCS = 7
+    COL_P50 = 8
+    COL_P95 = 9
+    COL_P99 = 10
+    COL_MAX = 11
+    PERCENTILE_COLUMNS = {COL_P50: 50, COL_P95: 95, COL_P99: 99}
+    COL_CPU = 12
+    COL_WAIT = 13
+    COL_SUSPENDED = 14
+    COL_BLOCKING = 15
+    COL_THREADS = 16
+    COL_SELF = 17
+    COL_CALLS = 18
+    COL_GC = 19
+    # LineData property of the tooltip of each column, see line_tooltip()
+    LINE_TOOLTIPS = {
+        **dict.fromkeys((*PERCENTILE_COLUMNS, COL_MAX), "histogram_html"),
+        COL_THREADS: "threads_html",
+        COL_CALLS: "callees_html",
+        COL_GC: "gc_html",
+    }
+    # Line columns whose text is not centered
+    LEFT_COLUMNS = (COL_NO, COL_LINE, COL_CALLS)
+    # Looking up the Qt enum members is slow, these are used for each line
+    USER_ROLE = Qt.UserRole
+    DISPLAY_ROLE = Qt.DisplayRole
+    FONT_ROLE = Qt.FontRole
+    BACKGROUND_ROLE = Qt.BackgroundRole
+    FOREGROUND_ROLE = Qt.ForegroundRole
+    ALIGN_CENTER = Qt.AlignCenter
     COL_FILE_LINE = 0  # Not displayed but used to store data as Qt.UserRole
+    # func_info of the function items, in COL_0
+    FUNC_INFO_ROLE = Qt.UserRole + 2
 
     CODE_NOT_RUN_COLOR = QtGui.QBrush(QtGui.QColor.fromRgb(128, 128, 128, 200))
 
     def __init__(self, parent):
         super().__init__(parent)
+        self.memory_columns_visible = False
+        self.latency_columns_visible = False
+        self.cpu_columns_visible = False
+        self.asyncio_columns_visible = False
+        self.threads_columns_visible = False
+        self.calls_columns_visible = False
+        self.gc_columns_visible = False
+        self.time_columns_visible = True
+        # Columns filled for the loaded profile, see displayed_columns()
+        self.filled_columns = []
         self.setup_ui()
 
         self.profiledata = None
@@ -188,15 +700,23 @@ class ResultsTreeWidget(QtWidgets.QTreeWidget):
         self.setColumnCount(len(self.column_header_text))
         self.setHeaderLabels(self.column_header_text)
         self.header().setDefaultAlignment(Qt.AlignCenter)
+        # The line contents stay the last, stretched, column
+        self.header().moveSection(self.COL_LINE, self.columnCount() - 1)
         self.setProperty("showDropIndicator", False)
         self.setUniformRowHeights(True)
-        self.setSortingEnabled(False)
+        self.setSortingEnabled(True)
+        self.sortByColumn(self.COL_NO, Qt.AscendingOrder)
         self.setItemsExpandable(True)
         self.setDragEnabled(False)
+        # Calls column, linked to the blocks of the called functions
+        self.link_font = QtGui.QFont(self.font())
+        self.link_font.setUnderline(True)
 
         self.itemActivated.connect(self.item_activated)
+        self.itemClicked.connect(self.item_clicked)
         self.itemCollapsed.connect(self.item_collapsed)
         self.itemExpanded.connect(self.item_expanded)
+        self.currentItemChanged.connect(self.current_item_changed)
 
         self.updateColonsVisible()
 
@@ -206,24 +726,70 @@ class ResultsTreeWidget(QtWidgets.QTreeWidget):
         scrollbar = self.verticalScrollBar()
         scroll = scrollbar.value()
 
-        # Fill the widget with the profile data
-        self.populate_tree(profiledata)
+        self.memory_columns_visible = bool(profiledata and profiledata.has_memory)
+        self.latency_columns_visible = bool(profiledata and profiledata.has_histograms)
+        self.cpu_columns_visible = bool(profiledata and profiledata.has_cpu_times)
+        self.asyncio_columns_visible = bool(
+            profiledata and profiledata.blocking_threshold is not None
+        )
+        if self.asyncio_columns_visible:
+            self.headerItem().setToolTip(
+                self.COL_BLOCKING,
+                _(
+                    "Number of hits blocking the event loop,"
+                    " executing for more than {threshold:g}ms"
+                ).format(threshold=profiledata.blocking_threshold * 1e3),
+            )
+        self.threads_columns_visible = bool(profiledata and profiledata.threads)
+        self.calls_columns_visible = bool(profiledata and profiledata.has_calls)
+        self.gc_columns_visible = bool(profiledata and profiledata.has_gc)
+        self.time_columns_visible = not (profiledata and profiledata.hits_only)
+        self.updateColonsVisible()
+        sampled = bool(profiledata and profiledata.sampling_interval)
+        self.headerItem().setText(self.COL_HITS, _("Samples") if sampled else _("Hits"))
+        self.headerItem().setText(
+            self.COL_PERHIT, _("Per Sample (ms)") if sampled else _("Per Hit (ms)")
+        )
+
+        # Items are sorted once filled, instead of at each insertion
+        self.setSortingEnabled(False)
+
+        # Update the existing items in place if possible, to keep the expanded,
+        # selected and scrolled state without the cost of a full rebuild
+        columns = self.displayed_columns()
+        columns_changed = columns != self.filled_columns
+        self.filled_columns = columns
+        with PIPELINE.phase("update"):
+            updated = not columns_changed and self.update_tree(profiledata)
+        if not updated:
+            # Fill the widget with the profile data
+            with PIPELINE.phase("populate"):
+                self.populate_tree(profiledata)
+
+        with PIPELINE.phase("sort"):
+            self.setSortingEnabled(True)
+        if updated:
+            scrollbar.setValue(scroll)
+            return
 
         # Adjust column width to fit all content
         self.lock_expanded_tracking = True
-        self.expandAll()
+        with PIPELINE.phase("expand"):
+            self.expandAll()
         self.lock_expanded_tracking = False
-        for col in range(self.columnCount() - 1):
-            self.resizeColumnToContents(col)
+        with PIPELINE.phase("resize columns"):
+            for col in self.resizable_columns():
+                self.resizeColumnToContents(col)
 
         # Restore expanded state for each function
         root = self.invisibleRootItem()
         if self.topLevelItemCount() > 1:
             self.lock_expanded_tracking = True
-            for index in range(root.childCount()):
-                item = root.child(index)
-                func_id = item.data(self.COL_FILE_LINE, Qt.UserRole)
-                item.setExpanded(func_id in self.expanded_functions)
+            with PIPELINE.phase("restore expansion"):
+                for index in range(root.childCount()):
+                    item = root.child(index)
+                    func_id = item.data(self.COL_FILE_LINE, Qt.UserRole)
+                    item.setExpanded(func_id in self.expanded_functions)
             self.lock_expanded_tracking = False
         else:
             # Since we forced the function to be expanded, store it for consistency
@@ -246,55 +812,337 @@ class ResultsTreeWidget(QtWidgets.QTreeWidget):
             )
             return
 
-        for func_data in profiledata:
-            # Function name and position
-            func_item = QtWidgets.QTreeWidgetItem(self)
-            func_item.setData(
-                self.COL_0,
-                Qt.DisplayRole,
-                _(
-                    '{func_name} ({time_ms:.3f}ms) in file "{filename}", line {line_no}'
-                ).format(
-                    filename=func_data.filename,
-                    line_no=func_data.start_line_no,
-                    func_name=func_data.name,
-                    time_ms=func_data.total_time * 1e3,
-                ),
+        for index, func_data in enumerate(profiledata):
+            func_item = SortableTreeWidgetItem(self)
+            self.fill_function_item(func_item, func_data, index)
+            PIPELINE.count("items", 1 + func_item.childCount())
+
+    def update_tree(self, profiledata):
+        """Reconcile the existing items with new profile data.
+
+        Items are matched by function info and line numbers, so that only the
+        cells whose content changed are updated. Return False if the tree has
+        to be rebuilt from scratch.
+        """
+        root = self.invisibleRootItem()
+        current_items = {}
+        for index in range(root.childCount()):
+            item = root.child(index)
+            func_info = item.data(self.COL_0, self.FUNC_INFO_ROLE)
+            if func_info is None:
+                # Warning message
+                return False
+            current_items[func_info] = item
+        if not profiledata or not current_items:
+            return False
+
+        widened_columns = set()
+        items = []
+        for index, func_data in enumerate(profiledata):
+            func_item = current_items.pop(func_data.func_info, None)
+            if func_item is None:
+                # New function
+                func_item = SortableTreeWidgetItem()
+                self.fill_function_item(func_item, func_data, index)
+                PIPELINE.count("items", 1 + func_item.childCount())
+            elif [line_data.line_no for line_data in func_data] != [
+                func_item.child(index).data(self.COL_NO, Qt.DisplayRole)
+                for index in range(func_item.childCount())
+            ]:
+                # The code of the function changed
+                func_item.takeChildren()
+                self.fill_function_item(func_item, func_data, index)
+                PIPELINE.count("items", 1 + func_item.childCount())
+                widened_columns.update(self.resizable_columns())
+            else:
+                self.fill_function_item(func_item, func_data, index, widened_columns)
+                PIPELINE.count("updated items", 1 + func_item.childCount())
+            items.append(func_item)
+
+        # Removed functions
+        for func_item in current_items.values():
+            root.removeChild(func_item)
+
+        # Insert new functions and restore the order if needed
+        self.lock_expanded_tracking = True
+        if self.reorder_function_items(items):
+            widened_columns.update(self.resizable_columns())
+        self.lock_expanded_tracking = False
+
+        with PIPELINE.phase("resize columns"):
+            for col in sorted(widened_columns):
+                self.resizeColumnToContents(col)
+        return True
+
+    def reorder_function_items(self, items):
+        """Move or insert function items in the given order.
+
+        The expanded and selected states of moved items are kept.
+        Return True if new items were inserted.
+        """
+        root = self.invisibleRootItem()
+        inserted = False
+        for index, func_item in enumerate(items):
+            if root.indexOfChild(func_item) == index:
+                continue
+            is_new = func_item.treeWidget() is None
+            if not is_new:
+                expanded = func_item.isExpanded()
+                selected = func_item.isSelected()
+                root.removeChild(func_item)
+            root.insertChild(index, func_item)
+            func_item.setFirstColumnSpanned(True)
+            if is_new:
+                func_id = func_item.data(self.COL_FILE_LINE, Qt.UserRole)
+                func_item.setExpanded(func_id in self.expanded_functions)
+                inserted = True
+            else:
+                func_item.setExpanded(expanded)
+                func_item.setSelected(selected)
+        return inserted
+
+    def resizable_columns(self):
+        """All the columns but the line contents, which is stretched."""
+        return [col for col in range(self.columnCount()) if col != self.COL_LINE]
+
+    def fill_function_item(self, func_item, func_data, index, widened_columns=None):
+        """Fill a function item and its lines of code.
+
+        ``index`` is the position of the function in the profile data, used to
+        sort the functions by line number. If ``widened_columns`` is given, the
+        cells of the existing line items are only updated if they changed, and
+        the columns whose content became wider are added to it.
+        """
+        # Function name and position
+        if func_data.hits_only:
+            text = _('{func_name} in file "{filename}", line {line_no}')
+        elif func_data.total_gc_time is not None:
+            text = _(
+                "{func_name} ({time_ms:.3f}ms, GC {gc_time_ms:.3f}ms)"
+                ' in file "{filename}", line {line_no}'
             )
-            func_item.setData(self.COL_0, Qt.UserRole, func_data.func_id)
+        else:
+            text = _(
+                '{func_name} ({time_ms:.3f}ms) in file "{filename}", line {line_no}'
+            )
+        func_item.setData(
+            self.COL_0,
+            Qt.DisplayRole,
+            text.format(
+                filename=func_data.filename,
+                line_no=func_data.start_line_no,
+                func_name=func_data.name,
+                time_ms=func_data.total_time * 1e3,
+                gc_time_ms=(func_data.total_gc_time or 0.0) * 1e3,
+            ),
+        )
+        func_item.setData(self.COL_0, Qt.UserRole, func_data.func_id)
+        func_item.setData(self.COL_0, self.FUNC_INFO_ROLE, func_data.func_info)
+        if func_item.treeWidget() is not None:
             func_item.setFirstColumnSpanned(True)
-            if not func_data.was_called:
-                func_item.setForeground(self.COL_0, self.CODE_NOT_RUN_COLOR)
+        func_item.setData(
+            self.COL_0,
+            Qt.ForegroundRole,
+            None if func_data.was_called else self.CODE_NOT_RUN_COLOR,
+        )
+        sort_role = SortableTreeWidgetItem.SORT_ROLE
+        func_item.setData(self.COL_NO, sort_role, index)
+        for col in (self.COL_TIME, self.COL_PERHIT, self.COL_PERCENT):
+            func_item.setData(col, sort_role, func_data.total_time)
+        func_item.setData(self.COL_MEMORY, sort_role, func_data.total_memory)
+        func_item.setData(self.COL_GC, sort_role, func_data.total_gc_time)
 
-            # Lines of code
-            for line_data in func_data:
-                line_item = QtWidgets.QTreeWidgetItem(func_item)
+        # Lines of code
+        for line_index, line_data in enumerate(func_data):
+            if widened_columns is None:
+                line_item = LineTreeWidgetItem(func_item, line_data)
+                self.init_line_item(line_item, line_data)
                 self.fill_line_item(line_item, line_data)
+                self.color_line_item(line_item, line_data)
+            else:
+                line_item = func_item.child(line_index)
+                if self.update_line_item(line_item, line_data, widened_columns):
+                    self.uncolor_line_item(line_item)
+                    self.color_line_item(line_item, line_data)
 
-                # Color background
-                if line_data.total_time is not None:
-                    color = line_data.color
-                    for col in range(self.columnCount()):
-                        line_item.setBackground(col, color)
-                else:
-                    for col in range(self.columnCount()):
-                        line_item.setForeground(col, self.CODE_NOT_RUN_COLOR)
+    def displayed_columns(self):
+        """Return the columns displayed for the loaded profile.
 
-    def fill_line_item(self, item, line_data):
+        Only these columns of the line items are filled and colored.
+        """
+        columns = [self.COL_NO, self.COL_HITS, self.COL_LINE]
+        if self.time_columns_visible:
+            columns += [self.COL_TIME, self.COL_PERHIT, self.COL_PERCENT]
+        if self.memory_columns_visible:
+            columns += [self.COL_MEMORY, self.COL_ALLOCS]
+        if self.latency_columns_visible:
+            columns += [*self.PERCENTILE_COLUMNS, self.COL_MAX]
+        if self.cpu_columns_visible:
+            columns += [self.COL_CPU, self.COL_WAIT]
+        if self.asyncio_columns_visible:
+            columns += [self.COL_SUSPENDED, self.COL_BLOCKING]
+        if self.threads_columns_visible:
+            columns.append(self.COL_THREADS)
+        if self.calls_columns_visible:
+            columns += [self.COL_SELF, self.COL_CALLS]
+        if self.gc_columns_visible:
+            columns.append(self.COL_GC)
+        return columns
+
+    def init_line_item(self, item, line_data):
+        """Set the parts of a new line item which do not depend on the stats."""
         item.setData(
-            self.COL_FILE_LINE, Qt.UserRole, (line_data.filename, line_data.line_no)
+            self.COL_FILE_LINE,
+            self.USER_ROLE,
+            (line_data.filename, line_data.line_no),
         )
-        item.setData(self.COL_NO, Qt.DisplayRole, line_data.line_no)
-        item.setData(self.COL_PERCENT, Qt.DisplayRole, line_data.percent_str)
-        item.setTextAlignment(self.COL_PERCENT, Qt.AlignCenter)
-        item.setData(self.COL_TIME, Qt.DisplayRole, line_data.time_str)
-        item.setTextAlignment(self.COL_TIME, Qt.AlignCenter)
-        item.setData(self.COL_PERHIT, Qt.DisplayRole, line_data.per_hit_str)
-        item.setTextAlignment(self.COL_PERHIT, Qt.AlignCenter)
-        item.setData(self.COL_HITS, Qt.DisplayRole, line_data.hits_str)
-        item.setTextAlignment(self.COL_HITS, Qt.AlignCenter)
-        item.setData(self.COL_LINE, Qt.DisplayRole, line_data.code)
         item.setFont(self.COL_LINE, MONOSPACE_FONT)
+        align_center = self.ALIGN_CENTER
+        for col in self.filled_columns:
+            if col not in self.LEFT_COLUMNS:
+                item.setTextAlignment(col, align_center)
+
+    def line_cells(self, line_data):
+        """Return the ``(column, text, sort value)`` of the displayed cells.
+
+        The lines which didn't run are sorted as zeros.
+        """
+        cells = [
+            (self.COL_NO, line_data.line_no, line_data.line_no),
+            (self.COL_HITS, line_data.hits_str, line_data.hits or 0),
+            (self.COL_LINE, line_data.code, None),
+        ]
+        if self.time_columns_visible:
+            total_time = line_data.total_time or 0.0
+            per_hit = total_time / line_data.hits if line_data.hits else 0.0
+            cells += [
+                (self.COL_TIME, line_data.time_str, total_time),
+                (self.COL_PERHIT, line_data.per_hit_str, per_hit),
+                (self.COL_PERCENT, line_data.percent_str, total_time),
+            ]
+        if self.memory_columns_visible:
+            cells += [
+                (self.COL_MEMORY, line_data.memory_str, line_data.memory or 0),
+                (self.COL_ALLOCS, line_data.allocs_str, line_data.allocs or 0),
+            ]
+        if self.latency_columns_visible:
+            for col, percent in self.PERCENTILE_COLUMNS.items():
+                duration = line_data.percentile(percent)
+                text = "" if duration is None else f"{duration * 1e3:.3f}"
+                cells.append((col, text, duration or 0.0))
+            cells.append(
+                (self.COL_MAX, line_data.max_time_str, line_data.max_time or 0.0)
+            )
+        if self.cpu_columns_visible:
+            cells += [
+                (self.COL_CPU, line_data.cpu_time_str, line_data.cpu_time or 0.0),
+                (self.COL_WAIT, line_data.wait_str, line_data.wait_ratio or 0.0),
+            ]
+        if self.asyncio_columns_visible:
+            cells += [
+                (
+                    self.COL_SUSPENDED,
+                    line_data.suspended_str,
+                    line_data.suspended_time or 0.0,
+                ),
+                (self.COL_BLOCKING, line_data.blocking_str, line_data.blocking or 0),
+            ]
+        if self.threads_columns_visible:
+            cells.append(
+                (
+                    self.COL_THREADS,
+                    line_data.threads_str,
+                    len(line_data.thread_lines or ()),
+                )
+            )
+        if self.calls_columns_visible:
+            cells += [
+                (self.COL_SELF, line_data.self_time_str, line_data.self_time or 0.0),
+                (self.COL_CALLS, line_data.callees_str, len(line_data.callees or ())),
+            ]
+        if self.gc_columns_visible:
+            cells.append((self.COL_GC, line_data.gc_time_str, line_data.gc_time or 0.0))
+        return cells
+
+    def fill_line_item(self, item, line_data):
+        """Fill the displayed cells of a line item."""
+        item.line_data = line_data
+        display_role = self.DISPLAY_ROLE
+        sort_role = SortableTreeWidgetItem.SORT_ROLE
+        for col, text, sort_value in self.line_cells(line_data):
+            item.setData(col, display_role, text)
+            if sort_value is not None:
+                item.setData(col, sort_role, sort_value)
+        if self.calls_columns_visible:
+            self.set_callees(item, line_data.callees)
+
+    def update_line_item(self, item, line_data, widened_columns):
+        """Update the cells of a line item whose content changed.
+
+        The columns whose text became wider are added to ``widened_columns``.
+        Return True if the item has to be colored again.
+        """
+        item.line_data = line_data
+        display_role = self.DISPLAY_ROLE
+        sort_role = SortableTreeWidgetItem.SORT_ROLE
+        changed = False
+        for col, text, sort_value in self.line_cells(line_data):
+            old_text = item.data(col, display_role)
+            if old_text != text:
+                item.setData(col, display_role, text)
+                if col != self.COL_LINE and len(str(text)) > len(str(old_text)):
+                    widened_columns.add(col)
+                changed = True
+            if sort_value is not None and item.data(col, sort_role) != sort_value:
+                item.setData(col, sort_role, sort_value)
+                changed = True
+        if (
+            self.calls_columns_visible
+            and item.data(self.COL_CALLS, self.USER_ROLE) != line_data.callees
+        ):
+            self.set_callees(item, line_data.callees)
+            changed = True
+        if changed:
+            return True
+        # The color also depends on the time of the whole function
+        background = None if line_data.total_time is None else line_data.color
+        return item.data(self.COL_NO, self.BACKGROUND_ROLE) != background
+
+    def set_callees(self, item, callees):
+        item.setData(self.COL_CALLS, self.USER_ROLE, callees)
+        item.setData(
+            self.COL_CALLS, self.FONT_ROLE, self.link_font if callees else None
+        )
+
+    def uncolor_line_item(self, item):
+        """Clear the colors of an updated line item, before coloring it again."""
+        background_role = self.BACKGROUND_ROLE
+        foreground_role = self.FOREGROUND_ROLE
+        for col in self.filled_columns:
+            item.setData(col, background_role, None)
+            item.setData(col, foreground_role, None)
+
+    def color_line_item(self, item, line_data):
+        """Color the displayed cells of a line item."""
+        if line_data.total_time is None:
+            for col in self.filled_columns:
+                item.setForeground(col, self.CODE_NOT_RUN_COLOR)
+            return
+        color = line_data.color
+        for col in self.filled_columns:
+            item.setBackground(col, color)
+        if self.memory_columns_visible and line_data.memory is not None:
+            # Memory heat map, independent from the time
+            memory_color = line_data.memory_color
+            for col in (self.COL_MEMORY, self.COL_ALLOCS):
+                item.setBackground(col, memory_color)
+        if self.cpu_columns_visible and line_data.cpu_time is not None:
+            # Waiting lines, independent from the time
+            item.setBackground(self.COL_WAIT, line_data.wait_color)
+        if self.asyncio_columns_visible and line_data.blocking:
+            item.setBackground(self.COL_BLOCKING, line_data.BLOCKING_COLOR)
+        if self.calls_columns_visible and line_data.callees:
+            item.setForeground(self.COL_CALLS, self.palette().link())
 
     def warning_message(self, text):
         warn_item = QtWidgets.QTreeWidgetItem(self)
@@ -311,6 +1159,45 @@ class ResultsTreeWidget(QtWidgets.QTreeWidget):
             self.setColumnHidden(
                 col, not settings.value(f"column{col+1}Visible", True, bool)
             )
+        for col in (self.COL_MEMORY, self.COL_ALLOCS):
+            self.setColumnHidden(col, not self.memory_columns_visible)
+        for col in (*self.PERCENTILE_COLUMNS, self.COL_MAX):
+            self.setColumnHidden(col, not self.latency_columns_visible)
+        for col in (self.COL_CPU, self.COL_WAIT):
+            self.setColumnHidden(col, not self.cpu_columns_visible)
+        for col in (self.COL_SUSPENDED, self.COL_BLOCKING):
+            self.setColumnHidden(col, not self.asyncio_columns_visible)
+        self.setColumnHidden(self.COL_THREADS, not self.threads_columns_visible)
+        for col in (self.COL_SELF, self.COL_CALLS):
+            self.setColumnHidden(col, not self.calls_columns_visible)
+        self.setColumnHidden(self.COL_GC, not self.gc_columns_visible)
+        if not self.time_columns_visible:
+            for col in (self.COL_TIME, self.COL_PERHIT, self.COL_PERCENT):
+                self.setColumnHidden(col, True)
+
+    def line_tooltip(self, item, column):
+        """Return the tooltip of a line cell, built from its LineData."""
+        name = self.LINE_TOOLTIPS.get(column)
+        line_data = getattr(item, "line_data", None)
+        if name is None or line_data is None:
+            return None
+        return getattr(line_data, name) or None
+
+    def viewportEvent(self, event):
+        # The costly tooltips are built when displayed instead of for each line
+        if event.type() == QtCore.QEvent.ToolTip:
+            item = self.itemAt(event.pos())
+            column = self.columnAt(event.pos().x())
+            if item is not None and column in self.LINE_TOOLTIPS:
+                tooltip = self.line_tooltip(item, column)
+                if tooltip:
+                    QtWidgets.QToolTip.showText(
+                        event.globalPos(), tooltip, self.viewport()
+                    )
+                else:
+                    QtWidgets.QToolTip.hideText()
+                return True
+        return super().viewportEvent(event)
 
     @QtCore.Slot(QtWidgets.QTreeWidgetItem)
     def item_activated(self, item):
@@ -341,6 +1228,33 @@ class ResultsTreeWidget(QtWidgets.QTreeWidget):
         except FileNotFoundError:
             subprocess.Popen(editor_command, shell=True)  # noqa: S602
 
+    @QtCore.Slot(QtWidgets.QTreeWidgetItem, int)
+    def item_clicked(self, item, column):
+        """Follow the link of a call line to the block of the called function."""
+        if column != self.COL_CALLS or item.isFirstColumnSpanned():
+            return
+        callees = item.data(self.COL_CALLS, Qt.UserRole)
+        if not callees:
+            return
+        if len(callees) == 1:
+            self.show_function_item(
+                self.function_item(callees[0][0], self.FUNC_INFO_ROLE)
+            )
+            return
+        menu = QtWidgets.QMenu(self)
+        for func_info, calls, total_time in callees:
+            action = menu.addAction(
+                _("{name} ({time_ms:.3f}ms, {calls} calls)").format(
+                    name=func_info[2], time_ms=total_time * 1e3, calls=calls
+                )
+            )
+            action.setData(func_info)
+        action = menu.exec(QtGui.QCursor.pos())
+        if action is not None:
+            self.show_function_item(
+                self.function_item(action.data(), self.FUNC_INFO_ROLE)
+            )
+
     @QtCore.Slot(QtWidgets.QTreeWidgetItem)
     def item_collapsed(self, item):
         # Skip child lines
@@ -356,3 +1270,63 @@ class ResultsTreeWidget(QtWidgets.QTreeWidget):
             return
         func_id = item.data(self.COL_FILE_LINE, Qt.UserRole)
         self.expanded_functions.add(func_id)
+
+    @QtCore.Slot(QtWidgets.QTreeWidgetItem, QtWidgets.QTreeWidgetItem)
+    def current_item_changed(self, current, previous):
+        if current is None:
+            return
+        func_item = current if current.isFirstColumnSpanned() else current.parent()
+        if func_item is None or func_item.data(self.COL_FILE_LINE, Qt.UserRole) is None:
+            # Warning message
+            return
+        self.function_selected.emit(func_item.data(self.COL_FILE_LINE, Qt.UserRole))
+        line_item = current if current is not func_item else func_item.child(0)
+        if line_item is not None:
+            self.line_selected.emit(*line_item.data(self.COL_FILE_LINE, Qt.UserRole))
+
+    def function_item(self, func_id, role=Qt.UserRole):
+        """Return the item of a function, by its func_id or by another role."""
+        root = self.invisibleRootItem()
+        for index in range(root.childCount()):
+            item = root.child(index)
+            if item.data(self.COL_FILE_LINE, role) == func_id:
+                return item
+        return None
+
+    @QtCore.Slot(str, int)
+    def select_line(self, filename, line_no):
+        """Select and show a profiled line, if any."""
+        root = self.invisibleRootItem()
+        for index in range(root.childCount()):
+            func_item = root.child(index)
+            func_id = func_item.data(self.COL_FILE_LINE, Qt.UserRole)
+            if func_id is None or func_id[0] != filename:
+                continue
+            for child_index in range(func_item.childCount()):
+                item = func_item.child(child_index)
+                if item.data(self.COL_FILE_LINE, Qt.UserRole) == (filename, line_no):
+                    if self.currentItem() is not item:
+                        func_item.setExpanded(True)
+                        self.setCurrentItem(item)
+                        self.scrollToItem(item)
+                    return
+
+    @QtCore.Slot(object)
+    def select_function(self, func_id):
+        """Expand, select and show the block of a function."""
+        self.show_function_item(self.function_item(func_id))
+
+    def show_function_item(self, item):
+        if item is None:
+            return
+        item.setExpanded(True)
+        self.setCurrentItem(item)
+        self.scrollToItem(item, QtWidgets.QAbstractItemView.PositionAtTop)
+
+
+class LineTreeWidgetItem(SortableTreeWidgetItem):
+    """Item of a line of code, keeping its LineData for the tooltips."""
+
+    def __init__(self, parent, line_data):
+        super().__init__(parent)
+        self.line_data = line_data
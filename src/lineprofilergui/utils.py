@@ -1,6 +1,7 @@
 from functools import partial
 
 from PySide6 import QtCore, QtGui, QtWidgets
+from PySide6.QtCore import Qt
 
 translate = partial(QtCore.QCoreApplication.translate, "self")
 
@@ -28,15 +29,49 @@ _ICON_IDS = {
     "WARNING": QtWidgets.QStyle.SP_MessageBoxWarning,  # actionShowOutput
     "ERROR": QtWidgets.QStyle.SP_MessageBoxCritical,  # actionReportBug
     "RUNNING": QtWidgets.QStyle.SP_BrowserReload,  # statusbar_running_indicator, actionShowOutput
+    "AUTOPROFILE": QtWidgets.QStyle.SP_MediaSeekForward,  # actionAutoProfile
 }
 
-ICONS = {}
-PIXMAPS = {}
 PIXMAP_SIZE = 16
 
 
+class _IconCache(dict):
+    """Create the standard icons on first use, to speed up the startup."""
+
+    def __missing__(self, key):
+        icon = QtWidgets.QApplication.style().standardIcon(_ICON_IDS[key])
+        self[key] = icon
+        return icon
+
+
+class _PixmapCache(dict):
+    def __missing__(self, key):
+        pixmap = ICONS[key].pixmap(PIXMAP_SIZE, PIXMAP_SIZE)
+        self[key] = pixmap
+        return pixmap
+
+
+ICONS = _IconCache()
+PIXMAPS = _PixmapCache()
+
+
 def icons_factory():
-    for k, v in _ICON_IDS.items():
-        icon = QtWidgets.QApplication.style().standardIcon(v)
-        ICONS[k] = icon
-        PIXMAPS[k] = icon.pixmap(PIXMAP_SIZE, PIXMAP_SIZE)
+    """Create all the icons at once, instead of on first use."""
+    ICONS.clear()
+    PIXMAPS.clear()
+    for k in _ICON_IDS:
+        PIXMAPS[k] = ICONS[k].pixmap(PIXMAP_SIZE, PIXMAP_SIZE)
+
+
+class SortableTreeWidgetItem(QtWidgets.QTreeWidgetItem):
+    """Tree item sorted by the value stored in SORT_ROLE, if any."""
+
+    SORT_ROLE = Qt.UserRole + 1
+
+    def __lt__(self, other):
+        column = self.treeWidget().sortColumn()
+        value = self.data(column, self.SORT_ROLE)
+        other_value = other.data(column, self.SORT_ROLE)
+        if value is None or other_value is None:
+            return self.text(column) < other.text(column)
+        return value < other_value
@@ -0,0 +1,276 @@
+"""Watch the file system for new results and for source changes.
+
+The .lprof files dropped in a directory, e.g. by batch jobs, are ingested: the
+directory is watched with a debounce, so that a burst of new files is scanned
+once. The files are parsed one by one in a background thread, fed by queued
+signals, and can be merged per script: the timings of the files profiling the
+same source files are summed.
+
+The source files of the profiled script are also watched, to profile it again
+after each save.
+"""
+
+import contextlib
+import os
+import pickle
+import time
+import types
+
+from PySide6 import QtCore
+
+from .tree import parse_profile_stats
+
+LPROF_SUFFIX = ".lprof"
+
+
+def script_key(stats):
+    """Identify the script of a run by the source files of its profiled functions."""
+    return tuple(sorted({os.path.normpath(key[0]) for key in stats.timings}))
+
+
+def merge_stats(stats1, stats2):
+    """Sum the line timings of two runs, the other stats are dropped."""
+    lines = {}
+    for stats in (stats1, stats2):
+        scale = stats.unit / stats1.unit
+        for func_info, func_stats in stats.timings.items():
+            func_lines = lines.setdefault(func_info, {})
+            for line_no, hits, total_time in func_stats:
+                old_hits, old_time = func_lines.get(line_no, (0, 0))
+                func_lines[line_no] = (
+                    old_hits + hits,
+                    old_time + round(total_time * scale),
+                )
+    timings = {
+        func_info: [
+            (line_no, hits, total_time)
+            for line_no, (hits, total_time) in sorted(func_lines.items())
+        ]
+        for func_info, func_lines in lines.items()
+    }
+    return types.SimpleNamespace(timings=timings, unit=stats1.unit)
+
+
+class LprofParser(QtCore.QObject):
+    """Parse the .lprof files, in a background thread.
+
+    Each file is requested by a queued signal, and its end is signaled by
+    ``parsed`` or ``failed``.
+    """
+
+    # filename, ProfileData, merge key or None, number of merged files
+    parsed = QtCore.Signal(str, object, object, int)
+    # filename, error message
+    failed = QtCore.Signal(str, str)
+
+    def __init__(self):
+        super().__init__()
+        self.merged = {}  # {script key: (merged stats, number of files)}
+
+    @QtCore.Slot()
+    def reset(self):
+        self.merged = {}
+
+    @QtCore.Slot(str, bool)
+    def parse(self, filename, merge):
+        try:
+            with open(filename, "rb") as fid:
+                stats = pickle.load(fid)  # noqa: S301
+            key = count = None
+            if merge:
+                key = script_key(stats)
+                merged, count = self.merged.get(key, (None, 0))
+                if merged is not None:
+                    stats = merge_stats(merged, stats)
+                count += 1
+                self.merged[key] = (stats, count)
+            profile_data = parse_profile_stats(stats)
+        except Exception as error:  # noqa: BLE001, any file can be dropped
+            self.failed.emit(filename, f"{type(error).__name__}: {error}")
+            return
+        self.parsed.emit(filename, profile_data, key, count or 1)
+
+
+class LprofFolderWatcher(QtCore.QObject):
+    """Watch a directory and parse the new .lprof files in the background.
+
+    The files present when the watch starts are skipped. A file is parsed once
+    it was not modified for the debounce interval, so that the files still
+    being written are not read too early.
+
+    The parsing and the display of the results both hold the GIL, so the files
+    are sent to the parser one at a time, and not while ``paused()``.
+    """
+
+    DEBOUNCE = 500  # ms
+
+    parse_requested = QtCore.Signal(str, bool)
+    reset_requested = QtCore.Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.directory = None
+        self.merge = False
+        self.seen = {}  # {path: (mtime_ns, size)}
+        self.pending = []  # Files to send to the parser
+        self.parsing = False
+        self.pause_count = 0
+
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.schedule_scan)
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.DEBOUNCE)
+        self.timer.timeout.connect(self.scan)
+
+        self.parser = LprofParser()
+        self.thread = QtCore.QThread(self)
+        self.parser.moveToThread(self.thread)
+        self.parse_requested.connect(self.parser.parse)
+        self.reset_requested.connect(self.parser.reset)
+        self.parser.parsed.connect(self.parse_finished)
+        self.parser.failed.connect(self.parse_finished)
+
+    @property
+    def active(self):
+        return self.directory is not None
+
+    def start(self, directory, merge=False):
+        self.stop()
+        self.directory = os.path.abspath(directory)
+        self.merge = merge
+        self.seen = self.lprof_files()
+        self.reset_requested.emit()
+        self.watcher.addPath(self.directory)
+        if not self.thread.isRunning():
+            self.thread.start()
+
+    def stop(self):
+        self.timer.stop()
+        self.pending = []
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+        self.directory = None
+
+    def shutdown(self):
+        """Stop watching and wait for the background thread."""
+        self.stop()
+        self.thread.quit()
+        self.thread.wait()
+
+    def lprof_files(self):
+        """Return the ``{path: (mtime_ns, size)}`` of the .lprof files."""
+        files = {}
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return files
+        for entry in entries:
+            if not entry.name.endswith(LPROF_SUFFIX):
+                continue
+            try:
+                if entry.is_file():
+                    stat = entry.stat()
+                    files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                continue
+        return files
+
+    @QtCore.Slot()
+    def schedule_scan(self):
+        self.timer.start()
+
+    @QtCore.Slot()
+    def scan(self):
+        if not self.active:
+            return
+        now = time.time_ns()
+        files = self.lprof_files()
+        for path, signature in sorted(files.items(), key=lambda item: item[1]):
+            if self.seen.get(path) == signature:
+                continue
+            if now - signature[0] < self.DEBOUNCE * 1_000_000:
+                # Still being written, scanned again later
+                self.timer.start()
+                continue
+            self.seen[path] = signature
+            self.pending.append(path)
+        self.parse_next()
+
+    def parse_next(self):
+        if self.parsing or self.pause_count or not self.pending:
+            return
+        self.parsing = True
+        self.parse_requested.emit(self.pending.pop(0), self.merge)
+
+    @QtCore.Slot()
+    def parse_finished(self):
+        self.parsing = False
+        self.parse_next()
+
+    @contextlib.contextmanager
+    def paused(self):
+        """Send no file to the parser, e.g. while the results are displayed."""
+        self.pause_count += 1
+        try:
+            yield
+        finally:
+            self.pause_count -= 1
+            self.parse_next()
+
+
+class SourceWatcher(QtCore.QObject):
+    """Signal the changes of source files, once the saves settled.
+
+    Many editors save by replacing the file, which is then no longer watched by
+    QFileSystemWatcher: the files are watched again after each change.
+    """
+
+    DEBOUNCE = 300  # ms
+
+    # Sorted paths of the changed files
+    changed = QtCore.Signal(list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.paths = set()
+        self.changed_paths = set()
+
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.file_changed)
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.DEBOUNCE)
+        self.timer.timeout.connect(self.emit_changed)
+
+    def set_paths(self, paths):
+        """Watch these files instead of the previous ones."""
+        self.paths = {os.path.abspath(path) for path in paths}
+        if self.watcher.files():
+            self.watcher.removePaths(self.watcher.files())
+        self.watch_existing()
+
+    def stop(self):
+        self.timer.stop()
+        self.changed_paths = set()
+        self.set_paths(())
+
+    def watch_existing(self):
+        watched = set(self.watcher.files())
+        missing = [
+            path for path in sorted(self.paths - watched) if os.path.isfile(path)
+        ]
+        if missing:
+            self.watcher.addPaths(missing)
+
+    @QtCore.Slot(str)
+    def file_changed(self, path):
+        self.changed_paths.add(path)
+        self.timer.start()
+
+    @QtCore.Slot()
+    def emit_changed(self):
+        self.watch_existing()
+        paths, self.changed_paths = sorted(self.changed_paths), set()
+        if paths:
+            self.changed.emit(paths)
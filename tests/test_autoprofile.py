@@ -0,0 +1,63 @@
+import os
+import textwrap
+
+from PySide6 import QtWidgets
+from PySide6.QtCore import Qt
+
+from lineprofilergui import main
+from lineprofilergui.autoprofile import UiTargetsDialog
+from lineprofilergui.utils import icons_factory
+
+
+class TestAutoProfile:
+    def test_auto_profile(self, qtbot, tmp_path, monkeypatch):
+        """Check that the hot functions are profiled line by line without decorator."""
+        code = """
+        def hot_function():
+            total = 0
+            for i in range(100000):
+                total += i
+            return total
+
+        def cold_function():
+            return 0
+
+        hot_function()
+        cold_function()
+        """
+        scriptfile = tmp_path / "script.py"
+        scriptfile.write_text(textwrap.dedent(code))
+        monkeypatch.setattr(
+            UiTargetsDialog, "exec", lambda _self: QtWidgets.QDialog.Accepted
+        )
+
+        current_path = os.getcwd()
+        try:
+            os.chdir(tmp_path)
+            icons_factory()
+            win = main.UIMainWindow()
+            qtbot.addWidget(win)
+            win.config.script = str(scriptfile)
+            with qtbot.waitSignal(win.profile_finished, timeout=20000):
+                win.actionAutoProfile.trigger()
+        finally:
+            os.chdir(current_path)
+
+        tree = win.resultsTreeWidget
+        func_ids = [
+            tree.topLevelItem(index).data(0, Qt.UserRole)
+            for index in range(tree.topLevelItemCount())
+        ]
+        assert (str(scriptfile), "hot_function") in func_ids
+        func_item = tree.function_item((str(scriptfile), "hot_function"))
+        assert func_item.childCount() == 5
+        assert func_item.child(3).data(1, Qt.DisplayRole) == "100000"
+
+        functions = win.functionStatsWidget
+        assert functions.topLevelItemCount() >= len(func_ids)
+        assert functions.topLevelItem(0).data(0, Qt.DisplayRole) == "hot_function"
+        assert functions.topLevelItem(0).font(0).bold()
+
+        # Activating a function selects its block in the line by line results
+        functions.item_activated(functions.topLevelItem(0))
+        assert tree.currentItem() is func_item
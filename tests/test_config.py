@@ -1,4 +1,6 @@
+from lineprofilergui import runner
 from lineprofilergui.config import Config, UiConfigDialog
+from lineprofilergui.runner import BACKEND_SAMPLING, BACKEND_SETTRACE
 from lineprofilergui.utils import icons_factory
 
 
@@ -20,3 +22,45 @@ class TestConfig:
 
         assert config.isvalid
         assert config_dialog.profileButton.isEnabled()
+
+    def test_conflicting_options(self, qtbot):
+        """Check that the options which cannot be combined are rejected."""
+        icons_factory()
+        config = Config()
+        config.script = __file__
+        config.threads = True
+        config.calls = True
+        config.memory = True
+        assert config.isvalid
+        config.histograms = True
+        assert not config.isvalid
+
+        config.histograms = False
+        config_dialog = UiConfigDialog(None, config)
+        assert config_dialog.profileButton.isEnabled()
+        assert not config_dialog.histogramsCheckBox.isEnabled()
+        assert not config_dialog.hitsOnlyCheckBox.isEnabled()
+        assert config_dialog.gcTimeCheckBox.isEnabled()
+        sampling = config_dialog.backendCombo.findData(BACKEND_SAMPLING)
+        assert not config_dialog.backendCombo.model().item(sampling).isEnabled()
+
+        config_dialog.memoryCheckBox.setChecked(False)
+        config_dialog.callsCheckBox.setChecked(False)
+        config_dialog.threadsCheckBox.setChecked(False)
+        assert config_dialog.histogramsCheckBox.isEnabled()
+        assert config_dialog.backendCombo.model().item(sampling).isEnabled()
+
+    def test_runner_conflicting_options(self, capsys):
+        """Check that the runner ignores the options which cannot be combined."""
+        args = ["-o", "out.lprof", "--backend", BACKEND_SAMPLING, "--memory"]
+        args += ["--histograms", "--threads", "script.py"]
+        options = runner.commandline_args(args)
+        runner.ignore_conflicting_options(options)
+        assert options.memory
+        assert not options.histograms
+        assert options.threads
+        assert options.backend == BACKEND_SETTRACE
+        assert capsys.readouterr().err.splitlines() == [
+            "Option --histograms ignored, it cannot be combined with --memory",
+            "Option --backend sampling ignored, it cannot be combined with --memory",
+        ]
@@ -0,0 +1,134 @@
+import textwrap
+
+from lineprofilergui import main
+from lineprofilergui.jobs import JOB_CANCELLED, JOB_FINISHED, JOB_RUNNING
+from lineprofilergui.utils import icons_factory
+
+CODE = """
+@profile
+def {name}():
+    {body}
+
+{name}()
+"""
+
+
+def write_script(path, name, body="return 1"):
+    path.write_text(textwrap.dedent(CODE.format(name=name, body=body)))
+    return path
+
+
+class TestJobQueue:
+    def make_config(self, win, script, args=""):
+        config = win.config.copy()
+        config.script = str(script)
+        config.args = args
+        return config
+
+    def test_parallel_jobs(self, qtbot, tmp_path):
+        """Check that the results of each job land in the history."""
+        icons_factory()
+        win = main.UIMainWindow()
+        qtbot.addWidget(win)
+        win.jobQueueWidget.parallelSpinBox.setMaximum(2)
+        win.jobQueueWidget.parallelSpinBox.setValue(2)
+        first = write_script(tmp_path / "first.py", "first_function")
+        second = write_script(tmp_path / "second.py", "second_function")
+
+        jobs = [
+            win.add_job(self.make_config(win, first)),
+            win.add_job(self.make_config(win, second, "--option"), "second job"),
+        ]
+        assert [job.state for job in jobs] == [JOB_RUNNING, JOB_RUNNING]
+        # Each job has its own results file
+        assert jobs[0].config.stats != jobs[1].config.stats
+
+        qtbot.waitUntil(lambda: all(job.state == JOB_FINISHED for job in jobs))
+        titles = {win.historyCombo.itemText(index) for index in range(2)}
+        assert {title.split(" at ")[0] for title in titles} == {
+            "first.py",
+            "second job",
+        }
+        assert "2 done" in win.jobQueueWidget.summaryLabel.text()
+
+        # Activating a job displays its results
+        item = win.jobQueueWidget.items[jobs[0]]
+        win.jobQueueWidget.jobsTree.itemActivated.emit(item, 0)
+        assert win.historyCombo.currentData() is jobs[0].profile_data
+        assert "first_function" in win.resultsTreeWidget.topLevelItem(0).text(0)
+
+    def test_shared_stats_file(self, qtbot, tmp_path):
+        """Check that parallel jobs do not share a configured results file."""
+        icons_factory()
+        win = main.UIMainWindow()
+        qtbot.addWidget(win)
+        win.jobQueueWidget.parallelSpinBox.setMaximum(2)
+        win.jobQueueWidget.parallelSpinBox.setValue(2)
+        script = write_script(tmp_path / "script.py", "script_function")
+        configs = [self.make_config(win, script, f"{n}") for n in range(2)]
+        for config in configs:
+            config.stats_tmp = False
+            config.config_stats = str(tmp_path / "shared.lprof")
+
+        jobs = [win.add_job(config) for config in configs]
+        assert jobs[0].config.stats != jobs[1].config.stats
+        qtbot.waitUntil(lambda: all(job.state == JOB_FINISHED for job in jobs))
+        assert jobs[0].profile_data is not jobs[1].profile_data
+        assert not (tmp_path / "shared.lprof").exists()
+
+    def test_cancel(self, qtbot, tmp_path):
+        """Check that a cancelled job has no results and the next job starts."""
+        icons_factory()
+        win = main.UIMainWindow()
+        qtbot.addWidget(win)
+        slow = write_script(
+            tmp_path / "slow.py", "slow_function", "__import__('time').sleep(30)"
+        )
+        fast = write_script(tmp_path / "fast.py", "fast_function")
+
+        slow_job = win.add_job(self.make_config(win, slow))
+        fast_job = win.add_job(self.make_config(win, fast))
+        assert slow_job.state == JOB_RUNNING
+        assert fast_job.state != JOB_RUNNING
+
+        win.job_queue.cancel(slow_job)
+        assert slow_job.state == JOB_CANCELLED
+        qtbot.waitUntil(lambda: fast_job.state == JOB_FINISHED)
+        assert win.historyCombo.count() == 1
+
+        win.jobQueueWidget.clearButton.click()
+        assert win.job_queue.jobs == []
+        assert win.jobQueueWidget.jobsTree.topLevelItemCount() == 0
+
+    def test_cancel_idle_check(self, qtbot, tmp_path):
+        """Check that a job can be cancelled while the system usage is measured."""
+        icons_factory()
+        win = main.UIMainWindow()
+        qtbot.addWidget(win)
+        first = write_script(tmp_path / "first.py", "first_function")
+        second = write_script(tmp_path / "second.py", "second_function")
+        configs = [self.make_config(win, script) for script in (first, second)]
+        for config in configs:
+            config.idle_check = True
+
+        first_job = win.add_job(configs[0])
+        second_job = win.add_job(configs[1])
+        assert first_job.kernprof_run.running
+
+        win.job_queue.cancel(first_job)
+        assert first_job.state == JOB_CANCELLED
+        qtbot.waitUntil(lambda: second_job.state == JOB_FINISHED)
+        assert "cpu_usage" in second_job.kernprof_run.environment
+        assert win.historyCombo.count() == 1
+
+    def test_label_edition(self, qtbot, tmp_path):
+        """Check that the label of a job can be edited."""
+        icons_factory()
+        win = main.UIMainWindow()
+        qtbot.addWidget(win)
+        script = write_script(tmp_path / "script.py", "profiled_function")
+        job = win.add_job(self.make_config(win, script, "100"))
+        assert job.label == "script.py 100"
+        win.jobQueueWidget.items[job].setText(win.jobQueueWidget.COL_LABEL, "N=100")
+        assert job.label == "N=100"
+        qtbot.waitUntil(lambda: job.done)
@@ -1,9 +1,19 @@
+import json
+import os
+import socket
+import subprocess
+import sys
 import textwrap
+import threading
 from pathlib import Path
 
+import pytest
+from PySide6 import QtCore
 from PySide6.QtCore import Qt
 
-from lineprofilergui import main
+from lineprofilergui import main, runner
+from lineprofilergui.process import ResourceMonitor
+from lineprofilergui.utils import icons_factory
 
 from .utils import run_code
 
@@ -94,6 +104,263 @@ class TestMainWindow:
         tree = win.resultsTreeWidget
         assert tree.topLevelItemCount() == 2  # functions profiled
 
+    @pytest.mark.parametrize(
+        "backend",
+        [
+            "settrace",
+            pytest.param(
+                "monitoring",
+                marks=pytest.mark.skipif(
+                    sys.version_info < (3, 12), reason="requires python >= 3.12"
+                ),
+            ),
+        ],
+    )
+    def test_backends(self, qtbot, tmp_path, backend):
+        """Check that the built-in backends give the same hits as kernprof."""
+        code = """
+        def gen(n):
+            yield from range(n)
+
+        @profile
+        def profiled_function(n):
+            total = 0
+            for i in gen(n):
+                total += i
+            return total
+
+        @profile
+        def not_called():
+            pass
+
+        profiled_function(10)
+        """
+
+        def hits(win):
+            tree = win.resultsTreeWidget
+            return [
+                [
+                    item.child(index).data(1, Qt.DisplayRole)
+                    for index in range(item.childCount())
+                ]
+                for item in map(tree.topLevelItem, range(tree.topLevelItemCount()))
+            ]
+
+        expected = hits(run_code(code, tmp_path, qtbot))
+        assert hits(run_code(code, tmp_path, qtbot, backend=backend)) == expected
+
+    @pytest.mark.skipif(sys.version_info < (3, 12), reason="requires python >= 3.12")
+    def test_monitoring_throw(self, qtbot, tmp_path):
+        """Check the hits of a generator resumed by throw() with sys.monitoring."""
+        code = """
+        @profile
+        def catching():
+            try:
+                yield 1
+            except ValueError:
+                yield 2
+            yield 3
+
+        generator = catching()
+        next(generator)
+        generator.throw(ValueError)
+        list(generator)
+        """
+
+        def hits(win):
+            item = win.resultsTreeWidget.topLevelItem(0)
+            return [
+                item.child(index).data(1, Qt.DisplayRole)
+                for index in range(item.childCount())
+            ]
+
+        expected = hits(run_code(code, tmp_path, qtbot))
+        assert hits(run_code(code, tmp_path, qtbot, backend="monitoring")) == expected
+
+    def test_sampling(self, qtbot, tmp_path):
+        """Check that the sampling backend finds the hot line without decorator."""
+        code = """
+        import time
+
+        def busy_function():
+            start = time.perf_counter()
+            while time.perf_counter() - start < 0.3:
+                pass
+
+        busy_function()
+        """
+        win = run_code(
+            code, tmp_path, qtbot, backend="sampling", sampling_all_functions=True
+        )
+        tree = win.resultsTreeWidget
+        assert tree.headerItem().text(tree.COL_HITS) == "Samples"
+        func_item = tree.function_item((str(tmp_path / "script.py"), "busy_function"))
+        assert func_item is not None
+        samples = [
+            int(func_item.child(index).text(tree.COL_HITS) or 0)
+            for index in range(func_item.childCount())
+        ]
+        assert sum(samples) > 10
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+    def test_forkserver(self, qtbot, tmp_path):
+        """Check that the runs are forked from the warm interpreter."""
+        module = tmp_path / "heavy_module.py"
+        module.write_text("VALUE = 1\n")
+        code = """
+        import json
+        import sys
+
+        preloaded = "heavy_module" in sys.modules
+        import heavy_module
+
+        data = b"x" * (100 * 1024 * 1024)
+
+        @profile
+        def profiled_function():
+            return heavy_module.VALUE
+
+        with open("result.json", "w") as fid:
+            json.dump([preloaded, profiled_function()], fid)
+        """
+        win = run_code(
+            code,
+            tmp_path,
+            qtbot,
+            forkserver=True,
+            preload="heavy_module",
+            config_env=f"PYTHONPATH={tmp_path}",
+            config_wdir=str(tmp_path),
+        )
+        forkserver = win.kernprof_run.forkserver
+        result = tmp_path / "result.json"
+        # The first run does not wait for the server
+        assert json.loads(result.read_text())[1] == 1
+        assert win.resultsTreeWidget.topLevelItemCount() == 1
+
+        def run():
+            qtbot.waitUntil(lambda: forkserver.ready, timeout=10000)
+            with qtbot.waitSignal(win.profile_finished, timeout=10000):
+                win.actionRun.trigger()
+            return json.loads(result.read_text())
+
+        assert run() == [True, 1]
+        assert win.resultsTreeWidget.topLevelItemCount() == 1
+        # The usage is the one of the child of the server, not of the client
+        assert win.historyCombo.currentData().resources["peak_rss"] > 100 * 1024**2
+
+        # The server is restarted when a preloaded module is modified
+        with qtbot.waitSignal(forkserver.watcher.fileChanged, timeout=10000):
+            module.write_text("VALUE = 2\n")
+            stat = module.stat()
+            os.utime(module, (stat.st_atime, stat.st_mtime + 10))
+        assert run() == [True, 2]
+        forkserver.stop()
+
+    @pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="requires AF_UNIX")
+    def test_forkserver_lost_reply(self, tmp_path):
+        """Check that a run requested to the fork server is never run again."""
+        socket_path = str(tmp_path / "server.sock")
+        assert runner.run_in_server(socket_path, []) is None
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(socket_path)
+        server.listen()
+
+        def close_without_reply():
+            connection, _address = server.accept()
+            runner.receive_fds(connection, 3)
+            runner.receive_message(connection)
+            connection.close()
+
+        thread = threading.Thread(target=close_without_reply)
+        thread.start()
+        try:
+            reply = runner.run_in_server(socket_path, [])
+        finally:
+            thread.join()
+            server.close()
+        assert reply == {"exit_code": 1}
+
+    @pytest.mark.skipif(
+        not hasattr(os, "sched_setaffinity"), reason="requires os.sched_setaffinity"
+    )
+    def test_run_environment(self, qtbot, tmp_path):
+        """Check that the run environment is controlled and recorded."""
+        code = """
+        import gc
+        import json
+        import os
+
+        @profile
+        def profiled_function():
+            return [
+                gc.isenabled(),
+                os.environ["PYTHONHASHSEED"],
+                sorted(os.sched_getaffinity(0)),
+            ]
+
+        with open("result.json", "w") as fid:
+            json.dump(profiled_function(), fid)
+        """
+        win = run_code(
+            code,
+            tmp_path,
+            qtbot,
+            cpus="0",
+            nice=1,
+            hash_seed=42,
+            disable_gc=True,
+            idle_check=True,
+        )
+        result = json.loads((tmp_path / "result.json").read_text())
+        assert result == [False, "42", [0]]
+
+        environment = win.historyCombo.currentData().environment
+        assert environment["cpus"] == [0]
+        assert environment["nice"] >= 1
+        assert environment["hash_seed"] == "42"
+        assert environment["gc_disabled"]
+        assert "cpu_usage" in environment
+        assert "Hash seed: 42" in win.historyCombo.itemData(0, Qt.ToolTipRole)
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="requires getrusage")
+    @pytest.mark.parametrize("runner", [False, True])
+    def test_resource_usage(self, qtbot, tmp_path, runner):
+        """Check that the resource usage of the run is recorded."""
+        code = """
+        import time
+
+        @profile
+        def profiled_function():
+            data = b"x" * (100 * 1024 * 1024)
+            start = time.process_time()
+            while time.process_time() - start < 0.2:
+                pass
+            return len(data)
+
+        profiled_function()
+        """
+        # The runner measures its own usage
+        win = run_code(code, tmp_path, qtbot, disable_gc=runner)
+        resources = win.historyCombo.currentData().resources
+        assert resources["user_time"] + resources["system_time"] >= 0.2
+        assert resources["wall_time"] >= 0.2
+        assert resources["peak_rss"] > 100 * 1024 * 1024
+        assert resources["minor_faults"] > 0
+        assert win.statusbar_resources.text().startswith("CPU ")
+        assert "Peak RSS" in win.historyCombo.itemData(0, Qt.ToolTipRole)
+
+    def test_resource_usage_shared(self, qtbot):
+        """Check that the usage of concurrent processes is not mixed."""
+        monitors = [ResourceMonitor(), ResourceMonitor()]
+        for monitor in monitors:
+            monitor.start(QtCore.QProcess())
+        for monitor in monitors:
+            assert "user_time" not in monitor.stop()
+        monitors[0].start(QtCore.QProcess())
+        assert "user_time" in monitors[0].stop() or sys.platform == "win32"
+
     def test_function_not_called(self, qtbot, tmp_path):
         """Check the case of a decoracted function not called."""
         code = """
@@ -163,7 +430,7 @@ class TestMainWindow:
         scriptfile.write_text(textwrap.dedent(code))
 
         with tmp_path:
-            main.icons_factory()
+            icons_factory()
             win = main.UIMainWindow()
             qtbot.addWidget(win)
 
@@ -195,3 +462,30 @@ class TestMainWindow:
 
         win.load_lprof(str(lprof_path))
         assert win.historyCombo.count() == 2  # Initial profiling + lprof load
+
+    def test_lazy_startup(self, qtbot):
+        """Check that displaying the main window does not load the dialogs and docks."""
+        code = """
+        import sys
+        from PySide6 import QtWidgets
+        from lineprofilergui.main import make_window
+
+        app = QtWidgets.QApplication([])
+        win = make_window(["-l", "data.lprof"])
+        print(win.isVisible(), win._settings_dialog)
+        for module in ("settings", "theme", "autoprofile", "rollup", "source", "jobs",
+                       "sweep", "revisions"):
+            print(f"lineprofilergui.{module}" in sys.modules)
+        # The dock is created when first displayed
+        win.actionShowRollup.trigger()
+        print("lineprofilergui.rollup" in sys.modules, win.dockRollupWidget.isVisible())
+        """
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        output = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", textwrap.dedent(code)],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        assert output.split() == ["True", "None", *["False"] * 8, "True", "True"]
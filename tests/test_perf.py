@@ -0,0 +1,54 @@
+import json
+from pathlib import Path
+
+from lineprofilergui.perf import PIPELINE, PipelineTimings
+
+from .utils import run_code
+
+
+class TestPipelineTimings:
+    def test_nested_runs(self, tmp_path):
+        """Check that nested operations are merged and logged once."""
+        log_file = tmp_path / "perf.jsonl"
+        timings = PipelineTimings()
+        timings.log_file = str(log_file)
+
+        with timings.run("outer", file="test.lprof"):
+            with timings.phase("first"):
+                pass
+            with timings.run("inner"), timings.phase("second"):
+                timings.count("items", 3)
+            assert timings.running
+        assert not timings.running
+
+        assert timings.operation == "outer"
+        assert list(timings.phases) == ["first", "second"]
+        assert timings.counters == {"items": 3}
+
+        records = log_file.read_text().splitlines()
+        assert len(records) == 1
+        record = json.loads(records[0])
+        assert record["operation"] == "outer"
+        assert record["file"] == "test.lprof"
+        assert record["counters"] == {"items": 3}
+
+    def test_load_lprof_phases(self, qtbot, tmp_path):
+        """Check that the main window records each phase of the pipeline."""
+        code = """
+        @profile
+        def profiled_function():
+            return "This was profiled"
+
+        profiled_function()
+        """
+        win = run_code(code, tmp_path, qtbot)
+        win.load_lprof(str(Path(win.config.stats)))
+
+        assert PIPELINE.operation == "load_lprof"
+        for phase in ("unpickle", "source lookup", "parse", "update"):
+            assert phase in PIPELINE.phases
+        assert PIPELINE.counters["functions"] == 1
+        assert PIPELINE.counters["lines"] == 2
+        assert PIPELINE.counters["updated items"] == 3
+        assert win.dockPipelineWidget.timingsWidget.topLevelItemCount() > 0
+        assert win.statusbar_pipeline.text().startswith("Displayed in ")
@@ -0,0 +1,42 @@
+import textwrap
+
+from .utils import run_code
+
+SLOW_CODE = """
+import time
+
+@profile
+def slow_function():
+    time.sleep(30)
+
+slow_function()
+"""
+
+FAST_CODE = """
+@profile
+def fast_function():
+    return 1
+
+fast_function()
+"""
+
+
+class TestProfileOnSave:
+    def test_rerun_on_save(self, qtbot, tmp_path):
+        """Check that a save cancels the run in progress and profiles again."""
+        win = run_code(FAST_CODE, tmp_path, qtbot)
+        script = tmp_path / "script.py"
+        win.set_auto_rerun(True)
+        assert win.actionAutoRerun.isChecked()
+        assert str(script) in win.source_watcher.watcher.files()
+
+        # Slow run, cancelled by the next save
+        script.write_text(textwrap.dedent(SLOW_CODE))
+        qtbot.waitUntil(lambda: win.kernprof_run.running, timeout=5000)
+        with qtbot.waitSignal(win.profile_finished, timeout=10000):
+            script.write_text(textwrap.dedent(FAST_CODE.replace("fast", "new")))
+        assert win.historyCombo.count() == 2
+        assert "new_function" in win.resultsTreeWidget.topLevelItem(0).text(0)
+
+        win.set_auto_rerun(False)
+        assert not win.source_watcher.watcher.files()
@@ -0,0 +1,118 @@
+import shutil
+import textwrap
+
+import pytest
+
+from lineprofilergui import main
+from lineprofilergui.revisions import git, git_toplevel
+from lineprofilergui.utils import icons_factory
+
+CODE = """
+import time
+
+def helper():
+    return 1
+
+@profile
+def work():
+    total = helper()
+    time.sleep(0.01)
+    {slow}
+    return total
+
+work()
+"""
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git missing")
+
+
+def commit(repo, message, slow=""):
+    (repo / "script.py").write_text(textwrap.dedent(CODE.format(slow=slow)))
+    git(repo, "add", "script.py")
+    git(
+        repo,
+        "-c",
+        "user.name=Test",
+        "-c",
+        "user.email=test@example.com",
+        "commit",
+        "-q",
+        "-m",
+        message,
+    )
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git(repo, "init", "-q")
+    commit(repo, "Fast", "pass")
+    commit(repo, "Still fast", "total += 1")
+    commit(repo, "Slow", "time.sleep(0.05)")
+    commit(repo, "Still slow", "time.sleep(0.05); total += 1")
+    return repo
+
+
+def make_window(qtbot, repo):
+    icons_factory()
+    win = main.UIMainWindow()
+    qtbot.addWidget(win)
+    win.config.script = str(repo / "script.py")
+    return win
+
+
+class TestRevisions:
+    def test_compare(self, qtbot, repo):
+        """Check that the lines of two revisions are aligned on their code."""
+        win = make_window(qtbot, repo)
+        comparison = win.compare_revisions(git_toplevel(repo), "HEAD~2", "HEAD~1")
+        with qtbot.waitSignal(comparison.finished, timeout=20000):
+            pass
+        assert comparison.error is None
+        assert win.historyCombo.count() == 2
+        (func_diff,) = comparison.functions
+        assert func_diff.name == "work"
+        assert func_diff.time_b > func_diff.time_a + 0.04
+        codes = [
+            (line.line_a is not None, line.line_b is not None, line.code.strip())
+            for line in func_diff.lines
+        ]
+        assert (True, False, "total += 1") in codes
+        assert (False, True, "time.sleep(0.05)") in codes
+        assert (True, True, "return total") in codes
+        tree = win.revisionsWidget.revisionsTree
+        assert tree.topLevelItem(0).childCount() == len(func_diff.lines)
+
+        # The worktrees are removed
+        worktrees = [run.worktree for run in comparison.runs]
+        comparison.cleanup()
+        assert all(
+            worktree not in git(repo, "worktree", "list") for worktree in worktrees
+        )
+
+    def test_bisect(self, qtbot, repo):
+        """Check that the first slow commit is found."""
+        win = make_window(qtbot, repo)
+        bisect = win.bisect_revisions(git_toplevel(repo), "HEAD~3", "HEAD", "work", 50)
+        with qtbot.waitSignal(bisect.finished, timeout=30000):
+            pass
+        assert bisect.error is None
+        assert bisect.first_bad.subject == "Slow"
+        # Good, bad, then the commits in between
+        assert [step.subject for step in bisect.steps][:2] == ["Fast", "Still slow"]
+        assert "First commit where work regressed" in (
+            win.revisionsWidget.summaryLabel.text()
+        )
+        bisect.cleanup()
+
+    def test_no_regression(self, qtbot, repo):
+        """Check that the bisect stops if the bad revision is not slower."""
+        win = make_window(qtbot, repo)
+        bisect = win.bisect_revisions(
+            git_toplevel(repo), "HEAD~3", "HEAD~2", "work", 50
+        )
+        with qtbot.waitSignal(bisect.finished, timeout=20000):
+            pass
+        assert "No regression" in bisect.error
+        bisect.cleanup()
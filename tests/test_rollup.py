@@ -0,0 +1,105 @@
+import textwrap
+
+import pytest
+
+from lineprofilergui.rollup import KIND_FUNCTION, KIND_MODULE, build_rollup
+
+from .utils import run_code
+
+
+class TestRollup:
+    def test_packages(self, qtbot, tmp_path):
+        """Check that the times are summed by module and package."""
+        package = tmp_path / "package" / "subpackage"
+        package.mkdir(parents=True)
+        (package.parent / "__init__.py").write_text("")
+        (package / "__init__.py").write_text("")
+        (package / "module.py").write_text(
+            textwrap.dedent(
+                """
+                import time
+
+                def first_function():
+                    time.sleep(0.01)
+
+                def second_function():
+                    time.sleep(0.02)
+                """
+            )
+        )
+        code = """
+        from package.subpackage import module
+
+        profile(module.first_function)
+        profile(module.second_function)
+
+        @profile
+        def main():
+            module.first_function()
+            module.second_function()
+
+        main()
+        """
+        win = run_code(code, tmp_path, qtbot)
+        profile_data = win.historyCombo.currentData()
+        root = build_rollup(profile_data)
+        assert set(root.children) == {"script.py", "package"}
+        module = root.children["package"].children["subpackage"].children["module.py"]
+        assert module.kind == KIND_MODULE
+        assert module.functions == 2
+        assert {child.name for child in module.children.values()} == {
+            "first_function",
+            "second_function",
+        }
+        assert module.total_time == pytest.approx(
+            sum(child.total_time for child in module.children.values())
+        )
+        assert root.total_time == pytest.approx(
+            sum(func_data.total_time for func_data in profile_data)
+        )
+
+        # The widget is populated once displayed, and linked to the results
+        win.show()
+        win.dockRollupWidget.show()
+        rollup = win.rollupWidget
+        function_items = [
+            item
+            for item in rollup.iter_items()
+            if item.data(rollup.COL_NAME, rollup.KIND_ROLE) == KIND_FUNCTION
+        ]
+        assert len(function_items) == 3
+        second_item = next(
+            item
+            for item in function_items
+            if item.text(rollup.COL_NAME) == "second_function"
+        )
+        rollup.itemActivated.emit(second_item, 0)
+        current_item = win.resultsTreeWidget.currentItem()
+        assert "second_function" in current_item.text(0)
+
+    def test_same_name(self, qtbot, tmp_path):
+        """Check that the functions sharing a name are not merged."""
+        code = """
+        import time
+
+        def work():
+            time.sleep(0.01)
+
+        first = profile(work)
+
+        def work():
+            time.sleep(0.02)
+
+        second = profile(work)
+        first()
+        second()
+        """
+        win = run_code(code, tmp_path, qtbot)
+        root = build_rollup(win.historyCombo.currentData())
+        module = root.children["script.py"]
+        assert module.functions == 2
+        functions = list(module.children.values())
+        assert [func.name for func in functions] == ["work", "work"]
+        assert module.total_time == pytest.approx(
+            sum(func.total_time for func in functions)
+        )
@@ -0,0 +1,61 @@
+from PySide6 import QtGui
+
+from .utils import run_code
+
+
+class TestSourceView:
+    def test_synchronized_selection(self, qtbot, tmp_path):
+        """Check that the source view and the results tree follow each other."""
+        code = """
+        @profile
+        def first_function():
+            return 1
+
+        VALUE = 2
+
+        @profile
+        def second_function():
+            return VALUE
+
+        first_function()
+        second_function()
+        """
+        win = run_code(code, tmp_path, qtbot)
+        win.show()
+        win.dockSourceWidget.show()
+        tree = win.resultsTreeWidget
+        source = win.sourceView
+
+        # Tree to source, the file is displayed once with the module level code
+        tree.setCurrentItem(tree.topLevelItem(1).child(1))
+        assert source.filename == str(tmp_path / "script.py")
+        assert source.textCursor().blockNumber() + 1 == 10
+        assert "VALUE = 2" in source.toPlainText()
+        assert source.lines[10].hits == 1
+        assert 6 not in source.lines
+        source.gutter.grab()
+
+        # Source to tree
+        cursor = QtGui.QTextCursor(source.document().findBlockByNumber(4 - 1))
+        source.setTextCursor(cursor)
+        assert tree.currentItem() is tree.topLevelItem(0).child(1)
+
+    def test_deferred_loading(self, qtbot, tmp_path):
+        """Check that the file is only loaded once the view is displayed."""
+        code = """
+        @profile
+        def profiled_function():
+            return 1
+
+        profiled_function()
+        """
+        win = run_code(code, tmp_path, qtbot)
+        win.show()
+        win.dockSourceWidget.hide()
+        tree = win.resultsTreeWidget
+        tree.setCurrentItem(tree.topLevelItem(0).child(1))
+        assert win.sourceView.filename is None
+
+        win.dockSourceWidget.show()
+        assert win.sourceView.filename == str(tmp_path / "script.py")
+        assert win.sourceView.textCursor().blockNumber() + 1 == 4
@@ -0,0 +1,84 @@
+import textwrap
+
+import pytest
+
+from lineprofilergui import main
+from lineprofilergui.sweep import (
+    complexity_label,
+    fit_exponent,
+    parse_sizes,
+    sweep_args,
+)
+from lineprofilergui.utils import icons_factory
+
+
+class TestSweep:
+    def test_fit_exponent(self):
+        """Check the fitted growth exponents and the complexity labels."""
+        sizes = [10, 100, 1000]
+        assert fit_exponent({size: 3 * size**2 for size in sizes}) == pytest.approx(2)
+        assert fit_exponent(dict.fromkeys(sizes, 5.0)) == pytest.approx(0)
+        # Lines not run for an input size are ignored
+        assert fit_exponent({10: None, 100: 100, 1000: 1000}) == pytest.approx(1)
+        assert fit_exponent({10: None, 100: 100}) is None
+        assert complexity_label(1.93) == "O(n²)"
+        assert complexity_label(1.5) == "O(n^1.5)"
+        assert parse_sizes("1000, 10000 100") == [100, 1000, 10000]
+        with pytest.raises(ValueError, match="10, 10"):
+            parse_sizes("10, 10")
+        assert sweep_args("--size {n} -v", 10) == "--size 10 -v"
+        assert sweep_args("-v", 10) == "-v 10"
+
+    def test_sweep(self, qtbot, tmp_path):
+        """Check that a quadratic line is flagged from the sweep results."""
+        script = tmp_path / "script.py"
+        script.write_text(
+            textwrap.dedent(
+                """\
+                import sys
+
+                @profile
+                def work(n):
+                    total = 0
+                    for i in range(n):
+                        total += i
+                    for i in range(n):
+                        for j in range(n):
+                            total += j
+                    return total
+
+                work(int(sys.argv[1]))
+                """
+            )
+        )
+        icons_factory()
+        win = main.UIMainWindow()
+        qtbot.addWidget(win)
+        win.config.script = str(script)
+        sweep = win.start_sweep([50, 100, 200], "{n}")
+        assert len(sweep.jobs) == 3
+        with qtbot.waitSignal(sweep.finished, timeout=20000):
+            pass
+        assert win.historyCombo.count() == 3
+
+        tree = win.sweepWidget.sweepTree
+        assert tree.topLevelItemCount() == 1
+        func_item = tree.topLevelItem(0)
+        items = {
+            int(item.text(0).split(":")[0]): item
+            for item in (func_item.child(row) for row in range(func_item.childCount()))
+        }
+        lines = {
+            line_no: win.sweepWidget.item_series(item)
+            for line_no, item in items.items()
+        }
+        assert lines[7].hits_exponent == pytest.approx(1, abs=0.05)
+        assert lines[10].hits_exponent == pytest.approx(2, abs=0.05)
+        assert lines[10].superlinear
+        assert not lines[5].superlinear
+        assert "n=200" in tree.headerItem().text(3)
+
+        # The plot follows the selection
+        tree.setCurrentItem(items[10])
+        assert win.sweepWidget.scalingPlot.series is lines[10]
+        win.sweepWidget.scalingPlot.grab()
@@ -1,6 +1,7 @@
 import subprocess
+from pathlib import Path
 
-from PySide6 import QtCore
+from PySide6 import QtCore, QtGui, QtWidgets
 
 from .utils import run_code
 
@@ -32,6 +33,461 @@ class TestResultsTreeWidget:
         func_item.setExpanded(True)
         assert tree.expanded_functions == {(scriptfile, "profiled_function")}
 
+    def test_incremental_update(self, qtbot, tmp_path):
+        """Check that re-running the same script updates the items in place."""
+        code = """
+        @profile
+        def profiled_function1():
+            return "This was profiled"
+
+        @profile
+        def profiled_function2():
+            return "This was profiled too"
+
+        profiled_function1()
+        profiled_function2()
+        """
+        win = run_code(code, tmp_path, qtbot)
+        tree = win.resultsTreeWidget
+        func_item1 = tree.topLevelItem(0)
+        func_item2 = tree.topLevelItem(1)
+        line_item = func_item1.child(1)
+        func_item1.setExpanded(True)
+        func_item2.setExpanded(False)
+        line_item.setSelected(True)
+
+        with qtbot.waitSignal(win.profile_finished, timeout=10000):
+            win.actionRun.trigger()
+
+        assert tree.topLevelItem(0) is func_item1
+        assert tree.topLevelItem(1) is func_item2
+        assert func_item1.child(1) is line_item
+        assert func_item1.isExpanded()
+        assert not func_item2.isExpanded()
+        assert line_item.isSelected()
+        assert line_item.data(1, QtCore.Qt.DisplayRole) == "1"
+
+    def test_incremental_update_values(self, qtbot, tmp_path):
+        """Check that the cells whose values changed are updated in place."""
+        code = """
+        import os
+
+        @profile
+        def profiled_function(n):
+            for i in range(n):
+                pass
+
+        more = os.path.join(os.path.dirname(__file__), "more")
+        profiled_function(3 if os.path.exists(more) else 1)
+        """
+        win = run_code(code, tmp_path, qtbot)
+        tree = win.resultsTreeWidget
+        loop_item = tree.topLevelItem(0).child(1)
+        assert loop_item.text(tree.COL_HITS) == "2"
+
+        (tmp_path / "more").touch()
+        with qtbot.waitSignal(win.profile_finished, timeout=10000):
+            win.actionRun.trigger()
+
+        assert tree.topLevelItem(0).child(1) is loop_item
+        assert loop_item.text(tree.COL_HITS) == "4"
+        assert loop_item.data(tree.COL_HITS, loop_item.SORT_ROLE) == 4
+
+    def test_incremental_update_same_name(self, qtbot, tmp_path):
+        """Check that the functions sharing a name are updated separately."""
+        code = """
+        class A:
+            @profile
+            def __init__(self):
+                pass
+
+        class B:
+            @profile
+            def __init__(self):
+                pass
+
+        A()
+        B()
+        """
+        win = run_code(code, tmp_path, qtbot)
+        tree = win.resultsTreeWidget
+        func_items = [tree.topLevelItem(0), tree.topLevelItem(1)]
+
+        for _ in range(2):
+            with qtbot.waitSignal(win.profile_finished, timeout=10000):
+                win.actionRun.trigger()
+
+        assert tree.topLevelItemCount() == 2
+        assert [tree.topLevelItem(0), tree.topLevelItem(1)] == func_items
+
+    def test_memory_columns(self, qtbot, tmp_path):
+        """Check the memory allocated by each line."""
+        code = """
+        @profile
+        def profiled_function():
+            small = 1
+            big = [0] * 100000
+            return small, big
+
+        profiled_function()
+        """
+        win = run_code(code, tmp_path, qtbot)
+        tree = win.resultsTreeWidget
+        assert tree.isColumnHidden(tree.COL_MEMORY)
+        assert tree.topLevelItem(0).child(1).text(tree.COL_MEMORY) == ""
+
+        win = run_code(code, tmp_path, qtbot, memory=True)
+        tree = win.resultsTreeWidget
+        assert not tree.isColumnHidden(tree.COL_MEMORY)
+        assert not tree.isColumnHidden(tree.COL_ALLOCS)
+        # The line contents are still displayed last
+        assert tree.header().visualIndex(tree.COL_LINE) == tree.columnCount() - 1
+
+        func_item = tree.topLevelItem(0)
+        small_item, big_item = func_item.child(1), func_item.child(2)
+        assert float(small_item.text(tree.COL_MEMORY)) < 1
+        assert float(big_item.text(tree.COL_MEMORY)) > 700  # 800kB list
+        assert func_item.child(0).text(tree.COL_MEMORY) == ""  # Not run
+
+        # Sort the lines by allocated memory
+        tree.sortByColumn(tree.COL_MEMORY, QtCore.Qt.DescendingOrder)
+        assert func_item.child(0) is big_item
+
+    def test_hits_only(self, qtbot, tmp_path):
+        """Check that only the hits are displayed in hits only mode."""
+        code = """
+        @profile
+        def profiled_function():
+            total = 0
+            for i in range(100):
+                total += i
+            return total
+
+        profiled_function()
+        """
+        win = run_code(code, tmp_path, qtbot, hits_only=True)
+        tree = win.resultsTreeWidget
+        for col in (tree.COL_TIME, tree.COL_PERHIT, tree.COL_PERCENT):
+            assert tree.isColumnHidden(col)
+        func_item = tree.topLevelItem(0)
+        assert "ms)" not in func_item.text(0)
+        hits = [func_item.child(index).text(tree.COL_HITS) for index in range(5)]
+        assert hits == ["", "1", "101", "100", "1"]
+
+        # The time columns are displayed again for timed runs
+        win.config.hits_only = False
+        with qtbot.waitSignal(win.profile_finished, timeout=10000):
+            win.actionRun.trigger()
+        assert not tree.isColumnHidden(tree.COL_TIME)
+
+    def test_latency_percentiles(self, qtbot, tmp_path):
+        """Check that the tail latency of a line is displayed."""
+        code = """
+        import time
+
+        @profile
+        def profiled_function(i):
+            if i == 99:
+                time.sleep(0.05)
+            return i
+
+        for i in range(100):
+            profiled_function(i)
+        """
+        win = run_code(code, tmp_path, qtbot, histograms=True)
+        tree = win.resultsTreeWidget
+        for col in (tree.COL_P50, tree.COL_P95, tree.COL_P99, tree.COL_MAX):
+            assert not tree.isColumnHidden(col)
+        sleep_item = tree.topLevelItem(0).child(2)
+        assert sleep_item.text(tree.COL_HITS) == "1"
+        assert float(sleep_item.text(tree.COL_MAX)) >= 50
+        if_item = tree.topLevelItem(0).child(1)
+        assert if_item.text(tree.COL_HITS) == "100"
+        p50 = float(if_item.text(tree.COL_P50))
+        assert p50 <= float(if_item.text(tree.COL_P99))
+        assert p50 <= float(if_item.text(tree.COL_MAX))
+        assert "█" in tree.line_tooltip(if_item, tree.COL_P50)
+
+        # The tooltip is built when hovering the cell
+        win.show()
+        tree.scrollToItem(if_item)
+        rect = tree.visualItemRect(if_item)
+        pos = QtCore.QPoint(
+            tree.columnViewportPosition(tree.COL_P50) + 2, rect.center().y()
+        )
+        event = QtGui.QHelpEvent(
+            QtCore.QEvent.ToolTip, pos, tree.viewport().mapToGlobal(pos)
+        )
+        QtWidgets.QApplication.sendEvent(tree.viewport(), event)
+        assert "█" in QtWidgets.QToolTip.text()
+
+    def test_cpu_time(self, qtbot, tmp_path):
+        """Check that the waiting lines are told from the computing ones."""
+        code = """
+        import time
+
+        @profile
+        def profiled_function():
+            time.sleep(0.1)
+            start = time.process_time()
+            while time.process_time() - start < 0.1:
+                pass
+
+        profiled_function()
+        """
+        win = run_code(code, tmp_path, qtbot, cpu_time=True)
+        tree = win.resultsTreeWidget
+        assert not tree.isColumnHidden(tree.COL_CPU)
+        assert not tree.isColumnHidden(tree.COL_WAIT)
+        func_item = tree.topLevelItem(0)
+        sleep_item = func_item.child(1)
+        assert float(sleep_item.text(tree.COL_WAIT)) > 90
+        assert float(sleep_item.text(tree.COL_CPU)) < 10
+        loop_item = func_item.child(4)
+        assert float(loop_item.text(tree.COL_WAIT)) < 50
+
+    def test_asyncio(self, qtbot, tmp_path):
+        """Check that the time suspended at await is separated from the line time."""
+        code = """
+        import asyncio
+        import time
+
+        @profile
+        async def profiled_function():
+            await asyncio.sleep(0.2)
+            time.sleep(0.15)
+
+        asyncio.run(profiled_function())
+        """
+        win = run_code(code, tmp_path, qtbot, async_mode=True)
+        tree = win.resultsTreeWidget
+        assert not tree.isColumnHidden(tree.COL_SUSPENDED)
+        assert not tree.isColumnHidden(tree.COL_BLOCKING)
+        func_item = tree.topLevelItem(0)
+        await_item = func_item.child(1)
+        assert await_item.text(tree.COL_HITS) == "1"
+        assert float(await_item.text(tree.COL_SUSPENDED)) > 150
+        assert float(await_item.text(tree.COL_TIME)) < 100
+        assert await_item.text(tree.COL_BLOCKING) == "0"
+        sleep_item = func_item.child(2)
+        assert float(sleep_item.text(tree.COL_TIME)) > 140
+        assert sleep_item.text(tree.COL_BLOCKING) == "1"
+
+    def test_threads(self, qtbot, tmp_path):
+        """Check that the results of each thread can be displayed."""
+        code = """
+        import threading
+
+        @profile
+        def profiled_function(n):
+            for i in range(n):
+                pass
+
+        threads = [
+            threading.Thread(target=profiled_function, args=(n,), name=f"worker{n}")
+            for n in (10, 20)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        """
+        win = run_code(code, tmp_path, qtbot, threads=True)
+        tree = win.resultsTreeWidget
+        assert not tree.isColumnHidden(tree.COL_THREADS)
+        assert win.threadComboAction.isVisible()
+        assert [
+            win.threadCombo.itemData(index) for index in range(win.threadCombo.count())
+        ] == [None, "worker10", "worker20"]
+        loop_item = tree.topLevelItem(0).child(1)
+        assert loop_item.text(tree.COL_HITS) == "32"
+        assert loop_item.text(tree.COL_THREADS) == "2"
+        assert "worker20" in tree.line_tooltip(loop_item, tree.COL_THREADS)
+
+        win.threadCombo.setCurrentIndex(win.threadCombo.findData("worker20"))
+        assert tree.isColumnHidden(tree.COL_THREADS)
+        loop_item = tree.topLevelItem(0).child(1)
+        assert loop_item.text(tree.COL_HITS) == "21"
+
+    def test_threads_cpu_time(self, qtbot, tmp_path):
+        """Check that the threads are recorded with the other measures."""
+        code = """
+        import threading
+
+        @profile
+        def profiled_function(n):
+            for i in range(n):
+                pass
+
+        thread = threading.Thread(target=profiled_function, args=(10,), name="worker")
+        thread.start()
+        thread.join()
+        """
+        win = run_code(code, tmp_path, qtbot, threads=True, cpu_time=True)
+        tree = win.resultsTreeWidget
+        assert not tree.isColumnHidden(tree.COL_THREADS)
+        assert not tree.isColumnHidden(tree.COL_CPU)
+        loop_item = tree.topLevelItem(0).child(1)
+        assert loop_item.text(tree.COL_HITS) == "11"
+        assert loop_item.text(tree.COL_THREADS) == "1"
+        assert float(loop_item.text(tree.COL_CPU)) > 0
+
+    def test_threads_function_not_called(self, qtbot, tmp_path):
+        """Check that the functions not called are kept with the threads."""
+        code = """
+        @profile
+        def called_function():
+            return 1
+
+        @profile
+        def not_called_function():
+            return 2
+
+        called_function()
+        """
+        win = run_code(code, tmp_path, qtbot, threads=True)
+        tree = win.resultsTreeWidget
+        assert tree.topLevelItemCount() == 2
+        names = {tree.topLevelItem(index).text(0) for index in range(2)}
+        assert any("not_called_function" in name for name in names)
+
+    def test_calls(self, qtbot, tmp_path):
+        """Check the self time of the lines calling profiled functions."""
+        code = """
+        import time
+
+        @profile
+        def callee():
+            time.sleep(0.05)
+
+        @profile
+        def caller():
+            callee()
+            time.sleep(0.02)
+
+        caller()
+        """
+        win = run_code(code, tmp_path, qtbot, calls=True)
+        tree = win.resultsTreeWidget
+        assert not tree.isColumnHidden(tree.COL_SELF)
+        assert not tree.isColumnHidden(tree.COL_CALLS)
+        caller_item = tree.function_item((str(tmp_path / "script.py"), "caller"))
+        call_item = caller_item.child(1)
+        assert call_item.text(tree.COL_CALLS) == "callee"
+        assert "1 calls" in tree.line_tooltip(call_item, tree.COL_CALLS)
+        assert float(call_item.text(tree.COL_TIME)) > 45
+        assert float(call_item.text(tree.COL_SELF)) < 10
+        sleep_item = caller_item.child(2)
+        assert sleep_item.text(tree.COL_CALLS) == ""
+        assert sleep_item.text(tree.COL_SELF) == sleep_item.text(tree.COL_TIME)
+
+        # The call links to the block of the callee
+        tree.itemClicked.emit(call_item, tree.COL_CALLS)
+        assert "callee" in tree.currentItem().text(0)
+
+    def test_calls_same_name(self, qtbot, tmp_path):
+        """Check that a call links to its callee among the same name functions."""
+        code = """
+        class A:
+            @profile
+            def run(self):
+                pass
+
+        class B:
+            @profile
+            def run(self):
+                pass
+
+        @profile
+        def caller():
+            A().run()
+            B().run()
+
+        caller()
+        """
+        win = run_code(code, tmp_path, qtbot, calls=True)
+        tree = win.resultsTreeWidget
+        caller_item = tree.function_item((str(tmp_path / "script.py"), "caller"))
+        for line_index, class_name in ((1, "A"), (2, "B")):
+            call_item = caller_item.child(line_index)
+            assert call_item.text(tree.COL_CALLS) == "run"
+            tree.itemClicked.emit(call_item, tree.COL_CALLS)
+            func_info = tree.currentItem().data(tree.COL_0, tree.FUNC_INFO_ROLE)
+            line = Path(func_info[0]).read_text().splitlines()[func_info[1] - 2]
+            assert line.strip() == f"class {class_name}:"
+
+    def test_calls_histograms(self, qtbot, tmp_path):
+        """Check that the calls are recorded with the other measures."""
+        code = """
+        @profile
+        def callee():
+            pass
+
+        @profile
+        def caller():
+            callee()
+
+        caller()
+        """
+        win = run_code(code, tmp_path, qtbot, calls=True, histograms=True)
+        tree = win.resultsTreeWidget
+        assert not tree.isColumnHidden(tree.COL_CALLS)
+        assert not tree.isColumnHidden(tree.COL_MAX)
+        caller_item = tree.function_item((str(tmp_path / "script.py"), "caller"))
+        call_item = caller_item.child(1)
+        assert call_item.text(tree.COL_CALLS) == "callee"
+        assert call_item.text(tree.COL_MAX) != ""
+
+    def test_gc_time(self, qtbot, tmp_path):
+        """Check that the garbage collections are attributed to their lines."""
+        code = """
+        import gc
+
+        @profile
+        def profiled_function():
+            garbage = [[] for i in range(1000)]
+            for item in garbage:
+                item.append(item)
+            del garbage
+            gc.collect()
+
+        profiled_function()
+        """
+        win = run_code(code, tmp_path, qtbot, gc_time=True)
+        tree = win.resultsTreeWidget
+        assert not tree.isColumnHidden(tree.COL_GC)
+        func_item = tree.topLevelItem(0)
+        assert "GC" in func_item.text(0)
+        collect_item = func_item.child(5)
+        assert float(collect_item.text(tree.COL_GC)) > 0
+        assert "1 garbage collections" in tree.line_tooltip(collect_item, tree.COL_GC)
+        # The lines which did not run have no GC time
+        assert func_item.child(0).text(tree.COL_GC) == ""
+
+    def test_steady_state(self, qtbot, tmp_path):
+        """Check that the warm-up calls are discarded from the results."""
+        code = """
+        cache = {}
+
+        @profile
+        def profiled_function(i):
+            if i not in cache:
+                cache[i] = i * i
+            return cache[i]
+
+        for i in range(10):
+            profiled_function(i % 3)
+        """
+        win = run_code(
+            code, tmp_path, qtbot, steady_function="profiled_function", steady_calls=3
+        )
+        func_item = win.resultsTreeWidget.topLevelItem(0)
+        hits = [
+            func_item.child(index).text(win.resultsTreeWidget.COL_HITS)
+            for index in range(func_item.childCount())
+        ]
+        assert hits == ["", "7", "", "7"]
+
     def test_open_editor(self, qtbot, tmp_path, monkeypatch):
         """Check the command to open an editor at the correct line."""
         code = """
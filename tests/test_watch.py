@@ -0,0 +1,82 @@
+import os
+import pickle
+import textwrap
+from types import SimpleNamespace
+
+from lineprofilergui import main
+from lineprofilergui.utils import icons_factory
+from lineprofilergui.watch import LprofFolderWatcher, merge_stats
+
+FUNC_INFO = ("script.py", 1, "profiled_function")
+
+
+def write_lprof(path, timings, unit=1e-9):
+    with open(path, "wb") as fid:
+        pickle.dump(SimpleNamespace(timings=timings, unit=unit), fid)
+    # Old enough to be considered completely written
+    os.utime(path, (0, 0))
+
+
+class TestFolderWatcher:
+    def test_merge_stats(self):
+        """Check that the timings are summed, whatever their unit."""
+        stats1 = SimpleNamespace(timings={FUNC_INFO: [(2, 1, 1000)]}, unit=1e-9)
+        stats2 = SimpleNamespace(timings={FUNC_INFO: [(2, 2, 3), (3, 1, 1)]}, unit=1e-6)
+        merged = merge_stats(stats1, stats2)
+        assert merged.unit == 1e-9
+        assert merged.timings == {FUNC_INFO: [(2, 3, 4000), (3, 1, 1000)]}
+
+    def test_watch_folder(self, qtbot, tmp_path):
+        """Check that the new files are loaded and merged per script."""
+        script = tmp_path / "script.py"
+        script.write_text(
+            textwrap.dedent(
+                """\
+                def profiled_function():
+                    return 1
+                """
+            )
+        )
+        func_info = (str(script), 1, "profiled_function")
+        write_lprof(tmp_path / "existing.lprof", {func_info: [(2, 1, 1000)]})
+
+        icons_factory()
+        win = main.UIMainWindow()
+        qtbot.addWidget(win)
+        win.watch_folder(tmp_path, merge=True)
+        assert win.actionWatchFolder.isChecked()
+
+        write_lprof(tmp_path / "job1.lprof", {func_info: [(2, 1, 1000)]})
+        write_lprof(tmp_path / "job2.lprof", {func_info: [(2, 2, 2000)]})
+        (tmp_path / "broken.lprof").write_bytes(b"not a pickle")
+        os.utime(tmp_path / "broken.lprof", (0, 0))
+        # Skip the debounce
+        win.folder_watcher.scan()
+
+        def merged():
+            assert win.historyCombo.count() == 1
+            assert win.historyCombo.currentText() == "script.py merged from 2 files"
+
+        qtbot.waitUntil(merged)
+        return_item = win.resultsTreeWidget.topLevelItem(0).child(1)
+        assert return_item.text(win.resultsTreeWidget.COL_HITS) == "3"
+        qtbot.waitUntil(
+            lambda: "broken.lprof" in win.dockOutputWidget.outputWidget.toPlainText()
+        )
+
+        # The files already seen are not loaded again
+        win.folder_watcher.scan()
+        qtbot.wait(2 * LprofFolderWatcher.DEBOUNCE // 10)
+        assert win.historyCombo.count() == 1
+
+        # No file is parsed while the watcher is paused
+        write_lprof(tmp_path / "job3.lprof", {func_info: [(2, 1, 1000)]})
+        os.utime(tmp_path / "job3.lprof", (0, 0))
+        with win.folder_watcher.paused():
+            win.folder_watcher.scan()
+            qtbot.wait(2 * LprofFolderWatcher.DEBOUNCE // 10)
+            assert win.folder_watcher.pending == [str(tmp_path / "job3.lprof")]
+        qtbot.waitUntil(
+            lambda: win.historyCombo.currentText() == "script.py merged from 3 files"
+        )
+        win.close()
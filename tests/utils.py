@@ -3,10 +3,14 @@ import textwrap
 from pathlib import Path
 
 from lineprofilergui import main
+from lineprofilergui.utils import icons_factory
 
 
-def run_code(code: str, tmp_path: Path, qtbot):
-    """Define helper function to run profiled code from UIMainWindow."""
+def run_code(code: str, tmp_path: Path, qtbot, **config):
+    """Define helper function to run profiled code from UIMainWindow.
+
+    Additional keyword arguments are set as attributes of the configuration.
+    """
     scriptfile = tmp_path / "script.py"
     scriptfile.write_text(textwrap.dedent(code))
 
@@ -14,11 +18,13 @@ def run_code(code: str, tmp_path: Path, qtbot):
     try:
         os.chdir(tmp_path)
 
-        main.icons_factory()
+        icons_factory()
         win = main.UIMainWindow()
         qtbot.addWidget(win)
 
         win.config.script = str(scriptfile)
+        for name, value in config.items():
+            setattr(win.config, name, value)
 
         with qtbot.waitSignal(win.profile_finished, timeout=10000):
             win.actionRun.trigger()